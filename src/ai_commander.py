@@ -76,7 +76,8 @@ class CommanderAI:
             if e.hp < e.max_hp * 0.4: d += 2
             if e.awe > 0: d += 1
             scored.append((d, e))
-        scored.sort(key=lambda x: (-x[0], id(x[1])))
+        # Tri stable: à score égal, l'ordre de l'armée est conservé (déterministe)
+        scored.sort(key=lambda x: -x[0])
         return scored
     
     def _assign_lanes(self, alive, enemies):
@@ -129,8 +130,10 @@ class CommanderAI:
     def _ranged_order(self, unit, enemies, prio):
         ux, uy = unit.position
         max_range = unit._max_range
+        has_los = self.battlefield.has_los
         for _, e in prio:
-            if abs(ux - e.position[0]) + abs(uy - e.position[1]) <= max_range:
+            if (abs(ux - e.position[0]) + abs(uy - e.position[1]) <= max_range
+                    and has_los(unit.position, e.position)):
                 return TacticalOrder("attack", target_unit=e, priority=3)
         c = min(enemies, key=lambda e: abs(ux - e.position[0]) + abs(uy - e.position[1]))
         return TacticalOrder("attack", target_unit=c, priority=1)
@@ -232,7 +235,7 @@ class CommanderAI:
             # Tireurs pas sur rempart → y monter
             if unit._max_range >= 4 and not on_ramp:
                 for y in range(1, bf.height - 1):
-                    if bf.grid[wall_x + 1][y] == 4 and not bf.is_occupied(wall_x + 1, y):
+                    if bf.cell(wall_x + 1, y) == 4 and not bf.is_occupied(wall_x + 1, y):
                         return TacticalOrder("protect", target_pos=(wall_x + 1, y), priority=3)
         
         # === Portes détruites: combat ouvert ===
@@ -250,21 +253,22 @@ def select_tactical_target(unit, battle, battlefield):
     
     ux, uy = unit.position
     max_range = unit._max_range
+    has_los = battlefield.has_los
     
     if order and order.order_type == "attack" and order.target_unit and order.target_unit.is_alive:
         tx, ty = order.target_unit.position
         dist = abs(ux - tx) + abs(uy - ty)
-        if dist <= max_range:
+        if dist <= max_range and has_los(unit.position, (tx, ty)):
             return order.target_unit
-        # Hors portée → attaquer blessé à portée
+        # Hors portée (ou hors de vue) → attaquer blessé visible à portée
         in_r = [(e, abs(ux - e.position[0]) + abs(uy - e.position[1])) for e in enemies]
-        in_r = [(e, d) for e, d in in_r if d <= max_range]
+        in_r = [(e, d) for e, d in in_r if d <= max_range and has_los(unit.position, e.position)]
         if in_r:
-            return min(in_r, key=lambda ed: (ed[0].hp / max(1, ed[0].max_hp), id(ed[0])))[0]
+            return min(in_r, key=lambda ed: ed[0].hp / max(1, ed[0].max_hp))[0]
     
     if order and order.order_type in ("flank", "hold", "protect"):
         in_r = [(e, abs(ux - e.position[0]) + abs(uy - e.position[1])) for e in enemies]
-        in_r = [(e, d) for e, d in in_r if d <= max_range]
+        in_r = [(e, d) for e, d in in_r if d <= max_range and has_los(unit.position, e.position)]
         if in_r:
             return min(in_r, key=lambda ed: ed[0].hp)[0]
     
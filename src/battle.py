@@ -1,25 +1,81 @@
 import copy
 import random
+from operator import attrgetter
 
+import dice
 from battlefield import Battlefield
-from effects import FloatingText, AttackLine
+from effects import AttackLine
 from ai_commander import CommanderAI
+from replay import ReplayRecorder
+from battle_stats import BattleStats
+from coop import CoopPlanner
+from parallel import ParallelPlanner
+from unit import Unit
+
+# État d'une unité capturé par Battle.snapshot (tout sauf les textes flottants)
+_UNIT_STATE = tuple(s for s in Unit.__slots__ if s != 'floating_texts')
+_get_unit_state = attrgetter(*_UNIT_STATE)
 
 
 class Battle:
+    """Simulation d'une bataille entre deux armées.
+    
+    headless=True: mode sans rendu (simulations en masse). Aucun effet visuel
+    ni texte flottant n'est alloué et cell_size n'est plus nécessaire.
+    Ce module n'importe jamais pygame.
+    
+    seed: graine du générateur aléatoire propre à la bataille (self.rng), utilisé
+    pour la carte, le placement, le combat et les sorts. Une bataille est
+    entièrement reproductible à partir de (armées, carte, seed).
+    seed=None tire une graine au hasard (conservée dans self.seed).
+    
+    record=True: enregistre un replay compact (self.recorder, voir replay.py),
+    à sauver avec save_replay() et à relire avec replay.ReplayPlayer.
+    
+    coop=True: les unités en approche qui perdent la course aux cases sont
+    planifiées ensemble par un A* spatio-temporel fenêtré (self.coop, voir
+    coop.py) au lieu du pas latéral de find_lateral_advance; coop=n fixe la
+    fenêtre à n rounds.
+    
+    parallel=n: les déplacements de la passe d'approche sont calculés d'avance
+    dans n processus (self.parallel, voir parallel.py), puis validés dans
+    l'ordre habituel; résultats identiques au calcul séquentiel.
+    
+    copy_armies=False: les listes d'unités fournies sont utilisées telles
+    quelles (pas de deepcopy) — pour des unités fraîchement construites.
+    
+    snapshot()/restore(snap): capture et restauration rapides de l'état complet
+    (unités, grille, portes, murs temporaires, sorts, générateur) pour les resets
+    et l'exploration de variantes.
+    """
     def __init__(self, army1, army2, battlefield_width=40, battlefield_height=30, 
-                 obstacle_count=8, map_name="Prairie"):
-        self.army1 = copy.deepcopy(army1)
-        self.army2 = copy.deepcopy(army2)
+                 obstacle_count=8, map_name="Prairie", headless=False, seed=None,
+                 record=False, copy_armies=True, stats=False,
+                 coop=False, parallel=0):
+        if copy_armies:
+            army1, army2 = copy.deepcopy((army1, army2))
+        self.army1 = list(army1)
+        self.army2 = list(army2)
         self.map_name = map_name
+        self.headless = headless
+        
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
         
         # Générer la map
         from maps import generate_map
-        grid, map_data = generate_map(map_name, battlefield_width, battlefield_height)
+        grid, map_data = generate_map(map_name, battlefield_width, battlefield_height, self.rng)
         self.battlefield = Battlefield(battlefield_width, battlefield_height, 
-                                        obstacle_count, map_name, grid, map_data)
+                                        obstacle_count, map_name, grid, map_data, self.rng)
         self.round = 1
-        self.visual_effects = {'projectiles': [], 'attack_lines': [], 'target_indicators': []}
+        if headless:
+            self.visual_effects = None
+            for u in self.army1 + self.army2:
+                u.floating_texts = None
+        else:
+            self.visual_effects = {'projectiles': [], 'attack_lines': [], 'target_indicators': []}
         
         self.army1_initial_size = len(self.army1)
         self.army2_initial_size = len(self.army2)
@@ -32,6 +88,12 @@ class Battle:
         
         self._alive_cache = {'army1': [], 'army2': [], 'dirty': True}
         
+        # Appartenance pour l'index spatial (bf.spatial) et l'ordre de départage
+        for key, army in ((1, self.army1), (2, self.army2)):
+            for i, u in enumerate(army):
+                u._army_key = key
+                u._roster_idx = i
+        
         center_y = self.battlefield.height // 2
         self._place_armies(center_y)
         
@@ -42,6 +104,19 @@ class Battle:
         # Initialiser les positions d'animation (pas de transition au premier frame)
         for u in self.army1 + self.army2:
             u._prev_position = u.position
+        
+        self.recorder = ReplayRecorder(self) if record else None
+        self.battlefield.recorder = self.recorder
+        # Temps par phase et compteurs (None = désactivé, coût nul)
+        self.stats = BattleStats() if stats else None
+        self.battlefield.stats = self.stats
+        # Planification coopérative de l'approche (None = passe gloutonne)
+        if coop:
+            self.coop = CoopPlanner() if coop is True else CoopPlanner(window=coop)
+        else:
+            self.coop = None
+        # Planification parallèle de l'approche (None = calcul séquentiel)
+        self.parallel = ParallelPlanner(parallel) if parallel else None
 
     def _place_armies(self, center_y):
         bf = self.battlefield
@@ -97,10 +172,9 @@ class Battle:
         for u in self.army2:
             army2_roles[u.role].append(u)
         
-        import random as _rng
         for roles in (army1_roles, army2_roles):
             for role_list in roles.values():
-                _rng.shuffle(role_list)
+                self.rng.shuffle(role_list)
         
         # Placement attaquant (armée 1) — à gauche du centre
         # Lignes resserrées pour que l'armée avance de manière cohésive
@@ -124,7 +198,7 @@ class Battle:
             # Trouver les Y des portes (cases type 3 sur wall_x)
             gate_y_set = set()
             for y in range(bf.height):
-                if bf.grid[wall_x][y] == 3:
+                if bf.cell(wall_x, y) == 3:
                     gate_y_set.add(y)
             # Zone porte élargie (±2 cases) pour garder les CaC proches
             gate_zone = set()
@@ -149,7 +223,7 @@ class Battle:
             # Alterner haut/bas de la porte pour étaler les tireurs
             rampart_slots = []
             for y in range(1, bf.height - 1):
-                if y not in gate_zone and bf.grid[wall_x + 1][y] == 4:
+                if y not in gate_zone and bf.cell(wall_x + 1, y) == 4:
                     rampart_slots.append(y)
             
             # Trier par distance au centre de la porte (les plus proches d'abord)
@@ -210,7 +284,7 @@ class Battle:
                         pos = (wall_x + dx, gy)
                         if pos in placed_gate_positions:
                             continue
-                        cell = bf.grid[pos[0]][pos[1]] if 0 <= pos[0] < bf.width and 0 <= pos[1] < bf.height else -1
+                        cell = bf.cell(*pos) if 0 <= pos[0] < bf.width and 0 <= pos[1] < bf.height else -1
                         # Éviter les remparts pour les CaC
                         if cell == 4:
                             continue
@@ -232,7 +306,7 @@ class Battle:
                                 pos = (wall_x + dx, ny)
                                 if not (0 <= pos[0] < bf.width and 0 <= pos[1] < bf.height):
                                     continue
-                                cell = bf.grid[pos[0]][pos[1]]
+                                cell = bf.cell(*pos)
                                 if cell == 4:  # Pas de CaC sur rempart
                                     continue
                                 if pos in placed_gate_positions:
@@ -251,8 +325,8 @@ class Battle:
             # Ouvrir les portes si l'armée 2 n'a aucune unité à distance
             has_ranged = any(u._max_range >= 4 for u in self.army2 if u.is_alive)
             if not has_ranged:
-                for pos in bf.gate_hp:
-                    bf.gate_hp[pos] = 0
+                for x, y in list(bf.gate_hp):
+                    bf.set_gate_hp(x, y, 0)
         else:
             a2_front = mid_x + gap
             a2_mid   = a2_front + 1
@@ -303,6 +377,74 @@ class Battle:
             self._alive_cache['dirty'] = False
         return self._alive_cache['all']
 
+    # ─── Snapshot / restore ───
+
+    def snapshot(self):
+        """État complet de la bataille sous forme d'enregistrement plat (voir restore).
+
+        Les effets visuels et textes flottants ne sont pas capturés; le replay
+        en cours d'enregistrement non plus.
+        """
+        bf = self.battlefield
+        units = self.army1_roster + self.army2_roster
+        return {
+            'round': self.round,
+            'rng': self.rng.getstate(),
+            'army1': list(self.army1),
+            'army2': list(self.army2),
+            'army1_fled': list(self.army1_fled),
+            'army2_fled': list(self.army2_fled),
+            'units': [_get_unit_state(u) for u in units],
+            'cooldowns': [[s._cd_timer for s in u.spells] for u in units],
+            'placement': bf.placement_state(),
+            'gate_hp': dict(bf.gate_hp),
+            'temp_walls': list(bf._temp_walls),
+            'cells': {c: bf.cell(*c) for c in bf._grid_base},
+            'grid_version': bf.grid_version,
+            'path_cache': bf.path_cache.state(),
+        }
+
+    def restore(self, snap):
+        """Remet la bataille dans l'état capturé par snapshot()."""
+        bf = self.battlefield
+        self.round = snap['round']
+        self.rng.setstate(snap['rng'])
+        self.army1 = list(snap['army1'])
+        self.army2 = list(snap['army2'])
+        self.army1_fled = list(snap['army1_fled'])
+        self.army2_fled = list(snap['army2_fled'])
+        self._alive_cache['dirty'] = True
+        
+        units = self.army1_roster + self.army2_roster
+        for u, state, cds in zip(units, snap['units'], snap['cooldowns']):
+            for name, value in zip(_UNIT_STATE, state):
+                setattr(u, name, value)
+            if u.floating_texts:
+                u.floating_texts.clear()
+            for spell, cd in zip(u.spells, cds):
+                spell._cd_timer = cd
+        
+        # Grille: seules les cases modifiées depuis le début de la bataille diffèrent
+        cells = snap['cells']
+        for (x, y), original in bf._grid_base.items():
+            bf.cells[x * bf.height + y] = cells.get((x, y), original)
+        # Le cache de chemins fait partie de l'état (il influence les déplacements);
+        # les champs de flux, eux, se recalculent à l'identique
+        bf.grid_version = snap['grid_version']
+        bf.path_cache.set_state(snap['path_cache'])
+        bf.flow.clear()
+        bf.los.clear()
+        bf.hpa.invalidate_all()
+        bf._temp_walls = list(snap['temp_walls'])
+        bf.gate_hp = dict(snap['gate_hp'])
+        
+        bf.restore_placement(snap['placement'])
+        bf.rebuild_passable()
+        
+        if self.visual_effects is not None:
+            for effects in self.visual_effects.values():
+                effects.clear()
+
     def _refresh_army_sets(self):
         """Met à jour les sets d'appartenance pour O(1) lookup."""
         if not hasattr(self, '_army1_ids') or self._alive_cache['dirty']:
@@ -317,13 +459,17 @@ class Battle:
         self._refresh_army_sets()
         return self.army1 if id(unit) in self._army1_ids else self.army2
 
+    @staticmethod
+    def _enemy_key(unit):
+        return 2 if unit._army_key == 1 else 1
+
     def get_closest_enemy(self, unit):
-        enemies = self.get_enemies(unit)
-        alive_enemies = [e for e in enemies if e.is_alive]
-        if not alive_enemies:
-            return None
-        ux, uy = unit.position
-        return min(alive_enemies, key=lambda e: abs(e.position[0] - ux) + abs(e.position[1] - uy))
+        return self.battlefield.spatial.nearest(unit.position, self._enemy_key(unit))[0]
+
+    def get_closest_enemy_dist(self, unit, default=999):
+        """Distance à l'ennemi vivant le plus proche (default si aucun)."""
+        _, d = self.battlefield.spatial.nearest(unit.position, self._enemy_key(unit))
+        return default if d is None else d
 
     def get_units_in_radius(self, center_pos, radius, unit_list):
         result = []
@@ -380,21 +526,19 @@ class Battle:
                 for unit in army:
                     if not unit.is_alive or unit.fleeing:
                         continue
-                    if hasattr(unit, '_half_army_malus_applied') and unit._half_army_malus_applied:
+                    if unit._half_army_malus_applied:
                         continue
                     
                     # Test de moral : lancer 1d6, réussir si <= bravoure effective
                     unit._half_army_malus_applied = True
-                    if not unit.morale_check():
+                    if not unit.morale_check(self.rng):
                         unit.morale_malus += 1
-                        unit.floating_texts.append(
-                            FloatingText("-1 Moral (Pertes!)", (255, 100, 60), 90))
+                        unit.add_floating_text("-1 Moral (Pertes!)", (255, 100, 60), 90)
                         
                         if unit.get_effective_morale() <= 0:
                             unit.fleeing = True
                             unit.status_text = "FUITE!"
-                            unit.floating_texts.append(
-                                FloatingText("FUITE!", (255, 50, 50), 100))
+                            unit.add_floating_text("FUITE!", (255, 50, 50), 100)
                         else:
                             unit.afraid = True
                             unit.status_text = "PEUR"
@@ -404,25 +548,24 @@ class Battle:
                 for unit in army:
                     if not unit.is_alive or unit.fleeing:
                         continue
-                    if hasattr(unit, '_critical_malus_applied') and unit._critical_malus_applied:
+                    if unit._critical_malus_applied:
                         continue
                     
                     unit._critical_malus_applied = True
-                    if not unit.morale_check():
+                    if not unit.morale_check(self.rng):
                         unit.morale_malus += 1
-                        unit.floating_texts.append(
-                            FloatingText("-1 Moral (Déroute!)", (255, 50, 50), 90))
+                        unit.add_floating_text("-1 Moral (Déroute!)", (255, 50, 50), 90)
                         
                         if unit.get_effective_morale() <= 0:
                             unit.fleeing = True
                             unit.status_text = "FUITE!"
-                            unit.floating_texts.append(
-                                FloatingText("DÉROUTE!", (255, 30, 30), 100))
+                            unit.add_floating_text("DÉROUTE!", (255, 30, 30), 100)
                         else:
                             unit.afraid = True
         
         # --- 2) Auras de peur (portée 4 cases, ennemis uniquement) ---
         FEAR_RANGE = 4
+        spatial = self.battlefield.spatial
         for unit in self.get_all_alive():
             if unit.fleeing:
                 continue
@@ -432,15 +575,13 @@ class Battle:
             under_fear = False
             max_aura = 0
             min_dist = 99
-            for enemy in self.get_enemies(unit):
-                if not enemy.is_alive or enemy.fear_aura == 0:
+            for enemy, dist in spatial.within_dist(unit.position, FEAR_RANGE, self._enemy_key(unit)):
+                if enemy.fear_aura == 0:
                     continue
-                dist = self.battlefield.manhattan_distance(unit.position, enemy.position)
-                if dist <= FEAR_RANGE:
-                    if enemy.fear_aura > max_aura or (enemy.fear_aura == max_aura and dist < min_dist):
-                        max_aura = enemy.fear_aura
-                        min_dist = dist
-                    under_fear = True
+                if enemy.fear_aura > max_aura or (enemy.fear_aura == max_aura and dist < min_dist):
+                    max_aura = enemy.fear_aura
+                    min_dist = dist
+                under_fear = True
             
             if under_fear:
                 unit.apply_fear_effect(max_aura, min_dist)
@@ -456,19 +597,16 @@ class Battle:
             
             # Si au contact d'un ennemi et que l'unité a déjà subi des dégâts
             if unit.hp < unit.max_hp:
-                closest = self.get_closest_enemy(unit)
-                if closest:
-                    dist = self.battlefield.manhattan_distance(unit.position, closest.position)
-                    if dist <= 1:  # Au corps à corps
-                        # Test seulement si PV < 50% 
-                        if unit.hp <= unit.max_hp // 2:
-                            if not unit.morale_check():
-                                unit.afraid = True
-                                unit.status_text = "PEUR"
-                                unit.floating_texts.append(
-                                    FloatingText("Peur!", (255, 180, 60), 60))
+                # Au corps à corps: un ennemi à 1 case
+                if spatial.any_within(unit.position, 1, self._enemy_key(unit)):
+                    # Test seulement si PV < 50% 
+                    if unit.hp <= unit.max_hp // 2:
+                        if not unit.morale_check(self.rng):
+                            unit.afraid = True
+                            unit.status_text = "PEUR"
+                            unit.add_floating_text("Peur!", (255, 180, 60), 60)
 
-    def _charge_phase(self, alive, cell_size):
+    def _charge_phase(self, alive, cell_size=None):
         """Phase de charge: les unités avec charge se ruent sur un ennemi à distance de charge.
         
         Nerfé: portée réduite (vitesse à 1.5x au lieu de 2x), nécessite un chemin libre,
@@ -487,11 +625,9 @@ class Battle:
             # Trouver un ennemi dans la zone de charge
             best_target = None
             best_dist = 999
-            for enemy in self.get_enemies(unit):
-                if not enemy.is_alive:
-                    continue
-                d = self.battlefield.manhattan_distance(unit.position, enemy.position)
-                if min_dist <= d <= max_dist and d < best_dist:
+            for enemy, d in self.battlefield.spatial.within_dist(unit.position, max_dist,
+                                                                  self._enemy_key(unit)):
+                if min_dist <= d and d < best_dist:
                     best_target = enemy
                     best_dist = d
             
@@ -526,18 +662,18 @@ class Battle:
             unit.has_charged = True
             
             # Effet visuel: ligne de charge
-            start_px = (unit.position[0] * cell_size + cell_size // 2,
-                        unit.position[1] * cell_size + cell_size // 2)
-            end_px = (best_target.position[0] * cell_size + cell_size // 2,
-                      best_target.position[1] * cell_size + cell_size // 2)
-            
             charge_color = (255, 200, 50) if unit.charge_montee else (100, 200, 255)
-            self.visual_effects['attack_lines'].append(
-                AttackLine(start_px, end_px, charge_color, 35)
-            )
+            if self.visual_effects is not None:
+                start_px = (unit.position[0] * cell_size + cell_size // 2,
+                            unit.position[1] * cell_size + cell_size // 2)
+                end_px = (best_target.position[0] * cell_size + cell_size // 2,
+                          best_target.position[1] * cell_size + cell_size // 2)
+                self.visual_effects['attack_lines'].append(
+                    AttackLine(start_px, end_px, charge_color, 35)
+                )
             
             label = "CHARGE!" if unit.charge_montee else "CHARGE D'AÏDA!"
-            unit.floating_texts.append(FloatingText(label, charge_color, 70))
+            unit.add_floating_text(label, charge_color, 70)
             
             # Attaque de charge: seulement la première arme CaC (pas toutes les armes)
             if unit.armes:
@@ -550,9 +686,49 @@ class Battle:
                 else:
                     unit.perform_attacks(best_target, self.battlefield, self.visual_effects, cell_size)
 
-    def simulate_round(self, cell_size):
+    def _approach_commit(self, unit, new_pos, target, reserved, moves, deferred):
+        """Passe 3: réserve la case choisie par compute_move, ou se rabat si elle est prise."""
+        bf = self.battlefield
+        if new_pos and bf._can_move_to(unit, new_pos, reserved):
+            moves[unit] = new_pos
+            reserved.update(bf._get_reserved_cells(unit, new_pos))
+        elif unit.position:
+            # Bloqué: essayer un mouvement latéral SEULEMENT si pas d'ennemi au contact
+            # (sinon on risque de s'éloigner d'un ennemi qu'on devrait combattre)
+            enemy_in_range = bf.spatial.any_within(unit.position, unit._max_range,
+                                                   self._enemy_key(unit))
+            if not enemy_in_range and self.coop is not None and unit.size <= 1:
+                # Planification coopérative (coop.py) après les autres approchants
+                deferred.append((unit, target, unit.vitesse))
+            elif not enemy_in_range:
+                alt_pos = bf.find_lateral_advance(unit, self, reserved)
+                if alt_pos and bf._can_move_to(unit, alt_pos, reserved):
+                    moves[unit] = alt_pos
+                    reserved.update(bf._get_reserved_cells(unit, alt_pos))
+                else:
+                    reserved.update(bf._get_reserved_cells(unit, unit.position))
+            else:
+                reserved.update(bf._get_reserved_cells(unit, unit.position))
+
+    @staticmethod
+    def _cohesion_speed(unit, advance_gap):
+        """Vitesse effective d'une unité en approche à advance_gap cases devant la médiane."""
+        # Si l'unité est > 6 cases en avance de la médiane, elle ralentit (vitesse min 1)
+        if advance_gap > 6 and unit._max_range < 4:
+            return max(1, unit.vitesse - 1)
+        return unit.vitesse
+
+    def simulate_round(self, cell_size=None):
+        """Simule un round complet. cell_size n'est utilisé que pour les effets visuels."""
         self._alive_cache['dirty'] = True
-        self.visual_effects['target_indicators'] = []
+        vfx = self.visual_effects
+        if vfx is not None:
+            vfx['target_indicators'] = []
+        stats = self.stats
+        if stats is not None:
+            stats.begin_round(self.round)
+        self.battlefield.flow.new_round()
+        self.battlefield.los.new_round()
         
         # Déroute: si une armée n'a plus de combattants, tous les restants fuient
         for army in [self.army1, self.army2]:
@@ -562,11 +738,16 @@ class Battle:
                     if u.is_alive and not u.fleeing:
                         u.fleeing = True
                         u.status_text = "DÉROUTE"
-                        u.floating_texts.append(FloatingText("Déroute!", (255, 100, 50), 80))
+                        u.add_floating_text("Déroute!", (255, 100, 50), 80)
+        
+        if stats is not None:
+            stats.lap('deroute')
         
         # === PHASE DE COMMANDEMENT: les IA assignent les ordres ===
         self.commander1.issue_orders(self)
         self.commander2.issue_orders(self)
+        if stats is not None:
+            stats.lap('commandement')
         
         alive = self.get_all_alive()
         
@@ -579,9 +760,12 @@ class Battle:
         
         bf = self.battlefield
         
+        spatial = bf.spatial
         static_units = []   # Fuyards, artillerie
         engaged = []        # Au contact (distance ≤ portée+1)
         approaching = []    # En approche (pas encore au contact)
+        has_enemies = {1: any(e.is_alive for e in self.army1),
+                       2: any(e.is_alive for e in self.army2)}
         
         for u in alive:
             if u.fleeing or u.vitesse <= 0:
@@ -591,16 +775,12 @@ class Battle:
             if bf.gate_hp and bf.is_rampart(*u.position) and (u._max_range >= 4 or bool(u.spells)):
                 engaged.append(u)
                 continue
-            enemies = self.get_enemies(u)
-            alive_enemies = [e for e in enemies if e.is_alive]
-            if alive_enemies:
-                min_d = min(bf.manhattan_distance(u.position, e.position) for e in alive_enemies)
-                if min_d <= u._max_range + 1:
-                    engaged.append(u)
-                else:
-                    approaching.append(u)
-            else:
+            if not has_enemies[self._enemy_key(u)]:
                 static_units.append(u)
+            elif spatial.any_within(u.position, u._max_range + 1, self._enemy_key(u)):
+                engaged.append(u)
+            else:
+                approaching.append(u)
         
         # === Pass 1: statiques — réservent leur position ===
         reserved = set()
@@ -609,107 +789,114 @@ class Battle:
         for unit in static_units:
             new_pos, target = bf.compute_move(unit, self, reserved)
             unit.current_target = target
-            if target:
-                self.visual_effects['target_indicators'].append((unit, target))
+            if target and vfx is not None:
+                vfx['target_indicators'].append((unit, target))
             if new_pos and bf._can_move_to(unit, new_pos, reserved):
                 moves[unit] = new_pos
                 reserved.update(bf._get_reserved_cells(unit, new_pos))
             elif unit.position:
                 reserved.update(bf._get_reserved_cells(unit, unit.position))
         
+        if stats is not None:
+            stats.lap('mouvement_statiques')
+        
         # === Pass 2: engagées — se déplacent, triées par proximité ===
-        engaged.sort(key=lambda u: min(
-            (bf.manhattan_distance(u.position, e.position)
-             for e in self.get_enemies(u) if e.is_alive), default=999))
+        engaged.sort(key=self.get_closest_enemy_dist)
         
         for unit in engaged:
             new_pos, target = bf.compute_move(unit, self, reserved)
             unit.current_target = target
-            if target:
-                self.visual_effects['target_indicators'].append((unit, target))
+            if target and vfx is not None:
+                vfx['target_indicators'].append((unit, target))
             if new_pos and bf._can_move_to(unit, new_pos, reserved):
                 moves[unit] = new_pos
                 reserved.update(bf._get_reserved_cells(unit, new_pos))
             elif unit.position:
                 reserved.update(bf._get_reserved_cells(unit, unit.position))
         
+        if stats is not None:
+            stats.lap('mouvement_engages')
+        
         # === Pass 3: en approche — avance cohésive ===
         # Trier les approchants du PLUS LOIN au PLUS PROCHE de l'ennemi
         # Ainsi les unités de derrière réservent d'abord leur destination
         # et les unités de devant s'adaptent (au lieu de tout bloquer)
-        approaching.sort(key=lambda u: min(
-            (bf.manhattan_distance(u.position, e.position)
-             for e in self.get_enemies(u) if e.is_alive), default=999),
-            reverse=True)
+        approach_dist = {u: self.get_closest_enemy_dist(u) for u in approaching}
+        approaching.sort(key=approach_dist.get, reverse=True)
         
         # Calculer la distance min de l'ennemi parmi les approchants
         # pour limiter la vitesse des plus rapides (cohésion)
         if approaching:
-            approach_dists = []
-            for u in approaching:
-                ae = [e for e in self.get_enemies(u) if e.is_alive]
-                if ae:
-                    approach_dists.append(
-                        min(bf.manhattan_distance(u.position, e.position) for e in ae))
+            approach_dists = [d for d in approach_dist.values() if d != 999]
             if approach_dists:
                 median_dist = sorted(approach_dists)[len(approach_dists) // 2]
             else:
                 median_dist = 999
         
-        for unit in approaching:
-            # Cohésion: les unités très en avance ralentissent pour ne pas
-            # se retrouver isolées. On limite la vitesse effective si l'unité
-            # est significativement plus proche que la médiane de son armée.
-            ae = [e for e in self.get_enemies(unit) if e.is_alive]
-            if ae:
-                my_dist = min(bf.manhattan_distance(unit.position, e.position) for e in ae)
-            else:
-                my_dist = 999
-            
-            # Si l'unité est > 6 cases en avance de la médiane, elle ralentit
+        # Planification coopérative (coop.py): les unités d'une case qui perdent
+        # la course sont planifiées ensemble après les autres, au lieu du pas latéral
+        coop = self.coop
+        deferred = []
+        
+        # Cohésion: les unités très en avance ralentissent pour ne pas
+        # se retrouver isolées. On limite la vitesse effective si l'unité
+        # est significativement plus proche que la médiane de son armée.
+        speeds = [self._cohesion_speed(u, median_dist - approach_dist[u]) for u in approaching]
+        
+        # Planification parallèle (parallel.py): déplacements spéculés d'avance,
+        # repris ci-dessous s'ils sont encore exacts
+        parallel = self.parallel
+        if parallel is not None:
+            parallel.plan(self, approaching, speeds, reserved)
+            planned = parallel.planned
+            replanned = parallel.replanned
+        
+        for unit, speed in zip(approaching, speeds):
             orig_speed = unit.vitesse
-            advance_gap = median_dist - my_dist
-            if advance_gap > 6 and unit._max_range < 4:
-                # Unité très en avance: ralentir (vitesse min 1)
-                unit.vitesse = max(1, orig_speed - 1)
+            unit.vitesse = speed
             
-            new_pos, target = bf.compute_move(unit, self, reserved)
+            spec = parallel.take(bf, unit, reserved) if parallel is not None else None
+            if spec is not None:
+                new_pos, target = spec
+            else:
+                new_pos, target = bf.compute_move(unit, self, reserved)
             unit.current_target = target
-            if target:
-                self.visual_effects['target_indicators'].append((unit, target))
-            if new_pos and bf._can_move_to(unit, new_pos, reserved):
-                moves[unit] = new_pos
-                reserved.update(bf._get_reserved_cells(unit, new_pos))
-            elif unit.position:
-                # Bloqué: essayer un mouvement latéral SEULEMENT si pas d'ennemi au contact
-                # (sinon on risque de s'éloigner d'un ennemi qu'on devrait combattre)
-                ux, uy = unit.position
-                enemy_in_range = any(
-                    abs(ux - e.position[0]) + abs(uy - e.position[1]) <= unit._max_range
-                    for e in self.get_enemies(unit) if e.is_alive
-                )
-                if not enemy_in_range:
-                    alt_pos = bf.find_lateral_advance(unit, self, reserved)
-                    if alt_pos and bf._can_move_to(unit, alt_pos, reserved):
-                        moves[unit] = alt_pos
-                        reserved.update(bf._get_reserved_cells(unit, alt_pos))
-                    else:
-                        reserved.update(bf._get_reserved_cells(unit, unit.position))
-                else:
-                    reserved.update(bf._get_reserved_cells(unit, unit.position))
+            if target and vfx is not None:
+                vfx['target_indicators'].append((unit, target))
+            self._approach_commit(unit, new_pos, target, reserved, moves, deferred)
             
             # Restaurer la vitesse originale
             unit.vitesse = orig_speed
         
+        if parallel is not None and stats is not None:
+            stats.count('parallel_planned', parallel.planned - planned)
+            stats.count('parallel_replanned', parallel.replanned - replanned)
+        
+        if deferred:
+            # Du front vers l'arrière: les cases libérées ce round profitent à l'arrière
+            deferred.sort(key=lambda entry: approach_dist[entry[0]])
+            blocked = coop.plan(bf, deferred, reserved, moves)
+            if stats is not None:
+                stats.count('coop_conflicts', len(deferred))
+                stats.count('coop_blocked', blocked)
+        
+        if stats is not None:
+            stats.count('units_moved', sum(1 for u, p in moves.items() if p != u.position))
         for unit, new_pos in moves.items():
             bf.move_unit(unit, new_pos)
+        if stats is not None:
+            stats.lap('mouvement_approche')
         
         # Phase de moral (pertes lourdes + auras + stress au combat)
         self.morale_phase()
+        if stats is not None:
+            stats.lap('moral')
         
         # Phase Rempart: mettre à jour _on_wall dynamiquement
         for unit in alive:
             unit._on_wall = self.battlefield.is_rampart(*unit.position)
+        if stats is not None:
+            stats.lap('rempart')
         
         # Phase Phalange: +1 sauvegarde si adjacent à un allié phalange
         for unit in alive:
@@ -717,23 +904,27 @@ class Battle:
         for unit in alive:
             if not unit.phalange or not unit.is_alive:
                 continue
-            for ally in self.get_allies(unit):
-                if not ally.is_alive or not ally.phalange or ally == unit:
+            for ally in self.battlefield.spatial.within(unit.position, 1, unit._army_key):
+                if not ally.phalange or ally == unit:
                     continue
-                dist = self.battlefield.manhattan_distance(unit.position, ally.position)
-                if dist <= 1:
-                    if not unit._phalange_bonus_active:
-                        unit._phalange_bonus_active = True
-                        unit.sauvegarde = max(1, unit.sauvegarde - 1)
-                    break  # Un seul bonus suffit
+                if not unit._phalange_bonus_active:
+                    unit._phalange_bonus_active = True
+                    unit.sauvegarde = max(1, unit.sauvegarde - 1)
+                break  # Un seul bonus suffit
+        if stats is not None:
+            stats.lap('phalange')
         
         # Phase de Charge (avant les attaques normales)
         self._charge_phase(alive, cell_size)
+        if stats is not None:
+            stats.lap('charge')
         
         # Sorts
         for unit in alive:
             if unit.spells and unit.is_alive:
                 unit.cast_random_spell(self, self.visual_effects, cell_size)
+        if stats is not None:
+            stats.lap('sorts')
         
         # Attaques
         _units_attacked_gate = set()
@@ -771,56 +962,53 @@ class Battle:
                     # Arbalétriers/archers mobiles: priorité ennemis
                     # Artillerie (vitesse 0): tire sur portes même s'il y a des ennemis
                     if arme.porte >= 4 and not is_artillery:
-                        enemies_in_range = any(
-                            e.is_alive and self.battlefield.manhattan_distance((ux, uy), e.position) <= arme.porte
-                            for e in self.army2
-                        )
-                        if enemies_in_range:
+                        if self.battlefield.spatial.any_within((ux, uy), arme.porte, 2):
                             continue
                     
-                    for _ in range(arme.nb_attaque):
-                        gate_save_mod = min(7, gate_save - arme.perforation)
-                        save_roll = random.randint(1, 6)
-                        if save_roll >= gate_save_mod:
-                            continue
-                        total_dmg += max(1, arme.lancer_degats())
+                    if stats is not None:
+                        stats.count('attacks_rolled', arme.nb_attaque)
+                    gate_save_mod = min(7, gate_save - arme.perforation)
+                    unsaved = arme.nb_attaque - dice.binomial(
+                        arme.nb_attaque, dice.d6_at_least(gate_save_mod), self.rng)
+                    total_dmg += dice.total_damage(arme, unsaved, self.rng, floor=1)
                 
                 if total_dmg > 0:
                     destroyed = self.battlefield.damage_gate(gx, gy, total_dmg)
                     hp_left = self.battlefield.gate_hp.get((gx, gy), 0)
-                    unit.floating_texts.append(
-                        FloatingText(f"-{total_dmg} Porte ({hp_left})", (200, 150, 50), 40))
+                    unit.add_floating_text(f"-{total_dmg} Porte ({hp_left})", (200, 150, 50), 40)
                     _units_attacked_gate.add(id(unit))
                     if destroyed:
-                        unit.floating_texts.append(
-                            FloatingText("PORTE DÉTRUITE!", (255, 200, 50), 90))
+                        unit.add_floating_text("PORTE DÉTRUITE!", (255, 200, 50), 90)
                 elif best_gate_dist <= 1 and unit._max_range < 4:
-                    unit.floating_texts.append(
-                        FloatingText("Porte résiste!", (150, 130, 80), 30))
+                    unit.add_floating_text("Porte résiste!", (150, 130, 80), 30)
                     _units_attacked_gate.add(id(unit))
         
+        if stats is not None:
+            stats.lap('portes')
+        
         # Attaques normales (unités qui n'ont pas tapé une porte)
         from ai_commander import select_tactical_target
+        has_los = self.battlefield.has_los
         for unit in alive:
             if unit.is_alive and id(unit) not in _units_attacked_gate:
                 target = select_tactical_target(unit, self, self.battlefield)
                 ux, uy = unit.position
                 
-                # Si la cible tactique est hors de portée, chercher un ennemi à portée
+                # Si la cible tactique est hors de portée (ou cachée), chercher un ennemi à portée
                 if target:
                     td = abs(ux - target.position[0]) + abs(uy - target.position[1])
-                    if td > unit._max_range:
-                        # Cible IA hors de portée: fallback sur l'ennemi à portée le plus blessé
-                        enemies = self.get_enemies(unit)
-                        in_range = [e for e in enemies if e.is_alive and
-                                    abs(ux - e.position[0]) + abs(uy - e.position[1]) <= unit._max_range]
+                    if td > unit._max_range or not has_los(unit.position, target.position):
+                        # Cible IA hors de portée: fallback sur l'ennemi visible à portée le plus blessé
+                        in_range = [e for e in self.battlefield.spatial.within(
+                            unit.position, unit._max_range, self._enemy_key(unit))
+                            if has_los(unit.position, e.position)]
                         if in_range:
                             target = min(in_range, key=lambda e: (e.hp / max(1, e.max_hp), abs(ux - e.position[0]) + abs(uy - e.position[1])))
                 else:
-                    # Pas de cible tactique: chercher l'ennemi le plus proche à portée
-                    enemies = self.get_enemies(unit)
-                    in_range = [e for e in enemies if e.is_alive and
-                                abs(ux - e.position[0]) + abs(uy - e.position[1]) <= unit._max_range]
+                    # Pas de cible tactique: chercher l'ennemi visible le plus proche à portée
+                    in_range = [e for e in self.battlefield.spatial.within(
+                        unit.position, unit._max_range, self._enemy_key(unit))
+                        if has_los(unit.position, e.position)]
                     if in_range:
                         target = min(in_range, key=lambda e: abs(ux - e.position[0]) + abs(uy - e.position[1]))
                 
@@ -833,43 +1021,47 @@ class Battle:
                 unit.sauvegarde += 1
                 unit._phalange_bonus_active = False
         
+        if stats is not None:
+            stats.lap('attaques')
+        
         # Régénération + tick buffs
         for unit in self.army1 + self.army2:
-            unit.regenerate()
+            unit.regenerate(self.rng)
             unit.tick_armor_buff()
         
+        if stats is not None:
+            stats.lap('regeneration')
+        
         # Murs temporaires: décrémenter et retirer
-        if hasattr(self.battlefield, '_temp_walls'):
+        if self.battlefield._temp_walls:
             remaining = []
-            for entry in self.battlefield._temp_walls:
-                if len(entry) == 4:
-                    wx, wy, dur, original = entry
-                else:
-                    wx, wy, dur = entry
-                    original = 0
+            for wx, wy, dur, original in self.battlefield._temp_walls:
                 if dur <= 1:
-                    self.battlefield.grid[wx][wy] = original  # Restaurer la case originale
+                    self.battlefield.set_cell(wx, wy, original)  # Restaurer la case originale
                 else:
                     remaining.append((wx, wy, dur - 1, original))
             self.battlefield._temp_walls = remaining
         
+        if stats is not None:
+            stats.lap('murs_temporaires')
+        
         # Nettoyer les unités mortes de la grille
-        dead_units_seen = set()
-        for pos, unit in list(self.battlefield.units.items()):
-            if not unit.is_alive and unit.down_timer <= 0 and id(unit) not in dead_units_seen:
-                dead_units_seen.add(id(unit))
+        for unit in self.battlefield.placed_units():
+            if not unit.is_alive and unit.down_timer <= 0:
                 self.battlefield.remove_unit(unit)
         
+        if stats is not None:
+            stats.lap('nettoyage_morts')
+        
         # Fuyards qui atteignent le bord → quittent la map
         bf = self.battlefield
         for army_list, fled_list in [(self.army1, self.army1_fled), (self.army2, self.army2_fled)]:
             for unit in army_list[:]:
                 if unit.fleeing and unit.is_alive:
-                    if not hasattr(unit, '_flee_rounds'):
-                        unit._flee_rounds = 0
                     unit._flee_rounds += 1
                     x, y = unit.position
-                    at_border = (x <= 0 or x >= bf.width - 1 or y <= 0 or y >= bf.height - 1)
+                    w, h = bf.get_unit_dims(unit)
+                    at_border = (x <= 0 or x >= bf.width - w or y <= 0 or y >= bf.height - h)
                     if at_border and unit._flee_rounds >= 2:
                         unit.fled = True
                         unit.is_alive = False
@@ -879,8 +1071,18 @@ class Battle:
         
         self.army1 = [u for u in self.army1 if u.is_alive or u.down_timer > 0]
         self.army2 = [u for u in self.army2 if u.is_alive or u.down_timer > 0]
+        if stats is not None:
+            stats.lap('sortie_fuyards')
+            stats.end_round()
         self.round += 1
         self._alive_cache['dirty'] = True
+        
+        if self.recorder is not None:
+            self.recorder.end_round(self)
+
+    def save_replay(self, path):
+        """Écrit le replay enregistré (Battle(record=True)) dans path."""
+        self.recorder.save(path, self.get_battle_report())
 
     def is_battle_over(self):
         """La bataille est finie quand une armée n'a plus personne sur la map."""
@@ -0,0 +1,143 @@
+"""Instrumentation de Battle.simulate_round: temps par phase et compteurs.
+
+Activée par Battle(stats=True), elle est exposée dans battle.stats. Désactivée
+(défaut), battle.stats vaut None et chaque point de mesure se réduit à un test
+`is not None`.
+
+Chaque round produit un enregistrement:
+    {"round": 3, "total_ns": ..., "phases": {"deroute": ns, ...},
+     "counters": {"astar_calls": n, ...}}
+
+Usage:
+    battle = Battle(a1, a2, headless=True, stats=True)
+    while not battle.is_battle_over():
+        battle.simulate_round()
+    print(battle.stats.summary())
+    battle.stats.dump("stats.jsonl")   # un objet JSON par round
+"""
+
+import json
+from time import perf_counter_ns
+
+# Phases de simulate_round, dans l'ordre d'exécution
+PHASES = (
+    'deroute',          # Test de déroute des armées sans combattants
+    'commandement',     # Ordres des CommanderAI
+    'mouvement_statiques',
+    'mouvement_engages',
+    'mouvement_approche',
+    'moral',
+    'rempart',
+    'phalange',
+    'charge',
+    'sorts',
+    'portes',           # Attaques des portes (siège)
+    'attaques',
+    'regeneration',
+    'murs_temporaires',
+    'nettoyage_morts',
+    'sortie_fuyards',
+)
+
+COUNTERS = (
+    'astar_calls',      # Recherches A* effectuées (hors cache de chemins)
+    'astar_nodes',      # Noeuds développés (toutes recherches confondues)
+    'astar_truncated',  # Recherches arrêtées par max_nodes
+    'astar_pushes',     # Insertions dans le tas de l'A*
+    'path_cache_hits',  # Chemins resservis par battlefield.path_cache
+    'path_cache_misses',
+    'hpa_routes',       # Routes longues calculées par le graphe hiérarchique (hpa.py)
+    'hpa_rejected',     # Objectifs lointains inatteignables, rejetés sans recherche
+    'flow_fields',      # Champs de flux créés (flowfield.py)
+    'flow_cells',       # Cases développées par les champs de flux
+    'los_tests',        # Rayons de ligne de vue parcourus (hors cache, los.py)
+    'parallel_planned', # Déplacements spéculés retenus (parallel.py)
+    'parallel_replanned', # Déplacements spéculés rejetés, recalculés
+    'attacks_rolled',   # Attaques résolues (dés d'attaque, portes comprises)
+    'units_moved',      # Unités ayant changé de case pendant le mouvement
+    'coop_conflicts',   # Approchants dont la case désirée était prise (Battle(coop=True))
+    'coop_blocked',     # Approchants qui voulaient bouger et sont restés sur place
+)
+
+
+class BattleStats:
+    """Temps (perf_counter_ns) par phase et compteurs, round par round."""
+
+    def __init__(self):
+        self.rounds = []
+        self.round = None
+        self.phases = dict.fromkeys(PHASES, 0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._round_start = 0
+        self._t = 0
+
+    def begin_round(self, round_no):
+        """Démarre la mesure d'un round (compteurs remis à zéro)."""
+        self.round = round_no
+        self.phases = dict.fromkeys(PHASES, 0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._round_start = self._t = perf_counter_ns()
+
+    def lap(self, phase):
+        """Impute à phase le temps écoulé depuis le lap précédent."""
+        now = perf_counter_ns()
+        self.phases[phase] += now - self._t
+        self._t = now
+
+    def count(self, counter, n=1):
+        self.counters[counter] += n
+
+    def count_astar(self, nodes, truncated, pushes=0):
+        counters = self.counters
+        counters['astar_calls'] += 1
+        counters['astar_nodes'] += nodes
+        counters['astar_pushes'] += pushes
+        if truncated:
+            counters['astar_truncated'] += 1
+
+    def end_round(self):
+        """Clôt le round courant et l'ajoute à self.rounds."""
+        self.rounds.append({
+            'round': self.round,
+            'total_ns': perf_counter_ns() - self._round_start,
+            'phases': self.phases,
+            'counters': self.counters,
+        })
+
+    # ─── Agrégats et export ───
+
+    def totals(self):
+        """Somme sur tous les rounds: (total_ns, {phase: ns}, {compteur: n})."""
+        phases = dict.fromkeys(PHASES, 0)
+        counters = dict.fromkeys(COUNTERS, 0)
+        total = 0
+        for rec in self.rounds:
+            total += rec['total_ns']
+            for k, v in rec['phases'].items():
+                phases[k] += v
+            for k, v in rec['counters'].items():
+                counters[k] += v
+        return total, phases, counters
+
+    def to_json(self):
+        """Un objet JSON (une ligne) par round."""
+        return "\n".join(json.dumps(rec, ensure_ascii=False) for rec in self.rounds)
+
+    def dump(self, path):
+        """Écrit les rounds mesurés dans path (JSON lines)."""
+        with open(path, "w", encoding="utf-8") as f:
+            for rec in self.rounds:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        """Tableau texte: temps par phase (ms, %) puis compteurs, sur toute la bataille."""
+        total, phases, counters = self.totals()
+        n = len(self.rounds)
+        lines = [f"{n} rounds, {total / 1e6:.1f} ms "
+                 f"({total / 1e6 / max(1, n):.2f} ms/round)"]
+        for phase in sorted(PHASES, key=phases.get, reverse=True):
+            ns = phases[phase]
+            lines.append(f"  {phase:<22}{ns / 1e6:10.2f} ms {100 * ns / max(1, total):6.1f}%")
+        for counter in COUNTERS:
+            lines.append(f"  {counter:<22}{counters[counter]:>10}")
+        return "\n".join(lines)
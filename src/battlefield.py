@@ -1,13 +1,96 @@
 import random
 import heapq
+from array import array
+
+from clearance import ClearanceMap
+from flowfield import FlowField, FlowFieldCache
+from los import LineOfSight
+from hpa import CLUSTER_SIZE, HPAGraph
+from pathcache import PathCache
+from spatial import SpatialHash
+
+# Approche lointaine (plus de portée + FLOW_MIN_DIST cases de sa cible, cible à
+# FLOW_TARGET_SLACK cases près aussi proche que l'ennemi le plus proche): l'unité
+# descend le champ de flux partagé de l'armée ennemie au lieu d'un A* personnel.
+FLOW_MIN_DIST = 4
+FLOW_TARGET_SLACK = 3
+
+# Codes de terrain de battlefield.cells (et des grilles de maps.py)
+EMPTY, OBSTACLE, WALL, GATE, RAMPART, STAIRS = range(6)
+WALKABLE = (EMPTY, RAMPART, STAIRS)    # Portes: seulement une fois détruites
+
+# Objectif à plus de HPA_MIN_DIST cases: route statique par le graphe hiérarchique
+# (hpa.py), dont seules les HPA_HORIZON premières cases sont recherchées par A*
+# avec les unités et réservations du moment.
+HPA_MIN_DIST = 2 * CLUSTER_SIZE
+HPA_HORIZON = CLUSTER_SIZE
+
+# Étalement des tireurs (find_best_attack_position): bandes de LANE_BAND lignes
+# autour de la lane assignée
+LANE_BAND = 3
+
+_DIAMONDS = {}
+
+
+def _diamond_rows(radius):
+    """((dy, demi-largeur), ...) du losange de Manhattan de rayon radius (mémorisé)."""
+    rows = _DIAMONDS.get(radius)
+    if rows is None:
+        rows = _DIAMONDS[radius] = tuple((dy, radius - abs(dy)) for dy in range(-radius, radius + 1))
+    return rows
 
 
 class Battlefield:
-    def __init__(self, width=40, height=30, obstacle_count=8, map_name="Prairie", grid=None, map_data=None):
+    def __init__(self, width=40, height=30, obstacle_count=8, map_name="Prairie", grid=None, map_data=None,
+                 rng=None):
         self.width = width
         self.height = height
         self.map_name = map_name
-        self.units = {}
+        # Grille à plat, indice x * height + y (colonne par colonne, comme maps.py):
+        #   cells: code de terrain, passable: 1 si marchable (portes intactes: 0),
+        #   occupancy: identifiant de l'unité présente (-1 si libre), voir occupant()
+        n = width * height
+        if grid is not None:
+            self.cells = bytearray(v for col in grid for v in col)
+        else:
+            self.cells = bytearray(n)
+        self.passable = bytearray(n)
+        self.occupancy = array('i', [-1]) * n
+        # Identifiants d'occupation: unit_id → unité (registre permanent), unités placées
+        self._occupants = []
+        self._occupant_ids = {}
+        self._placed = {}
+        # Cases occupées par armée (unit._army_key → set de cases, empreintes entières)
+        self.army_cells = {}
+        # Cartes de dégagement par empreinte (w, h) des unités multi-cases (clearance.py)
+        self._clearance = {}
+        # Losanges de tir par (cible, portée, limite de siège), pour un (round, grid_version)
+        self._attack_rows_round = None
+        self._attack_rows_memo = {}
+        # Index spatial par armée (unit._army_key), tenu à jour par place/remove_unit
+        self.spatial = SpatialHash(width, height)
+        # Générateur aléatoire de la bataille (partagé avec le combat)
+        self.rng = rng if rng is not None else random
+        # Enregistreur de replay (assigné par Battle(record=True))
+        self.recorder = None
+        # Instrumentation (BattleStats, assignée par Battle(stats=True))
+        self.stats = None
+        # Murs temporaires (sort "wall"): [(x, y, rounds restants, case d'origine)]
+        self._temp_walls = []
+        # Valeur d'origine des cases modifiées en cours de bataille (voir set_cell)
+        self._grid_base = {}
+        # Incrémenté à chaque changement de passabilité (case modifiée, porte détruite)
+        self.grid_version = 0
+        # Champs de flux partagés par objectif (flowfield.py)
+        self.flow = FlowFieldCache(self)
+        # Visibilité entre cases (obstacles opaques), mémorisée par round (los.py)
+        self.los = LineOfSight(self)
+        # Chemins A* déjà calculés, par (départ, objectif, empreinte, armée, grid_version)
+        self.path_cache = PathCache()
+        # Graphe hiérarchique (HPA*) pour les routes longues, réparé par set_cell
+        self.hpa = HPAGraph(self)
+        # Champs de distance au bord (fuite), par empreinte: (grid_version, FlowField)
+        self._edge_fields = {}
         
         # Données de siège
         self.siege_data = map_data or {}
@@ -17,11 +100,9 @@ class Battlefield:
         self.ramparts = set(tuple(r) for r in self.siege_data.get('ramparts', []))
         self.stairs = set(tuple(s) for s in self.siege_data.get('stairs', []))
         
-        if grid is not None:
-            self.grid = grid
-        else:
-            self.grid = [[0] * height for _ in range(width)]
+        if grid is None:
             self.add_obstacles(obstacle_count)
+        self.rebuild_passable()
 
     def add_obstacles(self, count):
         placed = 0
@@ -41,30 +122,59 @@ class Battlefield:
         attempts = 0
         while placed < count and attempts < max_attempts:
             attempts += 1
-            x = random.randint(min_x, max_x)
-            y = random.randint(min_y, max_y)
-            if not any(abs(x - ox) + abs(y - oy) < min_distance for ox, oy in obstacles) and self.grid[x][y] == 0:
-                self.grid[x][y] = 1
+            x = self.rng.randint(min_x, max_x)
+            y = self.rng.randint(min_y, max_y)
+            if (not any(abs(x - ox) + abs(y - oy) < min_distance for ox, oy in obstacles)
+                    and self.cells[x * self.height + y] == EMPTY):
+                self.cells[x * self.height + y] = OBSTACLE
                 obstacles.append((x, y))
                 placed += 1
 
+    def cell(self, x, y):
+        """Code de terrain de la case (x, y)."""
+        return self.cells[x * self.height + y]
+
+    def _refresh_passable(self, i, x, y):
+        cell = self.cells[i]
+        ok = cell in WALKABLE or (cell == GATE and self.gate_hp.get((x, y), 0) <= 0)
+        if ok != self.passable[i]:
+            self.passable[i] = ok
+            d = -1 if ok else 1
+            for cmap in self._clearance.values():
+                cmap.update(x, y, d, d if self.occupancy[i] < 0 else 0)
+
+    def rebuild_passable(self):
+        """Recalcule tout le masque de passabilité (grille, portes ou occupation remplacées en bloc)."""
+        self._clearance.clear()
+        self._attack_rows_round = None
+        self._edge_fields.clear()
+        height = self.height
+        self.passable = bytearray(v in WALKABLE for v in self.cells)
+        for (x, y), hp in self.gate_hp.items():
+            i = x * height + y
+            if self.cells[i] == GATE:
+                self.passable[i] = hp <= 0
+
     def is_valid(self, x, y):
-        if not (0 <= x < self.width and 0 <= y < self.height):
-            return False
-        cell = self.grid[x][y]
-        if cell == 0:
-            return True
-        if cell == 4:  # Rempart: marchable
-            return True
-        if cell == 5:  # Escalier: marchable
-            return True
-        if cell == 3:  # Porte: traversable si détruite (hp <= 0)
-            return self.gate_hp.get((x, y), 0) <= 0
-        return False  # 1=obstacle, 2=mur
+        return 0 <= x < self.width and 0 <= y < self.height and self.passable[x * self.height + y]
+
+    def set_cell(self, x, y, value):
+        """Modifie une case en cours de bataille (la valeur d'origine est mémorisée)."""
+        i = x * self.height + y
+        if (x, y) not in self._grid_base:
+            self._grid_base[(x, y)] = self.cells[i]
+        self.cells[i] = value
+        self._refresh_passable(i, x, y)
+        self.grid_version += 1
+        self.hpa.invalidate(x, y)
     
+    def has_los(self, a, b):
+        """True si aucun obstacle ne coupe la ligne de vue entre les cases a et b."""
+        return self.los.visible(a, b)
+
     def is_wall(self, x, y):
         """Retourne True si la case est un mur."""
-        return 0 <= x < self.width and 0 <= y < self.height and self.grid[x][y] == 2
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[x * self.height + y] == WALL
     
     def is_rampart(self, x, y):
         """Retourne True si la case est un rempart marchable."""
@@ -73,26 +183,47 @@ class Battlefield:
     def is_gate(self, x, y):
         """Retourne True si la case est une porte (intacte)."""
         return (0 <= x < self.width and 0 <= y < self.height 
-                and self.grid[x][y] == 3 and self.gate_hp.get((x, y), 0) > 0)
+                and self.cells[x * self.height + y] == GATE and self.gate_hp.get((x, y), 0) > 0)
     
+    def set_gate_hp(self, x, y, hp):
+        """Fixe les points de vie d'une porte (hp <= 0: détruite, donc traversable)."""
+        pos = (x, y)
+        was_open = self.gate_hp.get(pos, 0) <= 0
+        self.gate_hp[pos] = max(0, hp)
+        if was_open != (hp <= 0):
+            self._refresh_passable(x * self.height + y, x, y)
+            self.grid_version += 1
+            self.hpa.invalidate(x, y)
+
     def damage_gate(self, x, y, dmg):
         """Inflige des dégâts à une porte. Retourne True si détruite."""
         pos = (x, y)
         if pos in self.gate_hp:
-            self.gate_hp[pos] -= dmg
+            self.set_gate_hp(x, y, self.gate_hp[pos] - dmg)
             if self.gate_hp[pos] <= 0:
-                self.gate_hp[pos] = 0
                 return True
         return False
 
+    def occupant(self, x, y):
+        """Unité présente sur la case (x, y), ou None."""
+        uid = self.occupancy[x * self.height + y]
+        return self._occupants[uid] if uid >= 0 else None
+
+    def placed_units(self):
+        """Unités actuellement posées sur la grille (une fois chacune)."""
+        return list(self._placed.values())
+
     def is_occupied(self, x, y):
-        return (x, y) in self.units
+        return self.occupancy[x * self.height + y] >= 0
 
     def is_free(self, x, y, ignore_unit=None):
-        if not self.is_valid(x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        i = x * self.height + y
+        if not self.passable[i]:
             return False
-        occupant = self.units.get((x, y))
-        return occupant is None or (ignore_unit and occupant == ignore_unit)
+        uid = self.occupancy[i]
+        return uid < 0 or (ignore_unit and self._occupants[uid] == ignore_unit)
 
     def get_unit_dims(self, unit):
         """Retourne (largeur, hauteur) en cases selon la taille.
@@ -114,31 +245,111 @@ class Battlefield:
                 cells.append((x + dx, y + dy))
         return cells
 
+    def clearance(self, w, h):
+        """Carte de dégagement de l'empreinte w×h (construite au premier appel)."""
+        cmap = self._clearance.get((w, h))
+        if cmap is None:
+            cmap = self._clearance[(w, h)] = ClearanceMap(self, w, h)
+        return cmap
+
     def can_place_unit(self, x, y, unit, ignore_unit=None):
         """Vérifie si une unité peut être placée en (x, y) selon sa taille."""
         w, h = self.get_unit_dims(unit)
-        for dx in range(w):
-            for dy in range(h):
-                if not self.is_free(x + dx, y + dy, ignore_unit):
-                    return False
-        return True
+        if w == 1 and h == 1:
+            return self.is_free(x, y, ignore_unit)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        blocked = self.clearance(w, h).blocked[x * self.height + y]
+        if blocked and ignore_unit is not None:
+            blocked -= self._cells_held(ignore_unit, x, y, w, h)
+        return blocked == 0
+
+    def _cells_held(self, unit, x, y, w, h):
+        """Nombre de cases de la boîte w×h en (x, y) occupées par unit."""
+        uid = self._occupant_ids.get(unit)
+        if uid is None or uid not in self._placed:
+            return 0
+        ux, uy = unit.position
+        uw, uh = self.get_unit_dims(unit)
+        occupancy = self.occupancy
+        height = self.height
+        held = 0
+        for cx in range(max(x, ux), min(x + w, ux + uw)):
+            for cy in range(max(y, uy), min(y + h, uy + uh)):
+                if occupancy[cx * height + cy] == uid:
+                    held += 1
+        return held
+
+    def _unit_id(self, unit):
+        uid = self._occupant_ids.get(unit)
+        if uid is None:
+            uid = self._occupant_ids[unit] = len(self._occupants)
+            self._occupants.append(unit)
+        return uid
 
     def place_unit(self, unit):
         """Place une unité sur la grille (toutes ses cases)."""
-        for cell in self.get_unit_cells(unit):
-            self.units[cell] = unit
+        uid = self._unit_id(unit)
+        occupancy = self.occupancy
+        height = self.height
+        army_cells = self.army_cells.get(unit._army_key)
+        if army_cells is None:
+            army_cells = self.army_cells[unit._army_key] = set()
+        for x, y in self.get_unit_cells(unit):
+            i = x * height + y
+            if self._clearance and occupancy[i] < 0 and self.passable[i]:
+                for cmap in self._clearance.values():
+                    cmap.update(x, y, 0, 1)
+            occupancy[i] = uid
+            army_cells.add((x, y))
+        self._placed[uid] = unit
+        self.spatial.insert(unit, unit._army_key)
 
     def remove_unit(self, unit):
-        """Retire une unité de la grille (utilise get_unit_cells au lieu de scanner tout le dict)."""
+        """Retire une unité de la grille (seules ses propres cases sont libérées)."""
         if unit.position is None:
             return
+        uid = self._occupant_ids.get(unit)
+        if uid is None:
+            return
         x, y = unit.position
         w, h = self.get_unit_dims(unit)
+        occupancy = self.occupancy
+        height = self.height
+        army_cells = self.army_cells.get(unit._army_key, set())
         for dx in range(w):
             for dy in range(h):
-                cell = (x + dx, y + dy)
-                if self.units.get(cell) is unit:
-                    del self.units[cell]
+                i = (x + dx) * height + y + dy
+                if occupancy[i] == uid:
+                    occupancy[i] = -1
+                    army_cells.discard((x + dx, y + dy))
+                    if self._clearance and self.passable[i]:
+                        for cmap in self._clearance.values():
+                            cmap.update(x + dx, y + dy, 0, -1)
+        self._placed.pop(uid, None)
+        self.spatial.remove(unit)
+
+    def placement_state(self):
+        """Occupation de la grille, pour Battle.snapshot."""
+        return self.occupancy[:], dict(self._placed)
+
+    def restore_placement(self, state):
+        """Rétablit l'occupation (placement_state) et les index qui en dérivent.
+
+        Les cartes de dégagement sont reconstruites par rebuild_passable.
+        """
+        occupancy, placed = state
+        self.occupancy = occupancy[:]
+        self._placed = dict(placed)
+        self.army_cells = {}
+        self.spatial.clear()
+        height = self.height
+        for uid, u in self._placed.items():
+            army_cells = self.army_cells.setdefault(u._army_key, set())
+            for x, y in self.get_unit_cells(u):
+                if self.occupancy[x * height + y] == uid:
+                    army_cells.add((x, y))
+            self.spatial.insert(u, u._army_key)
 
     def move_unit(self, unit, new_pos):
         """Déplace une unité vers une nouvelle position."""
@@ -154,15 +365,66 @@ class Battlefield:
         return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
 
     def a_star_path(self, start, goal, unit, battle, reserved_positions=None, max_nodes=1200):
-        """A* optimisé — opérations inlinées pour la performance."""
+        """Chemin de start à goal (start exclu), [] si aucun chemin n'est trouvé.
+
+        Les objectifs lointains (plus de HPA_MIN_DIST cases) passent par le
+        graphe hiérarchique: un objectif inatteignable est rejeté sans
+        recherche, sinon l'A* ne couvre que le début de la route HPA*.
+        """
         if reserved_positions is None:
             reserved_positions = set()
         
         if start == goal:
+            if self.stats is not None:
+                self.stats.count_astar(0, False)
             return [goal]
         
-        allies = battle.get_allies(unit)
-        ally_positions = {u.position for u in allies if u.is_alive and u is not unit}
+        cached = self.path_cache.get(start, goal, unit.size, unit._army_key,
+                                     self.grid_version, reserved_positions)
+        if self.stats is not None:
+            self.stats.count('path_cache_misses' if cached is None else 'path_cache_hits')
+        if cached is not None:
+            return cached
+        
+        # Le graphe HPA* ignore les empreintes: les grandes unités gardent l'A* direct
+        if unit.size <= 1 and max(abs(goal[0] - start[0]), abs(goal[1] - start[1])) > HPA_MIN_DIST:
+            route = self.hpa.find_path(start, goal)
+            if self.stats is not None:
+                self.stats.count('hpa_rejected' if route is None else 'hpa_routes')
+            if route is None:
+                return []
+            if route:
+                k = min(len(route), HPA_HORIZON)
+                path = self._a_star_search(start, route[k - 1], unit, reserved_positions, max_nodes)
+                if not path:
+                    return []
+                path.extend(route[k:])
+                self.path_cache.put(start, goal, unit.size, unit._army_key, self.grid_version, path)
+                return path
+        
+        path = self._a_star_search(start, goal, unit, reserved_positions, max_nodes)
+        if path:
+            self.path_cache.put(start, goal, unit.size, unit._army_key, self.grid_version, path)
+        return path
+
+    def _a_star_search(self, start, goal, unit, reserved_positions, max_nodes):
+        """A* optimisé — opérations inlinées pour la performance.
+
+        Une unité multi-cases ne passe que par des ancrages dont toute la boîte
+        est marchable (carte de dégagement de son empreinte).
+        """
+        if unit.size <= 1:
+            passable = self.passable
+        else:
+            passable = self.clearance(*self.get_unit_dims(unit)).walkable
+            if not passable[goal[0] * self.height + goal[1]]:
+                if self.stats is not None:
+                    self.stats.count_astar(0, False)
+                return []
+        
+        # Cases alliées (maintenues par place/remove_unit), hors empreinte de l'unité
+        ally_cells = self.army_cells.get(unit._army_key, ())
+        own_cells = self.get_unit_cells(unit) if unit.size > 1 else (unit.position,)
         
         # Pénalité réduite quand loin de la cible
         sx, sy = start
@@ -171,15 +433,14 @@ class Battlefield:
         ALLY_PENALTY = 1.5 if dist_to_goal > 8 else 2.5
         
         # Cache local pour éviter les lookups d'attributs répétés
-        grid = self.grid
         width = self.width
         height = self.height
-        gate_hp = self.gate_hp
         reserved = reserved_positions
         
         open_set = []
         h0 = max(abs(gx - sx), abs(gy - sy))
         heapq.heappush(open_set, (h0, 0.0, sx, sy))
+        pushes = 1
         g_score = {start: 0.0}
         came_from = {}
         
@@ -196,7 +457,9 @@ class Battlefield:
             nodes_explored += 1
             
             if nodes_explored > max_nodes:
-                break
+                if self.stats is not None:
+                    self.stats.count_astar(nodes_explored, True, pushes)
+                return []
             
             if cx == gx and cy == gy:
                 # Reconstruire le chemin
@@ -206,6 +469,8 @@ class Battlefield:
                     path.append(current)
                     current = came_from[current]
                 path.reverse()
+                if self.stats is not None:
+                    self.stats.count_astar(nodes_explored, False, pushes)
                 return path
             
             current = (cx, cy)
@@ -216,12 +481,7 @@ class Battlefield:
                 nx, ny = cx + dx, cy + dy
                 
                 # is_valid inliné
-                if nx < 0 or nx >= width or ny < 0 or ny >= height:
-                    continue
-                cell = grid[nx][ny]
-                if cell == 1 or cell == 2:
-                    continue
-                if cell == 3 and gate_hp.get((nx, ny), 0) > 0:
+                if nx < 0 or nx >= width or ny < 0 or ny >= height or not passable[nx * height + ny]:
                     continue
                 
                 neighbor = (nx, ny)
@@ -230,7 +490,7 @@ class Battlefield:
                 
                 base_cost = _DIAG_COST if (dx and dy) else 1.0
                 
-                if neighbor in ally_positions and neighbor != goal:
+                if neighbor in ally_cells and neighbor != goal and neighbor not in own_cells:
                     new_g = g + base_cost + ALLY_PENALTY
                 else:
                     new_g = g + base_cost
@@ -244,9 +504,10 @@ class Battlefield:
                     if hdy > h:
                         h = hdy
                     _heappush(open_set, (new_g + h, new_g, nx, ny))
+                    pushes += 1
         
-        return []
-        
+        if self.stats is not None:
+            self.stats.count_astar(nodes_explored, False, pushes)
         return []
 
     def find_best_attack_position(self, unit, target, battle, reserved_positions=None):
@@ -270,119 +531,128 @@ class Battlefield:
         unit_is_attacker = wall_x is not None and unit_pos[0] < wall_x
         all_gates_open = wall_x is not None and all(hp <= 0 for hp in self.gate_hp.values()) if self.gate_hp else True
         
+        x_limit = wall_x if unit_is_attacker and not all_gates_open else None
+        rows = self._attack_rows(target_pos, max_range, x_limit, battle.round)
+        
         # Lane de l'unité pour l'étalement
         from ai_commander import get_lane_offset
         lane_y = get_lane_offset(unit, self)
         
-        tx, ty = target_pos
+        # Priorité d'une case: (occupée, bande de lane |py - lane_y| // 3, distance),
+        # puis ordre (px, py). Les bandes sont parcourues de la plus proche à la plus
+        # lointaine: la première qui contient une case libre donne la réponse.
         ux, uy = unit_pos
-        grid = self.grid
-        width = self.width
-        height = self.height
-        units_dict = self.units
-        gate_hp_dict = self.gate_hp
-        
-        best_priority = None
-        best_pos = None
-        
-        for dx in range(-max_range, max_range + 1):
-            px = tx + dx
-            if px < 0 or px >= width:
-                continue
-            if unit_is_attacker and not all_gates_open and px >= wall_x:
-                continue
-            adx = abs(dx)
-            max_dy = max_range - adx
-            for dy in range(-max_dy, max_dy + 1):
-                if dx == 0 and dy == 0:
-                    continue
-                py = ty + dy
-                if py < 0 or py >= height:
-                    continue
-                # is_valid inliné
-                cell = grid[px][py]
-                if cell == 1 or cell == 2:
-                    continue
-                if cell == 3 and gate_hp_dict.get((px, py), 0) > 0:
-                    continue
-                pos = (px, py)
-                if pos in reserved_positions:
+        occupancy = self.occupancy
+        y_lo, y_hi = target_pos[1] - max_range, target_pos[1] + max_range
+        last_band = max(abs(y_lo - lane_y), abs(y_hi - lane_y)) // LANE_BAND
+        best_occupied = None
+        for band in range(last_band + 1):
+            if band == 0:
+                band_rows = range(lane_y - LANE_BAND + 1, lane_y + LANE_BAND)
+            else:
+                near = lane_y - band * LANE_BAND
+                far = lane_y + band * LANE_BAND
+                band_rows = (*range(near - LANE_BAND + 1, near + 1), *range(far, far + LANE_BAND))
+            best_free = None
+            best_taken = None
+            for py in band_rows:
+                row = rows.get(py)
+                if row is None:
                     continue
-                
-                occupied = 0 if pos not in units_dict else 1
-                dist = max(abs(ux - px), abs(uy - py))
-                lane_dist = abs(py - lane_y) // 3
-                priority = (occupied, lane_dist, dist)
-                
-                if best_priority is None or priority < best_priority:
-                    best_priority = priority
-                    best_pos = pos
+                for px, i in row:
+                    pos = (px, py)
+                    if pos in reserved_positions:
+                        continue
+                    dist = max(abs(ux - px), abs(uy - py))
+                    key = (dist, px, py)
+                    if occupancy[i] < 0:
+                        if best_free is None or key < best_free:
+                            best_free = key
+                    elif best_occupied is None and (best_taken is None or key < best_taken):
+                        best_taken = key
+            if best_free is not None:
+                return best_free[1:]
+            if best_taken is not None:
+                best_occupied = best_taken
         
-        return best_pos
+        return best_occupied[1:] if best_occupied is not None else None
+
+    def _attack_rows(self, target_pos, max_range, x_limit, round_no):
+        """Cases marchables du losange de rayon max_range autour de target_pos.
+
+        {py: [(px, indice), ...]} (px croissant), cible exclue et, en siège,
+        colonnes px >= x_limit exclues. Mémorisé pour le round: une ligne de
+        tireurs sur la même cible partage le même losange.
+        """
+        if self._attack_rows_round != (round_no, self.grid_version):
+            self._attack_rows_round = (round_no, self.grid_version)
+            self._attack_rows_memo = {}
+        key = (target_pos, max_range, x_limit)
+        rows = self._attack_rows_memo.get(key)
+        if rows is not None:
+            return rows
+        tx, ty = target_pos
+        width, height = self.width, self.height
+        passable = self.passable
+        rows = {}
+        for dy, reach in _diamond_rows(max_range):
+            py = ty + dy
+            if py < 0 or py >= height:
+                continue
+            row = []
+            for px in range(max(0, tx - reach), min(width, tx + reach + 1)):
+                if x_limit is not None and px >= x_limit:
+                    break
+                i = px * height + py
+                if passable[i] and (dy or px != tx):
+                    row.append((px, i))
+            if row:
+                rows[py] = row
+        self._attack_rows_memo[key] = rows
+        return rows
+
+    def edge_field(self, w=1, h=1):
+        """Champ de flux vers le bord de la carte pour l'empreinte w×h (fuite).
+
+        Parcours en largeur multi-sources depuis tous les ancrages du bord (la
+        boîte touche le bord), sur battlefield.passable ou, pour une unité
+        multi-cases, sur les ancrages marchables de sa carte de dégagement.
+        Partagé par tous les fuyards de cette empreinte, étendu à la demande et
+        refait seulement quand grid_version change.
+        """
+        cached = self._edge_fields.get((w, h))
+        if cached is not None and cached[0] == self.grid_version:
+            return cached[1]
+        width, height = self.width, self.height
+        x1, y1 = width - w, height - h
+        goals = [(x, y) for x in range(x1 + 1) for y in (0, y1)]
+        goals += [(x, y) for x in (0, x1) for y in range(1, y1)]
+        passable = None if (w, h) == (1, 1) else self.clearance(w, h).walkable
+        field = FlowField(self, goals, passable)
+        self._edge_fields[(w, h)] = (self.grid_version, field)
+        if self.stats is not None:
+            self.stats.count('flow_fields')
+        return field
+
+    def _flow_move(self, unit, field, steps, reserved_positions):
+        """Case la plus avancée atteignable en descendant field (None si bloqué)."""
+        start_dist = field.distance(unit.position)
+        path = field.walk(unit.position, steps, reserved_positions, self.occupancy)
+        for candidate in reversed(path):
+            if (field.distance(candidate) < start_dist
+                    and self._can_move_to(unit, candidate, reserved_positions)):
+                return candidate
+        return None
 
     def compute_move(self, unit, battle, reserved_positions):
         if unit.fleeing:
-            # Unités en fuite: courir vers le bord le plus proche
+            # Unités en fuite: descendre le champ de distance au bord (contourne
+            # murs, forêts et rempart), au plus flee_speed cases
             flee_speed = max(2, unit.vitesse)  # Minimum 2 cases/round en fuite
-            ux, uy = unit.position
-            
-            # Trouver le bord le plus proche
-            dist_left = ux
-            dist_right = self.width - 1 - ux
-            dist_top = uy
-            dist_bottom = self.height - 1 - uy
-            
-            min_dist = min(dist_left, dist_right, dist_top, dist_bottom)
-            
-            if min_dist == dist_top:
-                goal = (ux, 0)
-            elif min_dist == dist_bottom:
-                goal = (ux, self.height - 1)
-            elif min_dist == dist_left:
-                goal = (0, uy)
-            else:
-                goal = (self.width - 1, uy)
-            
-            # Essayer le A* en premier
-            path = self.a_star_path(unit.position, goal, unit, battle, reserved_positions)
-            if path:
-                steps = min(flee_speed, len(path))
-                # Essayer le step le plus loin possible, puis réduire
-                for i in range(steps, 0, -1):
-                    new_pos = path[i - 1]
-                    if self._can_move_to(unit, new_pos, reserved_positions):
-                        return new_pos, None
-            
-            # Fallback: mouvement direct vers le bord, en essayant plusieurs directions
-            gx, gy = goal
-            dx_main = 0 if gx == ux else (1 if gx > ux else -1)
-            dy_main = 0 if gy == uy else (1 if gy > uy else -1)
-            
-            # Essayer toutes les directions, triées par efficacité vers le bord
-            candidates = []
-            for step in range(flee_speed, 0, -1):
-                for ddx in [-1, 0, 1]:
-                    for ddy in [-1, 0, 1]:
-                        if ddx == 0 and ddy == 0:
-                            continue
-                        nx, ny = ux + ddx * step, uy + ddy * step
-                        pos = (nx, ny)
-                        if not (0 <= nx < self.width and 0 <= ny < self.height):
-                            # Case hors map = on s'y dirige quand même (pour atteindre le bord)
-                            # Clipper au bord
-                            nx = max(0, min(self.width - 1, nx))
-                            ny = max(0, min(self.height - 1, ny))
-                            pos = (nx, ny)
-                        if self._can_move_to(unit, pos, reserved_positions):
-                            # Score: distance au bord le plus proche (plus petit = mieux)
-                            border_dist = min(nx, self.width - 1 - nx, ny, self.height - 1 - ny)
-                            candidates.append((border_dist, pos))
-            
-            if candidates:
-                candidates.sort()
-                return candidates[0][1], None
-            
-            return None, None
+            field = self.edge_field(*self.get_unit_dims(unit))
+            if not field.distance(unit.position):
+                return None, None  # Déjà au bord, ou enclavée
+            return self._flow_move(unit, field, flee_speed, reserved_positions), None
         
         # Unités immobiles (artillerie) ne bougent pas
         if unit.vitesse <= 0:
@@ -442,6 +712,10 @@ class Battlefield:
             goal = move_pos
             # Trouver une cible pour le combat (le plus proche)
             target = min(enemies, key=lambda e: self.manhattan_distance(unit.position, e.position))
+            field = self.flow.get(('cell', goal), (goal,))
+            candidate = self._flow_move(unit, field, unit.vitesse, reserved_positions)
+            if candidate:
+                return candidate, target
             path = self.a_star_path(unit.position, goal, unit, battle, reserved_positions)
             if path:
                 steps = min(unit.vitesse, len(path))
@@ -487,6 +761,24 @@ class Battlefield:
             # Rester mais garder la cible pour tirer si possible
             return None, target
         
+        # Loin du front: un seul champ de flux par armée ennemie et par round, partagé
+        # par toutes les unités en approche (la case d'attaque précise, selon la
+        # lane, est choisie par A* une fois à proximité)
+        target_dist = self.manhattan_distance(unit.position, target.position)
+        if target_dist > unit._max_range + FLOW_MIN_DIST:
+            wall_x = self.siege_data.get('wall_x') if self.siege_data else None
+            behind_gates = (wall_x is not None and unit.position[0] < wall_x
+                            and any(hp > 0 for hp in self.gate_hp.values()))
+            enemy_key = 2 if unit._army_key == 1 else 1
+            _, nearest_dist = self.spatial.nearest(unit.position, enemy_key)
+            if (not behind_gates and nearest_dist is not None
+                    and target_dist <= nearest_dist + FLOW_TARGET_SLACK):
+                field = self.flow.get(('army', enemy_key, battle.round),
+                                      (e.position for e in enemies))
+                candidate = self._flow_move(unit, field, unit.vitesse, reserved_positions)
+                if candidate:
+                    return candidate, target
+        
         goal = self.find_best_attack_position(unit, target, battle, reserved_positions)
         
         # Siège: si pas de position d'attaque valide côté attaquant, aller vers la porte
@@ -517,6 +809,10 @@ class Battlefield:
                 if destroyed_gates:
                     # Aller vers la porte détruite la plus proche (traversable)
                     nearest = min(destroyed_gates, key=lambda g: self.manhattan_distance(unit.position, g))
+                    field = self.flow.get(('cell', nearest), (nearest,))
+                    candidate = self._flow_move(unit, field, unit.vitesse, reserved_positions)
+                    if candidate:
+                        return candidate, target
                     gpath = self.a_star_path(unit.position, nearest, unit, battle, reserved_positions)
                     if gpath:
                         steps = min(unit.vitesse, len(gpath))
@@ -595,15 +891,15 @@ class Battlefield:
         """Vérifie si une unité peut se déplacer vers pos (multi-cases)."""
         if unit.size <= 1:
             return self.is_free(*pos, unit) and pos not in reserved_positions
-        # Multi-case : vérifier toutes les cases de destination
-        w, h = self.get_unit_dims(unit)
-        for dx in range(w):
-            for dy in range(h):
-                cell = (pos[0] + dx, pos[1] + dy)
-                if cell in reserved_positions:
-                    return False
-                if not self.is_free(*cell, unit):
-                    return False
+        # Multi-case : boîte libre (carte de dégagement) et hors des réservations
+        if not self.can_place_unit(pos[0], pos[1], unit, unit):
+            return False
+        if reserved_positions:
+            w, h = self.get_unit_dims(unit)
+            for dx in range(w):
+                for dy in range(h):
+                    if (pos[0] + dx, pos[1] + dy) in reserved_positions:
+                        return False
         return True
 
     def _get_reserved_cells(self, unit, pos):
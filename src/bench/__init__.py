@@ -0,0 +1,26 @@
+"""Macro-benchmarks reproductibles: batailles complètes, headless, graine fixe.
+
+Scénarios (scenarios.py): trois tailles d'armée (small, medium, huge) et une
+grande carte 300×200 (vast) sur chaque carte (Prairie, Forêt, Village, Siège),
+construites par unit_library.build_army.
+Chaque scénario est exécuté jusqu'à la fin de la bataille (ou max_rounds) dans
+un processus neuf, pour que le pic de mémoire (RSS) lui soit propre.
+
+Mesures (runner.py): rounds/s, µs par unité-round (une unité vivante pendant
+un round), pic RSS, Ko alloués par round (tracemalloc, sur les premiers rounds)
+et temps par phase de simulate_round (battle_stats).
+
+Usage (depuis src/):
+    python -m bench                                   # tous les scénarios
+    python -m bench -s small medium -m Prairie        # sous-ensemble
+    python -m bench --save bench_baseline.json        # enregistre une référence
+    python -m bench --compare bench_baseline.json     # signale les régressions
+    python -m bench -s huge --parallel 4              # séquentiel contre parallel=4
+
+Avec --parallel N (run_parallel), chaque scénario est joué deux fois, en
+séquentiel et avec Battle(parallel=N): rounds/s des deux, et vérification
+que les batailles sont identiques (state_digest, code de sortie 1 sinon).
+"""
+
+from bench.runner import compare, parallel_mismatches, run_parallel, run_scenario, run_suite
+from bench.scenarios import MAPS, SIZES, get_scenarios
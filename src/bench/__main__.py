@@ -0,0 +1,90 @@
+"""Ligne de commande du benchmark: python -m bench --help (depuis src/)."""
+
+import argparse
+import os
+import sys
+
+from bench.runner import (ALLOC_ROUNDS, DEFAULT_TOLERANCE, compare, load, parallel_mismatches,
+                          run_parallel, run_suite, save)
+from bench.scenarios import MAPS, SEED, SIZES, get_scenarios
+
+
+def _print_result(r):
+    rss = f"{r['peak_rss_kb'] / 1024:7.1f} Mo" if r['peak_rss_kb'] is not None else "      ?"
+    alloc = f"{r['alloc_kb_per_round']:9.1f} Ko" if r['alloc_kb_per_round'] is not None else "        -"
+    print(f"{r['name']:<18}{r['units']:>6}{r['rounds']:>7}{r['rounds_per_sec']:>10.2f}"
+          f"{r['us_per_unit_round']:>12.1f}  {rss}  {alloc}", flush=True)
+
+
+def _print_pair(pair):
+    serial, par = pair
+    same = "identique" if not parallel_mismatches([pair]) else "DIFFÉRENT"
+    speedup = par['rounds_per_sec'] / serial['rounds_per_sec'] if serial['rounds_per_sec'] else 0.0
+    print(f"{serial['name']:<18}{serial['units']:>6}{serial['rounds']:>7}"
+          f"{serial['rounds_per_sec']:>10.2f}{par['rounds_per_sec']:>10.2f}{speedup:>8.2f}x"
+          f"{par['counters']['parallel_planned']:>9}{par['counters']['parallel_replanned']:>9}"
+          f"  {same}", flush=True)
+
+
+def main_parallel(args, scenarios):
+    print(f"parallel={args.parallel}, {os.cpu_count()} cœur(s) disponible(s)")
+    print(f"{'scénario':<18}{'unités':>6}{'rounds':>7}{'séq r/s':>10}{'par r/s':>10}"
+          f"{'gain':>9}{'retenus':>9}{'refaits':>9}  état")
+    pairs = run_parallel(scenarios, args.parallel, isolate=not args.no_isolate,
+                         progress=_print_pair)
+    # Code de sortie 1 si une bataille parallèle diffère de la séquentielle
+    mismatches = parallel_mismatches(pairs)
+    for name in mismatches:
+        print(f"DIFFÉRENCE {name}: la bataille parallèle s'écarte de la séquentielle")
+    return 1 if mismatches else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench",
+                                     description="Macro-benchmark de batailles complètes.")
+    parser.add_argument("-s", "--sizes", nargs="+", choices=list(SIZES), default=None,
+                        help="Tailles d'armée (défaut: toutes)")
+    parser.add_argument("-m", "--maps", nargs="+", choices=MAPS, default=None,
+                        help="Cartes (défaut: toutes)")
+    parser.add_argument("--seed", type=int, default=SEED, help="Graine des batailles")
+    parser.add_argument("--save", metavar="FICHIER", help="Écrire les résultats (JSON)")
+    parser.add_argument("--compare", metavar="FICHIER", help="Comparer à une référence (JSON)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Dégradation tolérée avant de signaler une régression (0.10 = 10%%)")
+    parser.add_argument("--alloc-rounds", type=int, default=ALLOC_ROUNDS,
+                        help="Rounds mesurés par tracemalloc (0 = désactivé)")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Tout exécuter dans ce processus (pic RSS non significatif)")
+    parser.add_argument("--parallel", type=int, default=0, metavar="N",
+                        help="Comparer chaque scénario en séquentiel et avec Battle(parallel=N): "
+                             "rounds/s et batailles identiques")
+    args = parser.parse_args(argv)
+    if args.parallel and (args.save or args.compare):
+        parser.error("--parallel ne se combine pas avec --save ni --compare")
+
+    scenarios = get_scenarios(args.sizes, args.maps, args.seed)
+    if args.parallel:
+        return main_parallel(args, scenarios)
+    print(f"{'scénario':<18}{'unités':>6}{'rounds':>7}{'rounds/s':>10}{'µs/u-round':>12}"
+          f"  {'pic RSS':>10}  {'alloc/round':>12}")
+    suite = run_suite(scenarios, isolate=not args.no_isolate,
+                      alloc_rounds=args.alloc_rounds, progress=_print_result)
+
+    if args.save:
+        save(suite, args.save)
+        print(f"Résultats écrits dans {args.save}")
+
+    if args.compare:
+        regressions, notes = compare(suite, load(args.compare), args.tolerance)
+        for note in notes:
+            print(f"NOTE: {note}")
+        for name, metric, before, after, ratio in regressions:
+            print(f"RÉGRESSION {name} {metric}: {before:.1f} → {after:.1f} ({ratio - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"Aucune régression (tolérance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
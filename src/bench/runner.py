@@ -0,0 +1,188 @@
+"""Exécution des scénarios, mesures et comparaison à une référence JSON."""
+
+import hashlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows: pas de pic RSS
+    resource = None
+
+ALLOC_ROUNDS = 5        # Rounds mesurés par tracemalloc (très lent: seulement le début)
+DEFAULT_TOLERANCE = 0.10
+
+# Métriques comparées (plus haut = pire)
+COMPARED = ('us_per_unit_round', 'peak_rss_kb', 'alloc_kb_per_round')
+
+
+def _build_battle(scenario, stats=False, parallel=0):
+    from battle import Battle
+    from matchup import build_from_spec, normalize_spec
+    army1 = build_from_spec(normalize_spec(scenario['army1']))
+    army2 = build_from_spec(normalize_spec(scenario['army2']))
+    return Battle(army1, army2, scenario['width'], scenario['height'], 8,
+                  map_name=scenario['map'], headless=True, seed=scenario['seed'],
+                  copy_armies=False, stats=stats, parallel=parallel)
+
+
+def _hash_state(digest, battle):
+    """Ajoute à digest l'état des unités en fin de round (hors temps mesuré)."""
+    for u in battle.army1_roster + battle.army2_roster:
+        digest.update(repr((u.position, u.hp, u.is_alive, u.fleeing)).encode())
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS: octets
+
+
+def _measure_allocations(scenario, rounds):
+    """Ko alloués en pic par round (moyenne sur les premiers rounds), via tracemalloc."""
+    battle = _build_battle(scenario)
+    samples = []
+    tracemalloc.start()
+    try:
+        while len(samples) < rounds and not battle.is_battle_over():
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            battle.simulate_round()
+            samples.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return sum(samples) / len(samples) / 1024 if samples else 0.0
+
+
+def run_scenario(scenario, alloc_rounds=ALLOC_ROUNDS, parallel=0):
+    """Joue un scénario jusqu'au bout et retourne ses mesures (dict sérialisable).
+
+    parallel=n: passe d'approche planifiée dans n processus (Battle(parallel=n)).
+    state_digest résume l'état des unités round après round: deux exécutions
+    d'un même scénario doivent donner le même.
+    """
+    battle = _build_battle(scenario, stats=True, parallel=parallel)
+    digest = hashlib.md5()
+    unit_rounds = 0
+    elapsed = 0
+    while not battle.is_battle_over() and battle.round <= scenario['max_rounds']:
+        unit_rounds += len(battle.get_all_alive())
+        t0 = time.perf_counter_ns()
+        battle.simulate_round()
+        elapsed += time.perf_counter_ns() - t0
+        _hash_state(digest, battle)
+    rounds = battle.round - 1
+    _, phases, counters = battle.stats.totals()
+    peak_rss = _peak_rss_kb()
+
+    seconds = elapsed / 1e9
+    return {
+        'name': scenario['name'],
+        'parallel': parallel,
+        'units': len(battle.army1_roster) + len(battle.army2_roster),
+        'winner': battle.is_battle_over(),
+        'rounds': rounds,
+        'seconds': seconds,
+        'rounds_per_sec': rounds / seconds if seconds else 0.0,
+        'us_per_unit_round': elapsed / 1e3 / max(1, unit_rounds),
+        'peak_rss_kb': peak_rss,
+        'alloc_kb_per_round': _measure_allocations(scenario, alloc_rounds) if alloc_rounds else None,
+        'phases_ms': {k: v / 1e6 for k, v in phases.items()},
+        'counters': counters,
+        'state_digest': digest.hexdigest(),
+    }
+
+
+def _run(scenario, alloc_rounds, parallel, isolate):
+    if isolate:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            return pool.submit(run_scenario, scenario, alloc_rounds, parallel).result()
+    return run_scenario(scenario, alloc_rounds, parallel)
+
+
+def run_suite(scenarios, isolate=True, alloc_rounds=ALLOC_ROUNDS, progress=None):
+    """Exécute les scénarios un par un.
+
+    isolate: chaque scénario tourne dans un processus neuf (pic RSS propre au
+    scénario, pas de caches chauds hérités du précédent).
+    progress: appelé avec chaque résultat au fil de l'eau.
+    """
+    results = []
+    for scenario in scenarios:
+        result = _run(scenario, alloc_rounds, 0, isolate)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def run_parallel(scenarios, workers, isolate=True, progress=None):
+    """Joue chaque scénario en séquentiel puis avec parallel=workers.
+
+    Retourne la liste des paires (séquentiel, parallèle) de mesures (sans
+    tracemalloc); progress est appelé avec chaque paire. Les deux batailles
+    doivent être identiques (même state_digest): voir parallel_mismatches.
+    """
+    pairs = []
+    for scenario in scenarios:
+        pair = (_run(scenario, 0, 0, isolate), _run(scenario, 0, workers, isolate))
+        pairs.append(pair)
+        if progress is not None:
+            progress(pair)
+    return pairs
+
+
+def parallel_mismatches(pairs):
+    """Noms des scénarios dont la bataille parallèle diffère de la séquentielle."""
+    return [serial['name'] for serial, par in pairs
+            if (serial['state_digest'], serial['rounds'], serial['winner'])
+            != (par['state_digest'], par['rounds'], par['winner'])]
+
+
+def save(suite, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(suite, f, ensure_ascii=False, indent=2)
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(suite, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare suite à baseline. Retourne (régressions, notes).
+
+    Régression: une métrique de COMPARED pire que la référence de plus de
+    tolerance (0.10 = +10 %). Note: nombre de rounds ou vainqueur différent
+    (la simulation elle-même a changé, les temps ne sont plus comparables).
+    """
+    old_by_name = {r['name']: r for r in baseline['results']}
+    regressions = []
+    notes = []
+    for new in suite['results']:
+        old = old_by_name.get(new['name'])
+        if old is None:
+            notes.append(f"{new['name']}: absent de la référence")
+            continue
+        if (old['rounds'], old['winner']) != (new['rounds'], new['winner']):
+            notes.append(f"{new['name']}: simulation différente "
+                         f"({old['rounds']} rounds, {old['winner']} → "
+                         f"{new['rounds']} rounds, {new['winner']})")
+        for metric in COMPARED:
+            before, after = old.get(metric), new.get(metric)
+            if not before or after is None:
+                continue
+            ratio = after / before
+            if ratio > 1 + tolerance:
+                regressions.append((new['name'], metric, before, after, ratio))
+    return regressions, notes
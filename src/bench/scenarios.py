@@ -0,0 +1,65 @@
+"""Scénarios fixes du benchmark: taille d'armée × carte, graine constante."""
+
+MAPS = ("Prairie", "Forêt", "Village", "Siège")
+
+SEED = 1234
+
+# Composition par taille: (spec armée 1, spec armée 2, largeur, hauteur, max_rounds)
+# Specs au format de matchup.normalize_spec: [(armée, [(unité, quantité), ...])]
+SIZES = {
+    "small": (
+        [("Armée Skaldienne", [("Infanterie régulière", 6), ("Arbaletrier régulier", 3),
+                               ("Officier", 1)])],
+        [("Armée Orlandar", [("Fantassin covaliir", 6), ("Archer covaliir", 3),
+                             ("Officier covaliir", 1)])],
+        40, 30, 200,
+    ),
+    "medium": (
+        [("Armée Skaldienne", [("Infanterie régulière", 30), ("Hallbardier", 10),
+                               ("Arbaletrier régulier", 15), ("Officier", 3),
+                               ("Mage de guerre", 2)])],
+        [("Armée Orlandar", [("Fantassin covaliir", 30), ("Equipée de piquier", 10),
+                             ("Archer covaliir", 15), ("Cavalier covaliir", 3),
+                             ("Officier covaliir", 2)])],
+        80, 50, 200,
+    ),
+    "huge": (
+        [("Armée Skaldienne", [("Infanterie régulière", 150), ("Hallbardier", 50),
+                               ("Arbaletrier régulier", 80), ("Officier", 10),
+                               ("Mage de guerre", 10)])],
+        [("Armée Orlandar", [("Fantassin covaliir", 150), ("Equipée de piquier", 50),
+                             ("Archer covaliir", 80), ("Cavalier covaliir", 15),
+                             ("Officier covaliir", 5)])],
+        120, 80, 100,
+    ),
+    # Grande carte: routes longues (pathfinding hiérarchique, hpa.py)
+    "vast": (
+        [("Armée Skaldienne", [("Infanterie régulière", 30), ("Hallbardier", 10),
+                               ("Arbaletrier régulier", 15), ("Officier", 3),
+                               ("Mage de guerre", 2)])],
+        [("Armée Orlandar", [("Fantassin covaliir", 30), ("Equipée de piquier", 10),
+                             ("Archer covaliir", 15), ("Cavalier covaliir", 3),
+                             ("Officier covaliir", 2)])],
+        300, 200, 200,
+    ),
+}
+
+
+def get_scenarios(sizes=None, maps=None, seed=SEED):
+    """Liste des scénarios (dicts) pour les tailles et cartes demandées (défaut: toutes)."""
+    scenarios = []
+    for size in sizes or SIZES:
+        army1, army2, width, height, max_rounds = SIZES[size]
+        for map_name in maps or MAPS:
+            scenarios.append({
+                'name': f"{size}/{map_name}",
+                'size': size,
+                'map': map_name,
+                'army1': army1,
+                'army2': army2,
+                'width': width,
+                'height': height,
+                'max_rounds': max_rounds,
+                'seed': seed,
+            })
+    return scenarios
@@ -0,0 +1,68 @@
+"""Cartes de dégagement pour les unités multi-cases (size 2: 2×2, size 3: 2×4).
+
+Pour une empreinte w×h, ClearanceMap compte, pour chaque case d'ancrage (coin
+haut-gauche, comme Battlefield.get_unit_cells), les cases de la boîte w×h qui
+sont:
+  - terrain: non passables (battlefield.passable), hors grille comprises;
+  - blocked: non passables ou occupées (battlefield.occupancy).
+
+Une boîte est libre si son compte vaut 0: le test d'empreinte de
+can_place_unit / _can_move_to devient une lecture. walkable (1 si terrain vaut
+0) joue pour l'A* des grandes unités le rôle de battlefield.passable.
+
+Construction par table de sommes cumulées (O(cases)), puis mise à jour
+incrémentale: chaque case qui change d'état ajuste les w×h ancrages qui la
+couvrent (Battlefield.place_unit / remove_unit, set_cell, set_gate_hp).
+"""
+
+from array import array
+
+
+class ClearanceMap:
+    """Comptes de cases bloquées par boîte w×h ancrée en chaque case."""
+
+    __slots__ = ('bf', 'w', 'h', 'terrain', 'blocked', 'walkable')
+
+    def __init__(self, bf, w, h):
+        self.bf = bf
+        self.w = w
+        self.h = h
+        passable, occupancy = bf.passable, bf.occupancy
+        self.terrain = self._box_counts([not ok for ok in passable])
+        self.blocked = self._box_counts([not ok or uid >= 0 for ok, uid in zip(passable, occupancy)])
+        self.walkable = bytearray(n == 0 for n in self.terrain)
+
+    def _box_counts(self, flags):
+        """array('H') des sommes de flags (indice x * height + y) par boîte w×h."""
+        width, height = self.bf.width, self.bf.height
+        w, h = self.w, self.h
+        # Sommes cumulées sur une grille bordée de cases bloquées (hors grille)
+        pw, ph = width + w, height + h
+        sat = [0] * ((pw + 1) * (ph + 1))
+        for x in range(pw):
+            row = 0
+            base = (x + 1) * (ph + 1)
+            prev = x * (ph + 1)
+            for y in range(ph):
+                row += flags[x * height + y] if x < width and y < height else 1
+                sat[base + y + 1] = sat[prev + y + 1] + row
+        counts = array('H', bytes(2 * width * height))
+        for x in range(width):
+            x0, x1 = x * (ph + 1), (x + w) * (ph + 1)
+            for y in range(height):
+                counts[x * height + y] = (sat[x1 + y + h] - sat[x0 + y + h]
+                                          - sat[x1 + y] + sat[x0 + y])
+        return counts
+
+    def update(self, x, y, d_terrain, d_blocked):
+        """La case (x, y) a changé: ajuste les ancrages dont la boîte la contient."""
+        height = self.bf.height
+        terrain, blocked, walkable = self.terrain, self.blocked, self.walkable
+        for ax in range(max(0, x - self.w + 1), x + 1):
+            base = ax * height
+            for ay in range(max(0, y - self.h + 1), y + 1):
+                if d_terrain:
+                    terrain[base + ay] += d_terrain
+                    walkable[base + ay] = terrain[base + ay] == 0
+                if d_blocked:
+                    blocked[base + ay] += d_blocked
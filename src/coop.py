@@ -0,0 +1,202 @@
+"""Planification coopérative de la passe d'approche (A* spatio-temporel fenêtré).
+
+Activée par Battle(coop=True) (ou coop=n: fenêtre de n rounds), exposée dans
+battle.coop. Dans la passe 3 de simulate_round, chaque unité en approche
+réserve sa case à tour de rôle; celle qui perd la course se rabat sur
+find_lateral_advance: un pas de côté choisi seul, recalculé au round suivant,
+et une colonne ne peut pas avancer d'un bloc (la case que libère l'unité de
+tête est encore occupée quand la suivante choisit).
+
+Avec coop, les unités d'une case qui perdent la course sont mises de côté puis
+planifiées ensemble, une fois toutes les autres réservations connues, du front
+vers l'arrière, dans une table de réservation spatio-temporelle:
+
+  - table[t] contient les cases prises au round t (1..window) par les unités
+    déjà planifiées; les réservations du round (passes 1 à 3) valent pour
+    toute la fenêtre (les unités qui les détiennent sont supposées y rester);
+  - les cases quittées ce round (moves) sont libres: l'arrière suit le front;
+  - un A* sur (case, round) choisit le plan qui se rapproche le plus tôt de la
+    cible, puis de la lane, attendre sur place étant un coup comme un autre.
+    Seul le premier pas est joué, la table est reconstruite à chaque round
+    (fenêtre glissante).
+
+Une unité planifiée n'entre que dans une case quittée par une unité placée
+avant elle dans moves: les déplacements s'appliquent dans l'ordre et aucun
+échange de cases n'est possible.
+
+plan() retourne le nombre d'unités restées bloquées; battle.stats compte les
+conflits (coop_conflicts: unités ayant perdu la course) et les unités bloquées
+(coop_blocked), les totaux de la bataille sont gardés dans le planificateur.
+"""
+
+import heapq
+
+from ai_commander import get_lane_offset
+
+COOP_WINDOW = 3         # Rounds couverts par la table de réservation
+COOP_MAX_NODES = 400    # États (case, round) développés au plus par unité
+
+_DIRS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+class CoopPlanner:
+    """Table de réservation spatio-temporelle et A* fenêtré, rebâtis à chaque round."""
+
+    def __init__(self, window=COOP_WINDOW, max_nodes=COOP_MAX_NODES):
+        self.window = max(1, window)
+        self.max_nodes = max_nodes
+        self.conflicts = 0  # Unités ayant perdu la course (total de la bataille)
+        self.blocked = 0    # Parmi elles, unités restées sur place
+        # Cases atteignables en un round, par (case, vitesse): ne dépend que de
+        # la passabilité, gardé d'un round à l'autre tant que grid_version tient
+        self._reach = {}
+        self._reach_version = None
+
+    def plan(self, bf, entries, reserved, moves):
+        """Planifie entries = [(unit, cible ou None, vitesse)], par priorité.
+
+        Complète moves (à la suite, dans l'ordre d'application) et reserved
+        (cases prises au round 1). Retourne le nombre d'unités bloquées.
+        """
+        window = self.window
+        if self._reach_version != bf.grid_version:
+            self._reach = {}
+            self._reach_version = bf.grid_version
+        table = [None] + [set() for _ in range(window)]
+        # Cases quittées ce round par les unités qui bougent déjà
+        vacated = set()
+        for unit, new_pos in moves.items():
+            if new_pos != unit.position:
+                vacated |= (bf._get_reserved_cells(unit, unit.position)
+                            - bf._get_reserved_cells(unit, new_pos))
+        vacated -= reserved
+
+        blocked = 0
+        for unit, target, speed in entries:
+            start = unit.position
+            steps = None
+            if target is not None:
+                steps = self._search(bf, table, reserved, vacated, start, target.position,
+                                     max(1, speed), get_lane_offset(unit, bf))
+            if steps is None:
+                steps = [start] * window
+            first = steps[0]
+            for t in range(1, window + 1):
+                table[t].add(steps[t - 1])
+            reserved.add(first)
+            if first == start:
+                blocked += 1
+            else:
+                moves[unit] = first
+                vacated.add(start)
+
+        self.conflicts += len(entries)
+        self.blocked += blocked
+        return blocked
+
+    def _neighbors(self, bf, pos, speed):
+        """Cases à au plus speed pas (8 directions) par des cases passables."""
+        key = (pos, speed)
+        cells = self._reach.get(key)
+        if cells is not None:
+            return cells
+        width, height, passable = bf.width, bf.height, bf.passable
+        px, py = pos
+        x0, x1 = px - speed, px + speed
+        y0, y1 = py - speed, py + speed
+        if x0 >= 0 and y0 >= 0 and x1 < width and y1 < height and all(
+                passable[x * height + y0:x * height + y1 + 1].count(0) == 0
+                for x in range(x0, x1 + 1)):
+            # Boîte entièrement passable (cas courant en terrain ouvert)
+            cells = [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)
+                     if x != px or y != py]
+        else:
+            seen = {pos}
+            frontier = [pos]
+            for _ in range(speed):
+                nxt = []
+                for cx, cy in frontier:
+                    for dx, dy in _DIRS:
+                        nx, ny = cx + dx, cy + dy
+                        if 0 <= nx < width and 0 <= ny < height and (nx, ny) not in seen \
+                                and passable[nx * height + ny]:
+                            seen.add((nx, ny))
+                            nxt.append((nx, ny))
+                frontier = nxt
+            seen.discard(pos)
+            cells = sorted(seen)
+        self._reach[key] = cells
+        return cells
+
+    def _search(self, bf, table, reserved, vacated, start, goal, speed, lane_y):
+        """A* sur (case, round): plan de window cases (une par round), ou None.
+
+        Coût d'un plan: somme sur les rounds de la distance (Chebyshev) à goal,
+        puis de l'écart à la lane (l'étalement se fait vers la lane, comme
+        find_lateral_advance), plus un coût unitaire par déplacement qui
+        départage les plans équivalents en faveur de l'immobilité. Jamais de
+        recul par rapport à goal.
+        """
+        window = self.window
+        gx, gy = goal
+        # Une case de distance pèse plus que tout écart à la lane, et un écart
+        # plus que tous les déplacements d'un plan
+        weight = window + 1
+        span = bf.height
+
+        def rest(d, t):
+            # Minorant du coût des rounds t+1..window depuis une case à distance d
+            return weight * span * sum(max(0, d - k * speed) for k in range(1, window - t + 1))
+
+        height, passable, occupancy = bf.height, bf.passable, bf.occupancy
+        heappush, heappop = heapq.heappush, heapq.heappop
+        sx, sy = start
+        d0 = max(abs(sx - gx), abs(sy - gy))
+        heap = [(rest(d0, 0), 0, 0, start, d0)]
+        parent = {}
+        closed = set()
+        nodes = 0
+        best = None
+        while heap:
+            _, g, t, pos, here = heappop(heap)
+            if (pos, t) in closed:
+                continue
+            closed.add((pos, t))
+            if t == window:
+                best = pos
+                break
+            nodes += 1
+            if nodes > self.max_nodes:
+                break
+            t1 = t + 1
+            taken = table[t1]
+            # Attendre sur place est un coup comme un autre
+            for npos in (pos, *self._neighbors(bf, pos, speed)):
+                nx, ny = npos
+                d = max(abs(nx - gx), abs(ny - gy))
+                if d > here:
+                    continue
+                key = (npos, t1)
+                if key in closed or npos in taken or npos in reserved:
+                    continue
+                # Case libre: passable et inoccupée, quittée ce round ou la sienne
+                i = nx * height + ny
+                if not passable[i] or (occupancy[i] >= 0 and npos not in vacated
+                                       and npos != start):
+                    continue
+                ng = g + weight * (span * d + abs(ny - lane_y)) + (npos != pos)
+                known = parent.get(key)
+                if known is not None and known[1] <= ng:
+                    continue
+                parent[key] = ((pos, t), ng)
+                heappush(heap, (ng + rest(d, t1), ng, t1, npos, d))
+
+        if best is None:
+            return None
+        pos, t = best, window
+        steps = []
+        while t > 0:
+            steps.append(pos)
+            pos, t = parent[(pos, t)][0]
+        steps.reverse()
+        return steps
@@ -0,0 +1,233 @@
+"""Tables analytiques de dégâts: distributions exactes arme → cible.
+
+Reproduit le pipeline d6 de Unit.perform_attacks (intimidation, toucher,
+blesser, sauvegarde, dégâts) sans lancer un seul dé. Les distributions par
+(profil d'arme, seuils) sont mises en cache: une fois la table remplie, une
+question comme « combien de rounds faut-il à X pour tuer Y ? » coûte quelques
+microsecondes au lieu d'une simulation.
+
+Une distribution est un tuple dist où dist[d] = P(dégâts totaux == d).
+
+Non modélisé: régénération, vengeance du sang, sorts, moral/fuite et
+déplacements (une attaque par round, cible toujours à portée).
+
+Usage en ligne de commande:
+    python damage_tables.py "Armée Skaldienne:Infanterie régulière" \\
+                            "Armée Orlandar:Fantassin covaliir" --charge
+"""
+
+import argparse
+from functools import lru_cache
+
+from dice import d6_at_least
+
+KILL_EPSILON = 1e-9   # Probabilité de survie résiduelle négligeable
+MAX_ROUNDS = 200
+
+
+# ═══════════════════════════════════════════════════════════════
+#                     DISTRIBUTIONS DE BASE
+# ═══════════════════════════════════════════════════════════════
+
+def _convolve(a, b):
+    out = [0.0] * (len(a) + len(b) - 1)
+    for i, pa in enumerate(a):
+        if pa:
+            for j, pb in enumerate(b):
+                out[i + j] += pa * pb
+    return out
+
+
+def _cap(dist, cap):
+    """Regroupe toute la masse ≥ cap dans dist[cap] (dégâts excédentaires inutiles)."""
+    if cap is None or len(dist) <= cap + 1:
+        return dist
+    return dist[:cap] + [sum(dist[cap:])]
+
+
+def weapon_key(arme):
+    """Profil d'arme hachable (indépendant de l'instance)."""
+    if arme._is_dice:
+        dmg = (arme._bonus, arme._nb_des, arme._faces)
+    else:
+        dmg = (arme._fixed_damage, 0, 0)
+    return (arme.nb_attaque, arme.toucher, arme.blesser, arme.perforation, dmg)
+
+
+@lru_cache(maxsize=256)
+def _hit_damage(dmg, bonus):
+    """Distribution des dégâts d'une touche non sauvegardée (plancher 0, comme take_damage)."""
+    base, nb_des, faces = dmg
+    dist = [1.0]
+    for _ in range(nb_des):
+        dist = _convolve(dist, [1.0 / faces] * faces)
+    # dist[i] = P(somme des dés == nb_des + i)
+    shift = base + bonus + nb_des
+    out = {}
+    for i, p in enumerate(dist):
+        d = max(0, shift + i)
+        out[d] = out.get(d, 0.0) + p
+    return tuple(out.get(d, 0.0) for d in range(max(out) + 1))
+
+
+@lru_cache(maxsize=4096)
+def _weapon_table(key, toucher, blesser, save, awe_sixths, dmg_bonus):
+    """Distribution des dégâts d'UNE arme pour un round (toutes ses attaques)."""
+    nb_attaque, _, _, _, dmg = key
+    p = (awe_sixths / 6
+         * d6_at_least(toucher) / 6
+         * d6_at_least(blesser) / 6
+         * (1 - d6_at_least(save) / 6))
+    hit = _hit_damage(dmg, dmg_bonus)
+    per_attack = [(1 - p) + p * hit[0]] + [p * h for h in hit[1:]]
+    dist = [1.0]
+    for _ in range(nb_attaque):
+        dist = _convolve(dist, per_attack)
+    return tuple(dist)
+
+
+# ═══════════════════════════════════════════════════════════════
+#                     ATTAQUANT → CIBLE
+# ═══════════════════════════════════════════════════════════════
+
+def weapon_distribution(arme, target_save, toucher_mod=0, blesser_mod=0, perf_mod=0,
+                        dmg_bonus=0, save_bonus=0, awe_sixths=6):
+    """Distribution des dégâts d'une arme pour un round, modificateurs déjà résolus.
+
+    Les modificateurs suivent les conventions de perform_attacks (valeur basse =
+    plus facile). awe_sixths: chances sur 6 de passer l'intimidation par attaque.
+    """
+    save = min(7, target_save - (arme.perforation + perf_mod) - save_bonus)
+    return _weapon_table(weapon_key(arme), arme.toucher + toucher_mod,
+                         arme.blesser + blesser_mod, save, min(6, max(0, awe_sixths)),
+                         dmg_bonus)
+
+
+def round_distribution(attacker, target, dist=1, charged=False,
+                       target_on_rampart=False, attacker_on_stairs=False, cap=None):
+    """Distribution des dégâts infligés par attacker à target en un round.
+
+    Applique les mêmes modificateurs que Unit.perform_attacks: peur de
+    l'attaquant, anti-infanterie/anti-large, charge (charged=True), rempart
+    (cible et attaquant via attacker._on_wall), intimidation (awe).
+    cap: regroupe les dégâts ≥ cap (typiquement les PV de la cible).
+    """
+    if dist > attacker._max_range:
+        return (1.0,)
+    if target_on_rampart and attacker._max_range < 4 and not attacker_on_stairs:
+        return (1.0,)
+
+    toucher_mod = (1 if attacker.afraid else 0) + (-1 if attacker._on_wall else 0)
+    blesser_mod = 0
+    dmg_bonus = 0
+    if ((attacker.anti_infanterie and target.unit_type == "Infanterie") or
+            (attacker.anti_large and target.unit_type in ("Large", "Cavalerie", "Monstre"))):
+        toucher_mod -= 1
+        blesser_mod -= 1
+    if charged:
+        if attacker.charge_montee:
+            dmg_bonus = 1
+        elif attacker.charge_aida:
+            blesser_mod -= 1
+    save_bonus = 2 if target_on_rampart else 0
+    awe_sixths = 6
+    if dist <= 1 and target.awe > 0:
+        awe_sixths = attacker.get_effective_morale()
+
+    total = [1.0]
+    for arme in attacker.armes:
+        if dist > arme.porte:
+            continue
+        wd = weapon_distribution(arme, target.sauvegarde, toucher_mod, blesser_mod, 0,
+                                 dmg_bonus, save_bonus, awe_sixths)
+        total = _cap(_convolve(total, wd), cap)
+    return tuple(total)
+
+
+def expected_value(dist):
+    return sum(d * p for d, p in enumerate(dist))
+
+
+def expected_damage(attacker, target, **kwargs):
+    """Dégâts moyens infligés par round."""
+    return expected_value(round_distribution(attacker, target, **kwargs))
+
+
+def kill_probability(attacker, target, rounds=1, hp=None, **kwargs):
+    """Probabilité que target (hp PV, défaut: PV actuels) soit tuée en ≤ rounds rounds.
+
+    Seul le premier round bénéficie de la charge (charged=True).
+    """
+    hp = target.pv if hp is None else hp
+    if hp <= 0:
+        return 1.0
+    charged = kwargs.pop('charged', False)
+    first = round_distribution(attacker, target, charged=charged, cap=hp, **kwargs)
+    other = round_distribution(attacker, target, cap=hp, **kwargs) if charged else first
+    acc = list(first)
+    for _ in range(rounds - 1):
+        acc = _cap(_convolve(acc, other), hp)
+    return acc[hp] if len(acc) > hp else 0.0
+
+
+def expected_rounds_to_kill(attacker, target, hp=None, max_rounds=MAX_ROUNDS, **kwargs):
+    """Nombre moyen de rounds pour tuer target (None si l'attaquant ne peut pas la blesser).
+
+    E[R] = Σ P(R > r), tronquée à max_rounds.
+    """
+    hp = target.pv if hp is None else hp
+    if hp <= 0:
+        return 0.0
+    charged = kwargs.pop('charged', False)
+    first = round_distribution(attacker, target, charged=charged, cap=hp, **kwargs)
+    other = round_distribution(attacker, target, cap=hp, **kwargs) if charged else first
+    if not any(other[1:]):
+        return None
+
+    expected = 1.0   # P(R > 0)
+    acc = list(first)
+    for _ in range(1, max_rounds):
+        survive = 1.0 - (acc[hp] if len(acc) > hp else 0.0)
+        if survive < KILL_EPSILON:
+            break
+        expected += survive
+        acc = _cap(_convolve(acc, other), hp)
+    return expected
+
+
+# ═══════════════════════════════════════════════════════════════
+#                     LIGNE DE COMMANDE
+# ═══════════════════════════════════════════════════════════════
+
+def _parse_unit(text):
+    from unit_library import make_unit
+    army_name, _, unit_name = text.partition(":")
+    unit = make_unit(army_name.strip(), unit_name.strip())
+    if unit is None:
+        raise SystemExit(f"Unité introuvable: {text}")
+    return unit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dégâts attendus d'une unité contre une autre.")
+    parser.add_argument("attacker", help='"Armée:Unité"')
+    parser.add_argument("target", help='"Armée:Unité"')
+    parser.add_argument("-d", "--dist", type=int, default=1, help="Distance (cases)")
+    parser.add_argument("--charge", action="store_true", help="L'attaquant vient de charger")
+    parser.add_argument("--rampart", action="store_true", help="La cible est sur un rempart")
+    args = parser.parse_args(argv)
+
+    attacker = _parse_unit(args.attacker)
+    target = _parse_unit(args.target)
+    kwargs = dict(dist=args.dist, charged=args.charge, target_on_rampart=args.rampart)
+
+    print(f"{attacker.name} → {target.name} ({target.pv} PV, sauvegarde {target.sauvegarde}+)")
+    print(f"Dégâts moyens/round: {expected_damage(attacker, target, **kwargs):.2f}")
+    for r in (1, 2, 3, 5):
+        print(f"P(tuée en ≤{r} rounds): {kill_probability(attacker, target, rounds=r, **kwargs):6.1%}")
+    rounds = expected_rounds_to_kill(attacker, target, **kwargs)
+    print("Rounds moyens pour tuer: " + ("jamais" if rounds is None else f"{rounds:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
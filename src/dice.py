@@ -0,0 +1,91 @@
+"""Résolution groupée des jets de dés (d6 toucher/blesser/sauvegarde, dégâts).
+
+Au lieu de lancer chaque dé, on tire directement le NOMBRE de succès parmi n
+jets (loi binomiale) et la SOMME de k jets de dégâts, par inversion de tables de
+répartition précalculées et mises en cache. Un seul rng.random() par tirage.
+
+Les distributions sont exactement celles des jets individuels: seule la
+consommation du générateur change (une bataille reste reproductible par seed).
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+
+
+def d6_at_least(threshold):
+    """Probabilité (en sixièmes) qu'un d6 fasse ≥ threshold."""
+    return max(0, min(6, 7 - threshold))
+
+
+@lru_cache(maxsize=4096)
+def _binomial_cdf(n, sixths):
+    """Table de répartition de Binomiale(n, sixths/6)."""
+    p = sixths / 6
+    q = 1 - p
+    cdf = []
+    term = q ** n
+    total = 0.0
+    for k in range(n + 1):
+        total += term
+        cdf.append(total)
+        if k < n:
+            term *= (n - k) / (k + 1) * p / q
+    return cdf
+
+
+def binomial(n, sixths, rng):
+    """Nombre de succès parmi n jets réussis chacun avec probabilité sixths/6."""
+    if n <= 0 or sixths <= 0:
+        return 0
+    if sixths >= 6:
+        return n
+    cdf = _binomial_cdf(n, sixths)
+    return min(n, bisect_right(cdf, rng.random() * cdf[-1]))
+
+
+@lru_cache(maxsize=1024)
+def _dice_sum_cdf(n_dice, faces):
+    """Table de répartition de la somme de n_dice dés à faces faces (à partir de n_dice)."""
+    dist = [1.0]
+    for _ in range(n_dice):
+        new = [0.0] * (len(dist) + faces - 1)
+        for s, w in enumerate(dist):
+            if w:
+                for f in range(faces):
+                    new[s + f] += w / faces
+        dist = new
+    cdf = []
+    total = 0.0
+    for w in dist:
+        total += w
+        cdf.append(total)
+    return cdf
+
+
+def dice_sum(n_dice, faces, rng):
+    """Somme de n_dice jets de dés à faces faces."""
+    if n_dice <= 0 or faces <= 0:
+        return 0
+    if faces == 1:
+        return n_dice
+    cdf = _dice_sum_cdf(n_dice, faces)
+    return n_dice + bisect_right(cdf, rng.random() * cdf[-1])
+
+
+def total_damage(arme, hits, rng, bonus=0, floor=None):
+    """Somme des dégâts de hits touches de l'arme (chaque touche: lancer_degats() + bonus).
+
+    floor: plancher appliqué à chaque touche (ex: 1 pour les portes). Si le
+    plancher peut mordre sur un jet de dés, on retombe sur des jets individuels.
+    """
+    if hits <= 0:
+        return 0
+    if not arme._is_dice:
+        per_hit = arme._fixed_damage + bonus
+        if floor is not None:
+            per_hit = max(floor, per_hit)
+        return per_hit * hits
+    per_hit_min = arme._bonus + bonus + arme._nb_des
+    if floor is not None and per_hit_min < floor:
+        return sum(max(floor, arme.lancer_degats(rng) + bonus) for _ in range(hits))
+    return (arme._bonus + bonus) * hits + dice_sum(arme._nb_des * hits, arme._faces, rng)
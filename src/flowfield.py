@@ -0,0 +1,176 @@
+"""Champs de flux (flow fields) partagés par les unités visant le même objectif.
+
+Un FlowField est une carte de distances (en nombre de déplacements, diagonales
+comprises, comme le compte de pas de compute_move) depuis un ensemble de cases
+objectif. Il est calculé par un parcours en largeur *paresseux*: l'expansion
+s'arrête dès que la case demandée est atteinte et reprend à la requête suivante.
+Toutes les unités qui visent le même objectif dans le round partagent donc un
+seul parcours, et lire le pas suivant depuis une case coûte O(1).
+
+Passabilité identique à Battlefield.a_star_path: obstacles, murs et portes
+intactes bloquent; les unités ne bloquent pas (elles sont évitées au moment de
+lire le chemin, voir FlowField.walk). Un champ peut recevoir son propre masque
+(passable=...): le champ de fuite des unités multi-cases parcourt les ancrages
+marchables de leur carte de dégagement (Battlefield.edge_field).
+
+FlowFieldCache (battlefield.flow) garde les champs par clé d'objectif. Il est
+vidé quand battlefield.grid_version change (case modifiée, porte détruite) et
+new_round() oublie les champs qui n'ont pas servi pendant le round écoulé.
+"""
+
+from collections import deque
+
+# Voisins: orthogonaux d'abord (chemins droits à distance égale), puis diagonales
+_DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+OCCUPIED_PENALTY = 2
+
+
+class FlowField:
+    """Distances depuis un ensemble de cases objectif, étendues à la demande."""
+
+    __slots__ = ('bf', 'passable', 'dist', '_queue', 'expanded')
+
+    def __init__(self, bf, goals, passable=None):
+        self.bf = bf
+        self.passable = passable  # None = bf.passable (relu à chaque expansion)
+        width, height = bf.width, bf.height
+        self.dist = [-1] * (width * height)
+        self._queue = deque()
+        self.expanded = 0
+        for x, y in goals:
+            if 0 <= x < width and 0 <= y < height and self._passable(x, y):
+                i = x * height + y
+                if self.dist[i] < 0:
+                    self.dist[i] = 0
+                    self._queue.append(i)
+
+    def _passable(self, x, y):
+        passable = self.bf.passable if self.passable is None else self.passable
+        return passable[x * self.bf.height + y]
+
+    def distance(self, pos):
+        """Nombre de pas depuis pos jusqu'à l'objectif (None si inatteignable)."""
+        height = self.bf.height
+        i = pos[0] * height + pos[1]
+        dist = self.dist
+        if dist[i] < 0 and self._queue:
+            self._expand_until(i)
+        d = dist[i]
+        return d if d >= 0 else None
+
+    def _expand_until(self, target, level=-1):
+        """Étend le parcours jusqu'à atteindre target et, avec level, jusqu'à ce que
+        toutes les cases à distance ≤ level soient connues (file en tête ≥ level)."""
+        bf = self.bf
+        passable = bf.passable if self.passable is None else self.passable
+        width, height = bf.width, bf.height
+        dist, queue = self.dist, self._queue
+        popleft, append = queue.popleft, queue.append
+        expanded = 0
+        while queue and (dist[target] < 0 or dist[queue[0]] < level):
+            i = popleft()
+            expanded += 1
+            cx, cy = divmod(i, height)
+            nd = dist[i] + 1
+            for dx, dy in _DIRS:
+                nx, ny = cx + dx, cy + dy
+                if nx < 0 or nx >= width or ny < 0 or ny >= height:
+                    continue
+                j = nx * height + ny
+                if dist[j] >= 0 or not passable[j]:
+                    continue
+                dist[j] = nd
+                append(j)
+        self.expanded += expanded
+        if bf.stats is not None:
+            bf.stats.count('flow_cells', expanded)
+
+    def walk(self, start, steps, blocked=(), occupancy=None):
+        """Chemin de descente depuis start (au plus steps cases, start exclu).
+
+        Chaque pas va vers un voisin plus proche de l'objectif, hors des cases
+        blocked (réservations du round). Comme la pénalité alliée de l'A*, une
+        case occupée (occupancy[i] >= 0, voir battlefield.occupancy) coûte
+        OCCUPIED_PENALTY: on préfère un pas de
+        côté libre à distance égale plutôt que de traverser un allié. À coût
+        égal, l'ordre de _DIRS départage.
+        """
+        d = self.distance(start)
+        if not d:
+            return []
+        height = self.bf.height
+        width = self.bf.width
+        dist = self.dist
+        # Les voisins à distance égale doivent être connus: le pas choisi ne
+        # dépend pas de l'avancement du parcours paresseux (requêtes précédentes)
+        if self._queue and dist[self._queue[0]] < d:
+            self._expand_until(start[0] * height + start[1], d)
+        path = []
+        visited = {start}
+        cx, cy = start
+        for _ in range(steps):
+            if d == 0:
+                break
+            best = None
+            best_key = None
+            for k, (dx, dy) in enumerate(_DIRS):
+                nx, ny = cx + dx, cy + dy
+                if nx < 0 or nx >= width or ny < 0 or ny >= height:
+                    continue
+                j = nx * height + ny
+                nd = dist[j]
+                if nd < 0 or nd > d:
+                    continue
+                pos = (nx, ny)
+                if pos in blocked or pos in visited:
+                    continue
+                cost = nd + OCCUPIED_PENALTY if occupancy is not None and occupancy[j] >= 0 else nd
+                if cost > d + 1:
+                    continue
+                key = (cost, k)
+                if best_key is None or key < best_key:
+                    best_key = key
+                    best = pos
+                    best_d = nd
+            if best is None:
+                break
+            path.append(best)
+            visited.add(best)
+            cx, cy = best
+            d = best_d
+        return path
+
+
+class FlowFieldCache:
+    """Champs de flux par objectif, invalidés par battlefield.grid_version."""
+
+    def __init__(self, bf):
+        self.bf = bf
+        self.fields = {}
+        self._used = set()
+        self._version = bf.grid_version
+
+    def get(self, key, goals):
+        """Champ de l'objectif key (goals: itérable de cases, lu seulement si le champ est neuf)."""
+        bf = self.bf
+        if self._version != bf.grid_version:
+            self.clear()
+        field = self.fields.get(key)
+        if field is None:
+            field = self.fields[key] = FlowField(bf, goals)
+            if bf.stats is not None:
+                bf.stats.count('flow_fields')
+        self._used.add(key)
+        return field
+
+    def new_round(self):
+        """Oublie les champs inutilisés depuis le dernier appel."""
+        if len(self._used) != len(self.fields):
+            self.fields = {k: f for k, f in self.fields.items() if k in self._used}
+        self._used = set()
+
+    def clear(self):
+        self.fields.clear()
+        self._used.clear()
+        self._version = self.bf.grid_version
@@ -0,0 +1,381 @@
+"""Pathfinding hiérarchique (HPA*) sur la grille d'un Battlefield (battlefield.passable).
+
+La grille est découpée en clusters de CLUSTER_SIZE × CLUSTER_SIZE cases. Sur
+chaque frontière entre deux clusters voisins, chaque segment continu de cases
+passables des deux côtés donne une ou deux entrées (une paire de cases face à
+face). Le graphe abstrait relie:
+  - les deux cases d'une entrée (coût 1),
+  - les entrées d'un même cluster entre elles (distance exacte dans le cluster).
+
+Une route longue se cherche par A* sur ce graphe (quelques centaines de noeuds
+au lieu de milliers de cases), puis est raffinée case par case avec les
+chemins intra-cluster mémorisés. Deux cases de composantes connexes
+différentes sont rejetées immédiatement, sans recherche.
+
+Tout est construit à la demande (seuls les clusters traversés sont analysés) et
+réparé localement: invalidate(x, y) — appelé quand une case change de
+passabilité (mur temporaire, porte détruite) — n'oublie que le cluster de la
+case et ses voisins.
+
+Les unités et réservations ne font pas partie de l'abstraction: la route est
+statique, Battlefield.a_star_path l'affine localement avec l'occupation du
+moment.
+"""
+
+import heapq
+
+CLUSTER_SIZE = 10
+WIDE_ENTRANCE = 6       # Segment plus long: deux entrées (aux extrémités)
+DIAG_COST = 1.414       # Mêmes coûts que Battlefield.a_star_path
+
+_DIRS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def _octile(a, b):
+    dx = abs(a[0] - b[0])
+    dy = abs(a[1] - b[1])
+    return max(dx, dy) + (DIAG_COST - 1) * min(dx, dy)
+
+
+class HPAGraph:
+    """Abstraction hiérarchique paresseuse d'un Battlefield."""
+
+    def __init__(self, bf, cluster_size=CLUSTER_SIZE):
+        self.bf = bf
+        self.size = cluster_size
+        self._borders = {}      # (cid, cid voisin) → [(case côté cid, case côté voisin)]
+        # cid → ({entrée: [cases voisines]}, {entrée: {entrée: coût}}, {source: Dijkstra local})
+        self._clusters = {}
+        self._adj = {}          # cid → adjacence des cases passables du cluster
+        self._components = None
+        self._next_label = 0
+        self.clusters_built = 0
+
+    # ─── Grille ───
+
+    def _passable(self, x, y):
+        return self.bf.passable[x * self.bf.height + y]
+
+    def cluster_of(self, pos):
+        return (pos[0] // self.size, pos[1] // self.size)
+
+    def _bounds(self, cid):
+        s = self.size
+        x0, y0 = cid[0] * s, cid[1] * s
+        return x0, y0, min(x0 + s, self.bf.width), min(y0 + s, self.bf.height)
+
+    def invalidate(self, x, y):
+        """La case (x, y) a changé de passabilité: oublie son cluster et ses voisins."""
+        cid = self.cluster_of((x, y))
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                nid = (cid[0] + dx, cid[1] + dy)
+                self._clusters.pop(nid, None)
+                self._adj.pop(nid, None)
+                self._borders.pop((cid, nid), None)
+                self._borders.pop((nid, cid), None)
+        if self._components is not None:
+            self._update_component(x, y)
+
+    def invalidate_all(self):
+        self._borders.clear()
+        self._clusters.clear()
+        self._adj.clear()
+        self._components = None
+
+    # ─── Composantes connexes (rejet immédiat des objectifs inatteignables) ───
+
+    def connected(self, a, b):
+        if self._components is None:
+            self._components = self._label_components()
+        height = self.bf.height
+        ca = self._components[a[0] * height + a[1]]
+        return ca >= 0 and ca == self._components[b[0] * height + b[1]]
+
+    def _update_component(self, x, y):
+        """Met à jour les étiquettes pour la seule case (x, y), sans tout reparcourir.
+
+        Case devenue passable: elle fusionne les composantes voisines. Case
+        devenue bloquante: elle perd son étiquette, mais une composante
+        éventuellement coupée en deux garde la sienne. connected() peut alors
+        répondre vrai à tort (find_path échoue et l'appelant se rabat sur
+        l'A*), jamais faux à tort.
+        """
+        labels = self._components
+        width, height = self.bf.width, self.bf.height
+        i = x * height + y
+        if not self._passable(x, y):
+            labels[i] = -2
+            return
+        around = set()
+        for dx, dy in _DIRS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and labels[nx * height + ny] >= 0:
+                around.add(labels[nx * height + ny])
+        if not around:
+            labels[i] = self._next_label
+            self._next_label += 1
+            return
+        keep = min(around)
+        labels[i] = keep
+        around.discard(keep)
+        if around:
+            self._components = [keep if label in around else label for label in labels]
+
+    def _label_components(self):
+        bf = self.bf
+        width, height = bf.width, bf.height
+        # -1: passable pas encore étiquetée, -2: bloquée
+        labels = [-1 if ok else -2 for ok in bf.passable]
+        label = 0
+        for start in range(width * height):
+            if labels[start] != -1:
+                continue
+            labels[start] = label
+            stack = [start]
+            while stack:
+                cx, cy = divmod(stack.pop(), height)
+                for dx, dy in _DIRS:
+                    nx, ny = cx + dx, cy + dy
+                    if 0 <= nx < width and 0 <= ny < height:
+                        j = nx * height + ny
+                        if labels[j] == -1:
+                            labels[j] = label
+                            stack.append(j)
+            label += 1
+        self._next_label = label
+        return labels
+
+    # ─── Entrées et graphe intra-cluster ───
+
+    def _border(self, cid, nid):
+        """Entrées entre cid et son voisin nid (à droite, en bas ou en diagonale).
+
+        [(case côté cid, case côté nid)]. Les déplacements diagonaux étant
+        permis, une paire diagonale qui traverse la frontière compte aussi là
+        où aucune paire face à face ne passe.
+        """
+        key = (cid, nid)
+        pairs = self._borders.get(key)
+        if pairs is not None:
+            return pairs
+        passable = self._passable
+        x0, y0, x1, y1 = self._bounds(cid)
+        pairs = []
+        if nid[0] > cid[0] and nid[1] != cid[1]:
+            # Coin: une seule paire diagonale possible
+            if nid[1] > cid[1]:
+                a, b = (x1 - 1, y1 - 1), (x1, y1)
+            else:
+                a, b = (x1 - 1, y0), (x1, y0 - 1)
+            if passable(*a) and passable(*b):
+                pairs.append((a, b))
+            self._borders[key] = pairs
+            return pairs
+        if nid[0] > cid[0]:
+            inside = [(x1 - 1, y) for y in range(y0, y1)]
+            step = (1, 0)
+        else:
+            inside = [(x, y1 - 1) for x in range(x0, x1)]
+            step = (0, 1)
+        ok = [passable(*a) and passable(a[0] + step[0], a[1] + step[1]) for a in inside]
+        run = []
+        for i, a in enumerate(inside + [None]):
+            if a is not None and ok[i]:
+                run.append((a, (a[0] + step[0], a[1] + step[1])))
+                continue
+            if run:
+                if len(run) < WIDE_ENTRANCE:
+                    pairs.append(run[len(run) // 2])
+                else:
+                    pairs.append(run[0])
+                    pairs.append(run[-1])
+                run = []
+        # Passages uniquement diagonaux (aucune paire droite aux deux extrémités)
+        for i in range(len(inside) - 1):
+            if ok[i] or ok[i + 1]:
+                continue
+            a, c = inside[i], inside[i + 1]
+            for a, b in ((a, (c[0] + step[0], c[1] + step[1])),
+                         (c, (a[0] + step[0], a[1] + step[1]))):
+                if passable(*a) and passable(*b):
+                    pairs.append((a, b))
+        self._borders[key] = pairs
+        return pairs
+
+    def _exits(self, cid):
+        """[(case du cluster, case voisine)] pour les huit clusters voisins de cid."""
+        cx, cy = cid
+        ncx = (self.bf.width + self.size - 1) // self.size
+        ncy = (self.bf.height + self.size - 1) // self.size
+        exits = []
+        for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            nid = (cx + dx, cy + dy)
+            if 0 <= nid[0] < ncx and 0 <= nid[1] < ncy:
+                exits.extend(self._border(cid, nid))
+            nid = (cx - dx, cy - dy)
+            if 0 <= nid[0] < ncx and 0 <= nid[1] < ncy:
+                exits.extend((b, a) for a, b in self._border(nid, cid))
+        return exits
+
+    def _adjacency(self, cid):
+        """{case passable du cluster: [(voisine dans le cluster, coût)]}, mémorisé."""
+        adj = self._adj.get(cid)
+        if adj is not None:
+            return adj
+        x0, y0, x1, y1 = self._bounds(cid)
+        passable = self._passable
+        free = {(x, y) for x in range(x0, x1) for y in range(y0, y1) if passable(x, y)}
+        adj = {}
+        for cell in free:
+            cx, cy = cell
+            links = []
+            for dx, dy in _DIRS:
+                n = (cx + dx, cy + dy)
+                if n in free:
+                    links.append((n, DIAG_COST if dx and dy else 1.0))
+            adj[cell] = links
+        self._adj[cid] = adj
+        return adj
+
+    def _search(self, source):
+        """(distances, prédécesseurs) depuis source sans sortir de son cluster, mémorisés.
+
+        Au plus une entrée par case du cluster: les départs et objectifs
+        fréquents (unités immobiles, cibles) ne refont pas leur Dijkstra.
+        """
+        cid = self.cluster_of(source)
+        searches = self._cluster(cid)[2]
+        result = searches.get(source)
+        if result is None:
+            result = searches[source] = self._dijkstra(cid, source)
+        return result
+
+    def _dijkstra(self, cid, source):
+        adj = self._adjacency(cid)
+        dist = {source: 0.0}
+        pred = {}
+        heap = [(0.0, source)]
+        _heappop, _heappush = heapq.heappop, heapq.heappush
+        while heap:
+            d, cur = _heappop(heap)
+            if d > dist[cur]:
+                continue
+            for n, cost in adj.get(cur, ()):
+                nd = d + cost
+                if nd < dist.get(n, 1e9):
+                    dist[n] = nd
+                    pred[n] = cur
+                    _heappush(heap, (nd, n))
+        return dist, pred
+
+    def _cluster(self, cid):
+        """(entrées → cases voisines, coûts entre entrées, recherches locales) de cid.
+
+        Les deux derniers dictionnaires se remplissent à la demande (_links,
+        _search): seules les entrées réellement développées par une requête
+        paient leur Dijkstra.
+        """
+        data = self._clusters.get(cid)
+        if data is not None:
+            return data
+        inter = {}
+        for a, b in self._exits(cid):
+            inter.setdefault(a, []).append(b)
+        data = self._clusters[cid] = (inter, {}, {})
+        self.clusters_built += 1
+        return data
+
+    def _links(self, node):
+        """{autre entrée du cluster de node: distance intra-cluster}."""
+        inter, intra, _ = self._cluster(self.cluster_of(node))
+        links = intra.get(node)
+        if links is None:
+            dist = self._search(node)[0]
+            links = intra[node] = {m: dist[m] for m in inter if m != node and m in dist}
+        return links
+
+    # ─── Requête ───
+
+    def find_path(self, start, goal):
+        """Chemin case par case de start à goal (start exclu).
+
+        None si goal est inatteignable (composantes différentes); [] si
+        l'abstraction n'a pas trouvé de route (départ hors grille passable,
+        passage uniquement en diagonale entre deux clusters): l'appelant se
+        rabat alors sur un A* classique.
+        """
+        if not self._passable(*start):
+            return []
+        if not self.connected(start, goal):
+            return None
+        scid, gcid = self.cluster_of(start), self.cluster_of(goal)
+        sdist, spred = self._search(start)
+        gdist, gpred = self._search(goal)
+        if scid == gcid and goal in sdist:
+            return self._unwind(spred, start, goal)
+
+        # A* abstrait sur les entrées; start (relié aux entrées de son cluster
+        # par sdist) et goal (par gdist) y sont insérés le temps de la requête
+        start_links = {n: d for n, d in sdist.items() if n in self._cluster(scid)[0] and n != start}
+        goal_links = {n: d for n, d in gdist.items() if n in self._cluster(gcid)[0]}
+        open_set = [(_octile(start, goal), 0.0, start)]
+        g_score = {start: 0.0}
+        came_from = {}
+        best_goal = None
+        best_cost = 1e18
+        while open_set:
+            f, g, node = heapq.heappop(open_set)
+            if f >= best_cost:
+                break
+            if g > g_score.get(node, 1e18):
+                continue
+            if node in goal_links and g + goal_links[node] < best_cost:
+                best_cost = g + goal_links[node]
+                best_goal = node
+            for other in self._cluster(self.cluster_of(node))[0].get(node, ()):
+                cost = 1.0 if (other[0] == node[0] or other[1] == node[1]) else DIAG_COST
+                self._relax(node, other, g + cost, goal, g_score, came_from, open_set)
+            links = start_links if node == start else self._links(node)
+            for other, cost in links.items():
+                self._relax(node, other, g + cost, goal, g_score, came_from, open_set)
+        if best_goal is None:
+            return []
+
+        # Raffinement: remonter la route abstraite puis déplier chaque segment
+        nodes = [best_goal]
+        while nodes[-1] != start:
+            nodes.append(came_from[nodes[-1]])
+        nodes.reverse()
+        path = []
+        for a, b in zip(nodes, nodes[1:]):
+            if self.cluster_of(a) != self.cluster_of(b):
+                path.append(b)
+            elif a == start:
+                path.extend(self._unwind(spred, start, b))
+            else:
+                path.extend(self._unwind(self._search(a)[1], a, b))
+        # Dernier segment: les prédécesseurs depuis goal mènent de best_goal vers goal
+        cur = best_goal
+        while cur != goal:
+            cur = gpred[cur]
+            path.append(cur)
+        return path
+
+    @staticmethod
+    def _relax(node, other, new_g, goal, g_score, came_from, open_set):
+        if new_g < g_score.get(other, 1e18):
+            g_score[other] = new_g
+            came_from[other] = node
+            heapq.heappush(open_set, (new_g + _octile(other, goal), new_g, other))
+
+    @staticmethod
+    def _unwind(pred, source, target):
+        """Chemin source → target (source exclu) d'après les prédécesseurs depuis source."""
+        path = []
+        cur = target
+        while cur != source:
+            path.append(cur)
+            cur = pred[cur]
+        path.reverse()
+        return path
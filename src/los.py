@@ -0,0 +1,122 @@
+"""Ligne de vue: les obstacles (case 1, voir maps.py) bloquent tirs et sorts.
+
+Une case B est visible depuis A si aucune case du segment de Bresenham entre
+leurs centres (extrémités exclues) n'est un obstacle. Murs, remparts et
+portes ne bloquent pas la vue (on tire depuis et vers les remparts), les
+unités non plus. Les unités multi-cases voient et sont vues depuis leur case
+d'ancrage (unit.position), comme pour les distances de portée.
+
+Coût:
+  - les rayons ne dépendent que du décalage (dx, dy): ils sont tracés une
+    fois par portée (rays_within, tables partagées par le module) puis
+    convertis en décalages d'indices plats (x * height + y) pour la grille;
+  - LineOfSight (battlefield.los) garde la visibilité par paire de cases,
+    dans un ordre canonique (la vue est symétrique). Le cache est vidé à
+    chaque round (new_round) et quand battlefield.grid_version change (case
+    modifiée, mur de force).
+
+Le balayage de cibles d'un tireur reste donc une lecture de dict par ennemi
+à portée; le premier test d'une paire coûte un rayon de quelques cases.
+"""
+
+OBSTACLE = 1  # Seul type de case opaque (battlefield.OBSTACLE)
+
+# Rayons par décalage (dx, dy): cases intermédiaires (ox, oy), extrémités exclues
+_RAYS = {}
+# Portées déjà tracées en entier par rays_within
+_RANGES = set()
+
+
+def _trace(dx, dy):
+    """Cases intermédiaires du segment de Bresenham de (0, 0) à (dx, dy)."""
+    sx = 1 if dx > 0 else -1
+    sy = 1 if dy > 0 else -1
+    ax, ay = abs(dx), abs(dy)
+    x = y = 0
+    cells = []
+    if ax >= ay:
+        err = ax // 2
+        for _ in range(ax - 1):
+            x += sx
+            err -= ay
+            if err < 0:
+                y += sy
+                err += ax
+            cells.append((x, y))
+    else:
+        err = ay // 2
+        for _ in range(ay - 1):
+            y += sy
+            err -= ax
+            if err < 0:
+                x += sx
+                err += ay
+            cells.append((x, y))
+    return tuple(cells)
+
+
+def rays_within(radius):
+    """Trace (une fois) les rayons de tous les décalages à distance de Manhattan ≤ radius."""
+    if radius in _RANGES:
+        return _RAYS
+    for dx in range(-radius, radius + 1):
+        reach = radius - abs(dx)
+        for dy in range(-reach, reach + 1):
+            if (dx, dy) not in _RAYS:
+                _RAYS[(dx, dy)] = _trace(dx, dy)
+    _RANGES.add(radius)
+    return _RAYS
+
+
+class LineOfSight:
+    """Visibilité entre cases, mémorisée pour le round et la version de grille."""
+
+    def __init__(self, bf):
+        self.bf = bf
+        self._cache = {}
+        self._version = bf.grid_version
+        # Rayons en décalages d'indices plats, par (dx, dy)
+        self._flat = {}
+        self.tests = 0  # Rayons effectivement parcourus (hors cache)
+
+    def visible(self, a, b):
+        """True si b est visible depuis a (et réciproquement)."""
+        if a > b:
+            a, b = b, a
+        bf = self.bf
+        if self._version != bf.grid_version:
+            self._cache.clear()
+            self._version = bf.grid_version
+        key = (a, b)
+        seen = self._cache.get(key)
+        if seen is not None:
+            return seen
+        ax, ay = a
+        dx, dy = b[0] - ax, b[1] - ay
+        offsets = self._flat.get((dx, dy))
+        if offsets is None:
+            ray = _RAYS.get((dx, dy))
+            if ray is None:
+                ray = rays_within(abs(dx) + abs(dy))[(dx, dy)]
+            height = bf.height
+            offsets = self._flat[(dx, dy)] = tuple(ox * height + oy for ox, oy in ray)
+        cells = bf.cells
+        base = ax * bf.height + ay
+        seen = True
+        for d in offsets:
+            if cells[base + d] == OBSTACLE:
+                seen = False
+                break
+        self._cache[key] = seen
+        self.tests += 1
+        if bf.stats is not None:
+            bf.stats.count('los_tests')
+        return seen
+
+    def new_round(self):
+        """Oublie les paires du round écoulé (les positions ont changé)."""
+        self._cache.clear()
+
+    def clear(self):
+        self._cache.clear()
+        self._version = self.bf.grid_version
@@ -1,3 +1,5 @@
+import sys
+
 import pygame
 
 from unit_library import list_armies, list_units
@@ -9,6 +11,14 @@ from menu import run_army_menu
 def main():
     pygame.init()
     
+    # python main.py --replay fichier.orbr : relire une bataille enregistrée
+    if len(sys.argv) >= 3 and sys.argv[1] == "--replay":
+        from replay import ReplayPlayer
+        player = ReplayPlayer(sys.argv[2])
+        cell_size = compute_grid_from_screen()[2]
+        run_visual(player, cell_size)
+        return
+    
     print("=== Armées disponibles ===")
     for name in list_armies():
         units = list_units(name)
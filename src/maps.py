@@ -56,18 +56,18 @@ def get_map_info(name):
 #                      GÉNÉRATEURS
 # ═══════════════════════════════════════════════════════════════
 
-def generate_prairie(width, height):
+def generate_prairie(width, height, rng=random):
     """Prairie: 3-5 petits obstacles éparpillés."""
     grid = [[0] * height for _ in range(width)]
-    count = random.randint(3, 5)
+    count = rng.randint(3, 5)
     obstacles = []
     margin_x = width // 4
     
     for _ in range(count * 30):
         if len(obstacles) >= count:
             break
-        x = random.randint(margin_x, width - margin_x - 1)
-        y = random.randint(3, height - 4)
+        x = rng.randint(margin_x, width - margin_x - 1)
+        y = rng.randint(3, height - 4)
         if grid[x][y] == 0 and all(abs(x-ox)+abs(y-oy) > 8 for ox,oy in obstacles):
             grid[x][y] = 1
             obstacles.append((x, y))
@@ -75,7 +75,7 @@ def generate_prairie(width, height):
     return grid, {}
 
 
-def generate_forest(width, height):
+def generate_forest(width, height, rng=random):
     """Forêt: dense avec de nombreux clusters d'arbres."""
     grid = [[0] * height for _ in range(width)]
     
@@ -83,15 +83,15 @@ def generate_forest(width, height):
     mid_x = width // 2
     
     # Placer de nombreux clusters d'arbres
-    num_clusters = random.randint(12, 20)
+    num_clusters = rng.randint(12, 20)
     for _ in range(num_clusters):
-        cx = random.randint(5, width - 6)
-        cy = random.randint(3, height - 4)
-        cluster_size = random.randint(4, 10)
+        cx = rng.randint(5, width - 6)
+        cy = rng.randint(3, height - 4)
+        cluster_size = rng.randint(4, 10)
         
         for _ in range(cluster_size):
-            ox = cx + random.randint(-3, 3)
-            oy = cy + random.randint(-3, 3)
+            ox = cx + rng.randint(-3, 3)
+            oy = cy + rng.randint(-3, 3)
             if 0 < ox < width - 1 and 0 < oy < height - 1:
                 # Laisser un couloir central libre (±3 cases)
                 if abs(ox - mid_x) > 4:
@@ -100,21 +100,21 @@ def generate_forest(width, height):
     return grid, {}
 
 
-def generate_village(width, height):
+def generate_village(width, height, rng=random):
     """Village avec de nombreux bâtiments."""
     grid = [[0] * height for _ in range(width)]
     
     # Placer 8-14 bâtiments sur toute la carte
-    num_buildings = random.randint(8, 14)
+    num_buildings = rng.randint(8, 14)
     buildings = []
     
     for _ in range(num_buildings * 30):
         if len(buildings) >= num_buildings:
             break
-        bw = random.randint(2, 5)
-        bh = random.randint(2, 4)
-        bx = random.randint(5, width - 6 - bw)
-        by = random.randint(3, height - 4 - bh)
+        bw = rng.randint(2, 5)
+        bh = rng.randint(2, 4)
+        bx = rng.randint(5, width - 6 - bw)
+        by = rng.randint(3, height - 4 - bh)
         
         overlap = False
         for (ox, oy, ow, oh) in buildings:
@@ -133,7 +133,7 @@ def generate_village(width, height):
     return grid, {}
 
 
-def generate_siege(width, height):
+def generate_siege(width, height, rng=random):
     """Siège: mur vertical avec une porte de 6 cases, remparts et escaliers."""
     grid = [[0] * height for _ in range(width)]
     
@@ -185,8 +185,8 @@ def generate_siege(width, height):
     
     # Quelques obstacles devant le mur (côté attaquant)
     for _ in range(3):
-        ox = random.randint(width // 4, wall_x - 5)
-        oy = random.randint(3, height - 4)
+        ox = rng.randint(width // 4, wall_x - 5)
+        oy = rng.randint(3, height - 4)
         if grid[ox][oy] == 0:
             grid[ox][oy] = 1
     
@@ -207,9 +207,11 @@ def generate_siege(width, height):
 #                    FONCTION PRINCIPALE
 # ═══════════════════════════════════════════════════════════════
 
-def generate_map(map_name, width, height):
+def generate_map(map_name, width, height, rng=random):
     """Génère la grille et les données spéciales pour un type de map.
     
+    rng: générateur aléatoire (random.Random) — même graine = même carte.
+    
     Retourne (grid, map_data) où:
         grid: [[int]] — grille 2D (0=vide, 1=obstacle, 2=mur, 3=porte)
         map_data: dict — données spéciales (siege_data, etc.)
@@ -222,4 +224,4 @@ def generate_map(map_name, width, height):
     }
     
     gen = generators.get(map_name, generate_prairie)
-    return gen(width, height)
\ No newline at end of file
+    return gen(width, height, rng)
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""Simulations Monte Carlo de confrontations entre deux armées.
+
+Lance de nombreuses batailles headless indépendantes sur tous les cœurs
+(ProcessPoolExecutor) et agrège les rapports de bataille.
+
+Les workers reçoivent des spécifications d'armée compactes, pas des objets Unit:
+    ("Armée Skaldienne", [("Infanterie régulière", 10), ("Officier", 1)])
+ou une liste de telles paires pour une armée multi-factions.
+
+Chaque bataille i reçoit la graine seed + i: un lot est reproductible bit à bit,
+quel que soit le nombre de workers ou l'ordonnancement.
+
+replay_dir: chaque bataille est enregistrée dans replay_dir/battle_<seed>.orbr
+(voir replay.py), pour être revue plus tard avec main.py --replay.
+
+Usage en ligne de commande:
+    python matchup.py "Armée Skaldienne:Infanterie régulière=20,Officier=1" \\
+                      "Armée Orlandar:Fantassin covaliir=20" -m Forêt -n 500
+"""
+
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_WIDTH = 80    # Taille minimale produite par compute_grid_from_screen
+DEFAULT_HEIGHT = 50
+MAX_ROUNDS = 500      # Au-delà, la bataille est comptée comme non terminée
+
+
+def normalize_spec(spec):
+    """Normalise une spec d'armée en tuple de (army_name, ((unit_name, count), ...)).
+
+    Accepte une paire (army_name, composition) ou une liste de paires.
+    """
+    if isinstance(spec[0], str):
+        spec = [spec]
+    return tuple((army_name, tuple((name, int(count)) for name, count in comp))
+                 for army_name, comp in spec)
+
+
+def build_from_spec(spec):
+    """Construit la liste d'unités d'une spec normalisée."""
+    from unit_library import build_army
+    units = []
+    for army_name, comp in spec:
+        units.extend(build_army(army_name, list(comp)))
+    return units
+
+
+def _run_batch(job):
+    """Exécute un lot de batailles dans un worker. Retourne des résultats compacts."""
+    army1_spec, army2_spec, map_name, width, height, max_rounds, seeds, replay_dir = job
+    from battle import Battle
+
+    results = []
+    for seed in seeds:
+        battle = Battle(build_from_spec(army1_spec), build_from_spec(army2_spec),
+                        width, height, 8, map_name=map_name, headless=True, seed=seed,
+                        record=replay_dir is not None, copy_armies=False)
+        while not battle.is_battle_over() and battle.round <= max_rounds:
+            battle.simulate_round()
+        if replay_dir is not None:
+            battle.save_replay(os.path.join(replay_dir, f"battle_{seed}.orbr"))
+        report = battle.get_battle_report()
+        results.append((
+            report['winner'], report['rounds'],
+            report['army1']['dead_count'], report['army1']['fled_count'],
+            report['army2']['dead_count'], report['army2']['fled_count'],
+        ))
+    return results
+
+
+def _split_jobs(n_battles, workers):
+    """Découpe n_battles en lots (≈4 lots par worker pour équilibrer la charge)."""
+    n_chunks = max(1, min(n_battles, workers * 4))
+    base, extra = divmod(n_battles, n_chunks)
+    return [base + (1 if i < extra else 0) for i in range(n_chunks)]
+
+
+def simulate_matchup(army1_spec, army2_spec, map_name="Prairie", n_battles=100, workers=None,
+                     width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, max_rounds=MAX_ROUNDS, seed=None,
+                     replay_dir=None):
+    """Simule n_battles batailles et retourne les statistiques agrégées.
+
+    workers=None utilise tous les cœurs; workers=1 exécute tout dans le processus courant.
+    seed: graine de base (bataille i = seed + i); None = tirée au hasard.
+    replay_dir: dossier où enregistrer le replay de chaque bataille (None = aucun).
+
+    Retourne un dict:
+        seed, battles, wins_army1, wins_army2, draws, unfinished,
+        win_rate_army1, win_rate_army2, draw_rate, avg_rounds,
+        army1/army2: {'avg_dead', 'avg_fled', 'avg_casualties'}
+    """
+    army1_spec = normalize_spec(army1_spec)
+    army2_spec = normalize_spec(army2_spec)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, workers)
+
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if replay_dir is not None:
+        os.makedirs(replay_dir, exist_ok=True)
+
+    jobs = []
+    start = seed
+    for count in _split_jobs(n_battles, workers):
+        if count > 0:
+            jobs.append((army1_spec, army2_spec, map_name, width, height, max_rounds,
+                         tuple(range(start, start + count)), replay_dir))
+            start += count
+
+    results = []
+    if workers == 1:
+        for job in jobs:
+            results.extend(_run_batch(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch in pool.map(_run_batch, jobs):
+                results.extend(batch)
+
+    stats = _aggregate(results)
+    stats['seed'] = seed
+    return stats
+
+
+def _aggregate(results):
+    n = len(results)
+    wins1 = sum(1 for r in results if r[0] == "Armée 1")
+    wins2 = sum(1 for r in results if r[0] == "Armée 2")
+    draws = sum(1 for r in results if r[0] == "Égalité")
+    div = max(1, n)
+
+    def side(dead_idx, fled_idx):
+        dead = sum(r[dead_idx] for r in results) / div
+        fled = sum(r[fled_idx] for r in results) / div
+        return {'avg_dead': dead, 'avg_fled': fled, 'avg_casualties': dead + fled}
+
+    return {
+        'battles': n,
+        'wins_army1': wins1,
+        'wins_army2': wins2,
+        'draws': draws,
+        'unfinished': n - wins1 - wins2 - draws,
+        'win_rate_army1': wins1 / div,
+        'win_rate_army2': wins2 / div,
+        'draw_rate': draws / div,
+        'avg_rounds': sum(r[1] for r in results) / div,
+        'army1': side(2, 3),
+        'army2': side(4, 5),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+#                     LIGNE DE COMMANDE
+# ═══════════════════════════════════════════════════════════════
+
+def parse_spec(text):
+    """Parse "Armée:Unité=N,Unité=N[;Armée:Unité=N]" en spec d'armée."""
+    spec = []
+    for faction in text.split(";"):
+        faction = faction.strip()
+        if not faction:
+            continue
+        army_name, _, units = faction.partition(":")
+        comp = []
+        for item in units.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            name, _, count = item.rpartition("=")
+            if not name:
+                name, count = count, "1"
+            comp.append((name.strip(), int(count)))
+        spec.append((army_name.strip(), comp))
+    return spec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation Monte Carlo d'une confrontation.")
+    parser.add_argument("army1", help='Armée 1: "Armée:Unité=N,Unité=N[;Armée:...]"')
+    parser.add_argument("army2", help="Armée 2 (même format)")
+    parser.add_argument("-m", "--map", default="Prairie", help="Carte (Prairie, Forêt, Village, Siège)")
+    parser.add_argument("-n", "--battles", type=int, default=100, help="Nombre de batailles")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Processus (défaut: tous les cœurs)")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_HEIGHT)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    parser.add_argument("-s", "--seed", type=int, default=None, help="Graine de base (reproductibilité)")
+    parser.add_argument("--replay-dir", default=None, help="Dossier où enregistrer les replays")
+    args = parser.parse_args(argv)
+
+    stats = simulate_matchup(parse_spec(args.army1), parse_spec(args.army2), args.map,
+                             args.battles, args.workers, args.width, args.height, args.max_rounds,
+                             args.seed, args.replay_dir)
+
+    print(f"=== {stats['battles']} batailles sur {args.map} (seed {stats['seed']}) ===")
+    print(f"Victoires Armée 1: {stats['win_rate_army1']:6.1%}  ({stats['wins_army1']})")
+    print(f"Victoires Armée 2: {stats['win_rate_army2']:6.1%}  ({stats['wins_army2']})")
+    print(f"Égalités:          {stats['draw_rate']:6.1%}  ({stats['draws']})")
+    if stats['unfinished']:
+        print(f"Non terminées:     {stats['unfinished']}")
+    print(f"Rounds moyens:     {stats['avg_rounds']:.1f}")
+    for key, label in (('army1', "Armée 1"), ('army2', "Armée 2")):
+        s = stats[key]
+        print(f"Pertes {label}: {s['avg_dead']:.1f} morts, {s['avg_fled']:.1f} fuyants")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Permet de sélectionner une faction et composer chaque armée
 avant de lancer la bataille.
 """
 
+import copy
 import pygame
 import sys
 
@@ -148,6 +149,20 @@ def run_army_menu(screen_w=None, screen_h=None):
             
             # Appliquer les bonus globaux
             b = self.bonuses
+            boosted = {}  # id(arme partagée du gabarit) → copie avec bonus
+            
+            def boost(arme):
+                arme = copy.copy(arme)
+                if b["toucher"] != 0:
+                    arme.toucher = max(2, arme.toucher + b["toucher"])
+                if b["blesser"] != 0:
+                    arme.blesser = max(2, arme.blesser + b["blesser"])
+                if b["perforation"] != 0:
+                    arme.perforation = arme.perforation + b["perforation"]
+                if b["degats"] != 0:
+                    arme._bonus = arme._bonus + b["degats"]
+                return arme
+            
             for u in all_units:
                 if b["mouvement"] != 0:
                     u.vitesse = max(0, u.vitesse + b["mouvement"])
@@ -164,15 +179,12 @@ def run_army_menu(screen_w=None, screen_h=None):
                 if b["sauvegarde"] != 0:
                     u.sauvegarde = max(2, min(7, u.sauvegarde + b["sauvegarde"]))
                 if b["toucher"] != 0 or b["blesser"] != 0 or b["perforation"] != 0 or b["degats"] != 0:
+                    # Les armes sont partagées par le gabarit: copie à l'écriture
                     for arme in u.armes:
-                        if b["toucher"] != 0:
-                            arme.toucher = max(2, arme.toucher + b["toucher"])
-                        if b["blesser"] != 0:
-                            arme.blesser = max(2, arme.blesser + b["blesser"])
-                        if b["perforation"] != 0:
-                            arme.perforation = arme.perforation + b["perforation"]
-                        if b["degats"] != 0:
-                            arme._bonus = arme._bonus + b["degats"]
+                        if id(arme) not in boosted:
+                            boosted[id(arme)] = boost(arme)
+                    u.armes = [boosted[id(arme)] for arme in u.armes]
+                    u.attacks = u.armes
             
             return all_units
     
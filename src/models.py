@@ -2,6 +2,12 @@ import random
 
 
 class Arme:
+    # Les armes sont partagées entre les unités d'un même gabarit (unit_library.UnitTemplate):
+    # ne jamais les modifier en place, copier d'abord (voir menu.ArmyState.build).
+    __slots__ = ('name', 'nb_attaque', 'toucher', 'blesser', 'perforation', 'degats',
+                 'porte', 'range', 'special', '_bonus', '_nb_des', '_faces', '_is_dice',
+                 '_fixed_damage')
+    
     def __init__(self, name, nb_attaque, toucher, blesser, perforation, degats, porte=1, special=None):
         self.name = name
         self.nb_attaque = nb_attaque
@@ -14,6 +20,7 @@ class Arme:
         self.special = special or {}
         
         self._bonus = 0
+        self._fixed_damage = 0
         degats_str = str(degats).lower().strip()
         
         if '+' in degats_str and 'd' in degats_str:
@@ -41,9 +48,9 @@ class Arme:
             except (ValueError, TypeError):
                 self._fixed_damage = 1
     
-    def lancer_degats(self):
+    def lancer_degats(self, rng=random):
         if self._is_dice:
-            return self._bonus + sum(random.randint(1, self._faces) for _ in range(self._nb_des))
+            return self._bonus + sum(rng.randint(1, self._faces) for _ in range(self._nb_des))
         return self._fixed_damage
 
 
@@ -61,6 +68,8 @@ class Spell:
         cooldown    : int   — rounds de recharge (0 = chaque round)
         _cd_timer   : int   — compteur interne de cooldown
     """
+    __slots__ = ('name', 'spell_type', 'porte', 'cooldown', '_cd_timer')
+    
     def __init__(self, name, spell_type, porte=9, cooldown=0):
         self.name = name
         self.spell_type = spell_type
@@ -81,6 +90,9 @@ class Spell:
 
 class SpellFireball(Spell):
     """Boule de feu — AoE 3×3, dégâts + toucher/blesser/perforation."""
+    __slots__ = ('toucher', 'blesser', 'perforation', 'degats', 'aoe_size',
+                 '_bonus', '_nb_des', '_faces', '_is_dice', '_fixed')
+    
     def __init__(self, porte=9, toucher=3, blesser=1, perforation=-2,
                  degats="1d4", aoe_size=3, cooldown=2):
         super().__init__("Boule de feu", "fireball", porte, cooldown)
@@ -96,6 +108,7 @@ class SpellFireball(Spell):
     def _parse_degats(self, degats):
         s = str(degats).lower().strip()
         self._bonus = 0
+        self._nb_des = self._faces = self._fixed = 0
         if '+' in s and 'd' in s:
             parts = s.split('+')
             self._bonus = int(parts[0])
@@ -110,20 +123,24 @@ class SpellFireball(Spell):
             self._is_dice = False
             self._fixed = int(float(s))
     
-    def lancer_degats(self):
+    def lancer_degats(self, rng=random):
         if self._is_dice:
-            return self._bonus + sum(random.randint(1, self._faces) for _ in range(self._nb_des))
+            return self._bonus + sum(rng.randint(1, self._faces) for _ in range(self._nb_des))
         return self._fixed
 
 
 class SpellHeal(Spell):
     """Sort de soin — soigne totalement une unité alliée."""
+    __slots__ = ()
+    
     def __init__(self, porte=6, cooldown=3):
         super().__init__("Soin", "heal", porte, cooldown)
 
 
 class SpellMagicArmor(Spell):
     """Armure magique — +2 de sauvegarde à une unité (temporaire, dure X rounds)."""
+    __slots__ = ('bonus', 'duration')
+    
     def __init__(self, porte=4, bonus=2, duration=3, cooldown=4):
         super().__init__("Armure magique", "armor", porte, cooldown)
         self.bonus = bonus        # Bonus de sauvegarde
@@ -132,6 +149,8 @@ class SpellMagicArmor(Spell):
 
 class SpellMagicProjectile(Spell):
     """Projectile magique — cible unique, longue portée, 3d2 dégâts."""
+    __slots__ = ('toucher', 'blesser', 'degats', '_bonus', '_nb_des', '_faces', '_is_dice', '_fixed')
+    
     def __init__(self, porte=15, toucher=3, blesser=1, degats="3d2", cooldown=1):
         super().__init__("Projectile magique", "projectile", porte, cooldown)
         self.toucher = toucher
@@ -140,6 +159,7 @@ class SpellMagicProjectile(Spell):
         
         s = str(degats).lower().strip()
         self._bonus = 0
+        self._nb_des = self._faces = self._fixed = 0
         if '+' in s and 'd' in s:
             parts = s.split('+')
             self._bonus = int(parts[0])
@@ -154,14 +174,16 @@ class SpellMagicProjectile(Spell):
             self._is_dice = False
             self._fixed = int(float(s))
     
-    def lancer_degats(self):
+    def lancer_degats(self, rng=random):
         if self._is_dice:
-            return self._bonus + sum(random.randint(1, self._faces) for _ in range(self._nb_des))
+            return self._bonus + sum(rng.randint(1, self._faces) for _ in range(self._nb_des))
         return self._fixed
 
 
 class SpellWall(Spell):
     """Mur de force — crée 3 obstacles devant les ennemis les plus proches."""
+    __slots__ = ('nb_obstacles', 'wall_duration')
+    
     def __init__(self, porte=8, nb_obstacles=3, wall_duration=5, cooldown=5):
         super().__init__("Mur de force", "wall", porte, cooldown)
         self.nb_obstacles = nb_obstacles
@@ -0,0 +1,305 @@
+"""Planification parallèle et déterministe de la passe d'approche.
+
+Activée par Battle(parallel=n) (n processus), exposée dans battle.parallel.
+Dans la passe 3 de simulate_round, chaque unité en approche appelle
+compute_move avec les réservations des unités traitées avant elle (du fond
+vers l'avant): le résultat d'une unité dépend de celui des précédentes, la
+passe est séquentielle.
+
+Avec parallel, les déplacements sont d'abord calculés *par spéculation*:
+
+  - au début de la passe, n processus sont créés par fork: chacun voit
+    l'état du round (grille, unités, caches) tel quel, en lecture seule, et
+    prend un bloc contigu de la passe (unités voisines dans l'ordre du fond
+    vers l'avant, donc souvent voisines sur la carte). Il y rejoue la passe
+    comme le calcul séquentiel (compute_move puis Battle._approach_commit),
+    à partir des réservations des passes 1 et 2: seules celles des blocs
+    précédents lui manquent;
+  - chaque calcul note ce qu'il a lu: les cases dont il a testé la
+    réservation, avec la réponse (_ReadSet), les entrées du cache de chemins
+    consultées ou ajoutées (_CacheLog) et les champs de flux demandés
+    (_FlowLog: un champ fige ses cases objectif à sa création, il doit
+    naître au même moment que dans le calcul séquentiel);
+  - la passe 3 reste séquentielle, dans le même ordre: le résultat spéculé
+    d'une unité est retenu si chaque case lue donne la même réponse contre
+    les vraies réservations et si le cache de chemins donne les mêmes
+    chemins (ses opérations sont alors rejouées sur le cache réel). Sinon
+    compute_move est rappelé comme sans parallel.
+
+Un résultat retenu est donc celui que le calcul séquentiel aurait donné: les
+batailles sont identiques avec ou sans parallel, quel que soit n. Seules les
+unités en conflit sont recalculées (compteurs parallel_planned et
+parallel_replanned dans battle.stats, totaux dans le planificateur).
+
+Coût: le fork par round est fixe (quelques ms par processus) et la
+journalisation des lectures rend chaque compute_move spéculé environ 1,5 fois
+plus lent qu'en séquentiel. Le mode ne paie donc qu'avec beaucoup d'unités en
+approche (PARALLEL_MIN_UNITS) et plusieurs cœurs libres; il rapporte le plus
+quand les blocs se gênent peu (armées encore séparées, sièges), moins dans la
+mêlée dense où beaucoup de résultats sont recalculés. Sans fork (Windows), la
+passe reste séquentielle.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pathcache import SUFFIX_KEYS
+
+PARALLEL_MIN_UNITS = 64     # En dessous, le fork coûte plus qu'il ne rapporte
+
+# État du round, hérité par les processus au fork (jamais sérialisé)
+_JOB = None
+
+
+class _ReadSet(set):
+    """Copie des réservations qui note les cases testées (in) par compute_move."""
+
+    __slots__ = ('hits', 'misses', 'opaque')
+
+    def __init__(self, cells):
+        super().__init__(cells)
+        self.hits = set()       # Cases lues réservées
+        self.misses = set()     # Cases lues libres
+        self.opaque = False     # Parcouru en entier (dépend de toutes les cases)
+
+    def __contains__(self, cell):
+        if set.__contains__(self, cell):
+            self.hits.add(cell)
+            return True
+        self.misses.add(cell)
+        return False
+
+    def __iter__(self):
+        self.opaque = True
+        return set.__iter__(self)
+
+
+class _CacheLog:
+    """PathCache en lecture seule: les écritures vont dans un calque, tout est journalisé.
+
+    Le calque est gardé pour tout le bloc; ops (remis à zéro par unité):
+    ('get', clé, chemin vu ou None, args) / ('put', clé, None, args), rejoués
+    dans l'ordre sur le vrai cache si le résultat est retenu.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.overlay = {}   # clé → chemin (None: entrée supprimée)
+        self.ops = []
+
+    def _entry(self, key):
+        if key in self.overlay:
+            return self.overlay[key]
+        return self.cache.entries.get(key)
+
+    def get(self, start, goal, footprint, army, version, blocked):
+        key = (start, goal, footprint, army, version)
+        path = self._entry(key)
+        self.ops.append(('get', key, path, key))
+        if path is None:
+            return None
+        if blocked:
+            for cell in path:
+                if cell in blocked:
+                    self.overlay[key] = None
+                    return None
+        return list(path)
+
+    def put(self, start, goal, footprint, army, version, path):
+        path = tuple(path)
+        key = (start, goal, footprint, army, version)
+        self.ops.append(('put', key, None, key + (path,)))
+        self.overlay[key] = path
+        for i in range(min(SUFFIX_KEYS, len(path) - 1)):
+            skey = (path[i], goal, footprint, army, version)
+            if self._entry(skey) is None:
+                self.overlay[skey] = path[i + 1:]
+
+
+class _FlowLog:
+    """FlowFieldCache qui note les champs demandés, avec leurs objectifs s'ils sont neufs.
+
+    Les champs existants sont notés aussi: FlowFieldCache.new_round oublie
+    ceux qui n'ont pas servi pendant le round. Un champ créé dans le bloc
+    garde ses objectifs pour les unités suivantes: si l'unité qui l'a créé
+    est recalculée sans lui, c'est le rejeu d'une suivante qui le crée.
+    """
+
+    def __init__(self, flow, known):
+        self.flow = flow
+        self.known = known  # Clés des champs valides au fork
+        self.created = {}   # clé → objectifs des champs créés dans le bloc
+        self.ops = []
+
+    def get(self, key, goals):
+        if key in self.known:
+            self.ops.append((key, ()))
+        else:
+            if key not in self.created:
+                self.created[key] = list(goals)
+            goals = self.created[key]
+            self.ops.append((key, goals))
+        return self.flow.get(key, goals)
+
+
+def _partition(units, n, height):
+    """n blocs d'indices de units (ordre de la passe conservé dans chaque bloc).
+
+    Un bloc par armée, puis par bande horizontale de la carte: les unités
+    d'un même bloc se disputent les mêmes cases, celles de blocs différents
+    rarement (les armées en approche sont encore loin l'une de l'autre).
+    """
+    bands = max(1, n // 2)
+    blocks = {}
+    for i, unit in enumerate(units):
+        key = (unit._army_key, min(bands - 1, unit.position[1] * bands // height))
+        blocks.setdefault(key, []).append(i)
+    return sorted(blocks.values())
+
+
+def _plan_chunk(k):
+    """Processus k: passe 3 spéculée sur le bloc k.
+
+    Un même processus peut recevoir plusieurs blocs: chacun repart des
+    réservations, du cache de chemins et des champs de flux connus au fork.
+    """
+    battle, units, speeds, reserved, known, blocks = _JOB
+    bf = battle.battlefield
+    bf.stats = None
+    reserved = set(reserved)
+    cache = bf.path_cache
+    log = bf.path_cache = _CacheLog(cache)
+    try:
+        return _plan_block(battle, units, speeds, reserved, known, blocks[k], log)
+    finally:
+        bf.path_cache = cache
+
+
+def _plan_block(battle, units, speeds, reserved, known, block, log):
+    """Résultats spéculés des unités d'indices block (voir _plan_chunk)."""
+    bf = battle.battlefield
+    flow = bf.flow
+    flow_log = _FlowLog(flow, known)
+    results = []
+    for i in block:
+        unit = units[i]
+        reads = _ReadSet(reserved)
+        log.ops = []
+        flow_log.ops = []
+        bf.flow = flow_log
+        orig_speed = unit.vitesse
+        unit.vitesse = speeds[i]
+        try:
+            new_pos, target = bf.compute_move(unit, battle, reads)
+            bf.flow = flow
+            # Réservations comme dans la passe séquentielle, pour les unités suivantes du bloc
+            battle._approach_commit(unit, new_pos, target, reserved, {}, [])
+        finally:
+            unit.vitesse = orig_speed
+            bf.flow = flow
+        target_id = None if target is None else (target._army_key, target._roster_idx)
+        # Vue complète des réservations si compute_move l'a parcourue en entier
+        view = frozenset(reads) if reads.opaque else None
+        results.append((i, new_pos, target_id, frozenset(reads.hits), frozenset(reads.misses),
+                        view, log.ops, flow_log.ops))
+    return results
+
+
+class ParallelPlanner:
+    """Déplacements spéculés en n processus, validés dans l'ordre de la passe."""
+
+    def __init__(self, workers, min_units=PARALLEL_MIN_UNITS):
+        self.workers = max(1, workers)
+        self.min_units = min_units
+        self.planned = 0        # Résultats spéculés retenus (total de la bataille)
+        self.replanned = 0      # Résultats rejetés, recalculés séquentiellement
+        self.enabled = 'fork' in multiprocessing.get_all_start_methods()
+        self._results = {}
+
+    def plan(self, battle, units, speeds, reserved):
+        """Spécule compute_move pour units (vitesses effectives speeds) contre reserved."""
+        global _JOB
+        self._results = {}
+        if not self.enabled or len(units) < self.min_units:
+            return
+        bf = battle.battlefield
+        blocks = _partition(units, self.workers, bf.height)
+        n = len(blocks)
+        flow = bf.flow
+        # Champs d'une grille périmée: le premier get du processus vide le cache
+        known = set(flow.fields) if flow._version == bf.grid_version else set()
+        _JOB = (battle, units, speeds, set(reserved), known, blocks)
+        try:
+            ctx = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=n, mp_context=ctx) as pool:
+                chunks = list(pool.map(_plan_chunk, range(n)))
+        except (OSError, BrokenProcessPool):
+            # Processus impossibles à créer: la passe reste séquentielle
+            self.enabled = False
+            return
+        finally:
+            _JOB = None
+        rosters = {1: battle.army1_roster, 2: battle.army2_roster}
+        for chunk in chunks:
+            for i, new_pos, target_id, *logs in chunk:
+                target = None if target_id is None else rosters[target_id[0]][target_id[1]]
+                self._results[units[i]] = (new_pos, target, *logs)
+
+    def take(self, bf, unit, reserved):
+        """(new_pos, cible) spéculés pour unit s'ils sont encore exacts, sinon None."""
+        result = self._results.pop(unit, None)
+        if result is None:
+            return None
+        new_pos, target, hits, misses, view, ops, flow_ops = result
+        if (view is not None and view != reserved) or not hits <= reserved \
+                or not misses.isdisjoint(reserved):
+            self.replanned += 1
+            return None
+        if ops and not self._replay(bf.path_cache, ops, reserved):
+            self.replanned += 1
+            return None
+        for key, goals in flow_ops:
+            bf.flow.get(key, goals)
+        self.planned += 1
+        return new_pos, target
+
+    @staticmethod
+    def _replay(cache, ops, reserved):
+        """Rejoue ops sur cache si chaque lecture y trouve le chemin vu par le processus."""
+        entries = cache.entries
+        overlay = {}
+        size = len(entries)
+        evicting = False
+        for op, key, seen, args in ops:
+            if op == 'get':
+                if key in overlay:
+                    path = overlay[key]
+                else:
+                    # Une entrée d'origine a pu être évincée par un put précédent
+                    if evicting:
+                        return False
+                    path = entries.get(key)
+                if path != seen:
+                    return False
+                if path is not None and any(cell in reserved for cell in path):
+                    overlay[key] = None
+                    size -= 1
+            else:
+                path = args[-1]
+                for skey, spath in [(key, path)] + [
+                        ((path[i],) + key[1:], path[i + 1:])
+                        for i in range(min(SUFFIX_KEYS, len(path) - 1))]:
+                    known = overlay[skey] if skey in overlay else entries.get(skey)
+                    if known is None:
+                        size += 1
+                    if skey == key or known is None:
+                        overlay[skey] = spath
+                if size > cache.capacity:
+                    evicting = True
+        for op, key, seen, args in ops:
+            if op == 'get':
+                cache.get(*args, reserved)
+            else:
+                cache.put(*args)
+        return True
@@ -0,0 +1,84 @@
+"""Cache LRU des chemins A* (Battlefield.a_star_path).
+
+Clé: (départ, objectif, empreinte de l'unité, armée, battlefield.grid_version).
+La version de grille change dès qu'une case change de passabilité (murs
+temporaires posés ou expirés, porte détruite): les chemins calculés sur une
+ancienne grille ne sont plus jamais servis. L'armée fait partie de la clé:
+l'A* pénalise les cases alliées, un chemin d'une armée n'est pas celui que
+l'autre aurait calculé.
+
+La pénalité alliée reste celle du moment du calcul: un chemin resservi après
+que des alliés ont bougé contourne encore leurs anciennes cases (il reste
+valide, pas forcément optimal). Seules les réservations sont revérifiées.
+
+Un chemin en cache reste un chemin valide sur la grille, mais les réservations
+du round peuvent l'avoir bouché: il est revérifié en O(longueur) avant d'être
+resservi (et oublié sinon). Les suffixes d'un chemin sont aussi mémorisés: une
+unité qui a avancé sur son chemin le retrouve au round suivant.
+
+Les chemins vides (aucun chemin, ou recherche tronquée par max_nodes) ne sont
+pas mis en cache: ils dépendent des réservations du moment.
+"""
+
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 4096
+SUFFIX_KEYS = 8     # Positions de départ mémorisées le long d'un chemin calculé
+
+
+class PathCache:
+    """LRU (start, goal, footprint, army, version) → chemin (tuple de cases, départ exclu)."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0      # Trouvés mais bouchés par une réservation
+
+    def get(self, start, goal, footprint, army, version, blocked):
+        """Chemin en cache encore libre de blocked, ou None."""
+        key = (start, goal, footprint, army, version)
+        path = self.entries.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        if blocked:
+            for cell in path:
+                if cell in blocked:
+                    del self.entries[key]
+                    self.stale += 1
+                    self.misses += 1
+                    return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return list(path)
+
+    def put(self, start, goal, footprint, army, version, path):
+        """Mémorise path (et ses premiers suffixes) pour l'objectif goal."""
+        entries = self.entries
+        path = tuple(path)
+        key = (start, goal, footprint, army, version)
+        entries[key] = path
+        entries.move_to_end(key)
+        for i in range(min(SUFFIX_KEYS, len(path) - 1)):
+            key = (path[i], goal, footprint, army, version)
+            if key not in entries:
+                entries[key] = path[i + 1:]
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    # ─── Snapshot (Battle.snapshot / restore) ───
+
+    def state(self):
+        return OrderedDict(self.entries)
+
+    def set_state(self, state):
+        self.entries = OrderedDict(state)
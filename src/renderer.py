@@ -86,7 +86,7 @@ def build_grid_surface(battle, cell_size):
     for x in range(bf.width):
         for y in range(bf.height):
             r = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
-            cell = bf.grid[x][y]
+            cell = bf.cells[x * bf.height + y]
             
             if cell == 2:  # Mur
                 pygame.draw.rect(grid_surface, wall_color, r)
@@ -380,13 +380,11 @@ def run_visual(battle, cell_size):
     MOVE_ANIM_SPEED_FAST = 0.20     # Vitesse d'interpolation (mode rapide)
     round_ready = True  # True = on peut simuler un nouveau round
     
-    import copy
-    _original_army1 = copy.deepcopy(battle.army1_roster)
-    _original_army2 = copy.deepcopy(battle.army2_roster)
+    # R: retour à l'état initial (snapshot), ou relance de la lecture d'un replay
+    is_replay = hasattr(battle, 'restart')
+    start_snapshot = None if is_replay else battle.snapshot()
     _bf_w = battle.battlefield.width
     _bf_h = battle.battlefield.height
-    _obstacle_count = 8
-    _map_name = battle.map_name
     
     while running:
         now = pygame.time.get_ticks()
@@ -429,8 +427,10 @@ def run_visual(battle, cell_size):
                     running = False
                     _return_action = "menu"
                 elif event.key == pygame.K_r:
-                    from battle import Battle
-                    battle = Battle(_original_army1, _original_army2, _bf_w, _bf_h, _obstacle_count, map_name=_map_name)
+                    if is_replay:
+                        battle = battle.restart()
+                    else:
+                        battle.restore(start_snapshot)
                     grid_surface = build_grid_surface(battle, cell_size)
                     world_w = _bf_w * cell_size
                     world_h = _bf_h * cell_size
@@ -850,7 +850,7 @@ def run_visual(battle, cell_size):
         ctrl = tiny_font.render("ESPACE=Pause  ZQSD/Flèches=Caméra  F=Vite  N=Normal  R=Reset  T=Lignes  B=Bordure  M=Menu  ESC=Quit", True, (150, 170, 200))
         screen.blit(ctrl, (10, ly + 18))
         
-        size = tiny_font.render(f"Grille {bf_w}x{bf_h} | Cell {cell_size}px | FPS: {int(clock.get_fps())}", True, (120, 120, 120))
+        size = tiny_font.render(f"Grille {bf_w}x{bf_h} | Cell {cell_size}px | Seed {battle.seed} | FPS: {int(clock.get_fps())}", True, (120, 120, 120))
         screen.blit(size, (SCREEN_W - size.get_width() - 10, ly + 18))
         
         pygame.display.flip()
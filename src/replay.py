@@ -0,0 +1,461 @@
+"""Enregistrement et relecture compacts d'une bataille.
+
+ReplayRecorder (Battle(record=True)) écrit un flux d'événements par round:
+déplacements, attaques avec le résultat des jets, dégâts, morts, moral, statuts,
+sorts, portes et cases modifiées. Les valeurs sont encodées en delta (position
+et PV relatifs à l'état précédent) sous forme de varints, puis le fichier est
+compressé (zlib). Une bataille de 50 rounds tient en quelques Ko.
+
+ReplayPlayer relit un fichier et expose la même interface que Battle pour
+renderer.run_visual (simulate_round, is_battle_over, get_battle_report...):
+la bataille est rejouée sans être re-simulée.
+
+Format (.orbr):
+    MAGIC, version (1 octet), puis zlib(corps)
+    corps = varint+JSON (en-tête) | varint+grille (x-major) | rounds
+    round = varint(nb événements) + événements (opcode + varints)
+"""
+
+import json
+import zlib
+
+MAGIC = b"ORBR"
+VERSION = 1
+
+# Opcodes des événements
+EV_MOVE = 0      # uid, dx, dy
+EV_HP = 1        # uid, dpv
+EV_FLAGS = 2     # uid, flags
+EV_MORALE = 3    # uid, bonus, malus
+EV_STATUS = 4    # uid, id de chaîne
+EV_TARGET = 5    # uid, cible + 1 (0 = aucune)
+EV_ATTACK = 6    # uid, cible, arme, attaques, intimidées, ratées, non blessantes, sauvées, touches
+EV_SPELL = 7     # uid, index du sort
+EV_GATE = 8      # x, y, pv
+EV_CELL = 9      # x, y, valeur
+
+# Bits de EV_FLAGS
+F_ALIVE = 1
+F_FLEEING = 2
+F_AFRAID = 4
+F_FLED = 8
+F_DOWN = 16
+
+
+def _flags(u):
+    return ((F_ALIVE if u.is_alive else 0) | (F_FLEEING if u.fleeing else 0)
+            | (F_AFRAID if u.afraid else 0) | (F_FLED if u.fled else 0)
+            | (F_DOWN if u.down_timer > 0 else 0))
+
+
+def _write_varint(buf, n):
+    while n > 0x7F:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _zigzag(n):
+    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+
+
+def _unzigzag(n):
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def varint(self):
+        data = self.data
+        shift = 0
+        n = 0
+        while True:
+            b = data[self.pos]
+            self.pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def signed(self):
+        return _unzigzag(self.varint())
+
+    def raw(self, length):
+        chunk = self.data[self.pos:self.pos + length]
+        self.pos += length
+        return chunk
+
+
+def _encode_map_data(siege_data):
+    data = dict(siege_data)
+    if 'gates' in data:
+        data['gates'] = [[x, y, hp] for (x, y), hp in data['gates'].items()]
+    return data
+
+
+def _decode_map_data(data):
+    data = dict(data)
+    if 'gates' in data:
+        data['gates'] = {(x, y): hp for x, y, hp in data['gates']}
+    return data
+
+
+# ═══════════════════════════════════════════════════════════════
+#                     ENREGISTREMENT
+# ═══════════════════════════════════════════════════════════════
+
+class ReplayRecorder:
+    """Capture l'état initial d'une bataille puis un flux d'événements par round."""
+
+    def __init__(self, battle):
+        bf = battle.battlefield
+        self.units = battle.army1_roster + battle.army2_roster
+        self._uid = {id(u): i for i, u in enumerate(self.units)}
+        self._strings = {"": 0}
+        self._events = bytearray()
+        self._round_events = bytearray()
+        self._round_count = 0
+        self.rounds = 0
+
+        self._grid = self._initial_grid = self._grid_bytes(bf)
+        self._gate_hp = dict(bf.gate_hp)
+        self._state = [self._unit_state(u) for u in self.units]
+        self._header = {
+            'version': VERSION,
+            'map_name': battle.map_name,
+            'width': bf.width,
+            'height': bf.height,
+            'seed': battle.seed,
+            'round': battle.round,
+            'map_data': _encode_map_data(bf.siege_data),
+            'units': [self._unit_header(u, 1 if uid < len(battle.army1_roster) else 2, state)
+                      for uid, (u, state) in enumerate(zip(self.units, self._state))],
+        }
+
+    @staticmethod
+    def _grid_bytes(bf):
+        return bytes(bf.cells)
+
+    def _unit_state(self, u):
+        return [u.position, u.pv, _flags(u), u.morale_bonus, u.morale_malus,
+                self._string(u.status_text), self._target_id(u)]
+
+    def _unit_header(self, u, army, state):
+        return {
+            'name': u.name,
+            'token_name': u.token_name,
+            'color': list(u.color),
+            'size': u.size,
+            'role': u.role,
+            'unit_type': u.unit_type,
+            'army': army,
+            'max_pv': u.max_pv,
+            'base_morale': u.base_morale,
+            'fear_aura': u.fear_aura,
+            'attack_type': u.attack_type,
+            'max_range': u._max_range,
+            'armes': [a.porte for a in u.armes],
+            'spells': [s.name for s in u.spells],
+            'position': list(state[0]),
+            'pv': state[1],
+            'flags': state[2],
+            'morale_bonus': state[3],
+            'morale_malus': state[4],
+            'status': state[5],
+        }
+
+    def _string(self, text):
+        sid = self._strings.get(text)
+        if sid is None:
+            sid = self._strings[text] = len(self._strings)
+        return sid
+
+    def _target_id(self, u):
+        t = u.current_target
+        return 0 if t is None else self._uid.get(id(t), -1) + 1
+
+    def _emit(self, *values):
+        buf = self._round_events
+        for v in values:
+            _write_varint(buf, v)
+        self._round_count += 1
+
+    # ─── Événements (appelés pendant le round) ───
+
+    def on_attack(self, attacker, target, weapon_idx, attacks, awed, missed, no_wound, saved, hits):
+        self._emit(EV_ATTACK, self._uid[id(attacker)], self._uid[id(target)], weapon_idx,
+                   attacks, awed, missed, no_wound, saved, hits)
+
+    def on_spell(self, caster, spell_idx):
+        self._emit(EV_SPELL, self._uid[id(caster)], spell_idx)
+
+    # ─── Fin de round: différences d'état ───
+
+    def end_round(self, battle):
+        bf = battle.battlefield
+        for uid, u in enumerate(self.units):
+            old = self._state[uid]
+            new = self._unit_state(u)
+            if new == old:
+                continue
+            if new[0] != old[0]:
+                self._emit(EV_MOVE, uid, _zigzag(new[0][0] - old[0][0]), _zigzag(new[0][1] - old[0][1]))
+            if new[1] != old[1]:
+                self._emit(EV_HP, uid, _zigzag(new[1] - old[1]))
+            if new[2] != old[2]:
+                self._emit(EV_FLAGS, uid, new[2])
+            if new[3] != old[3] or new[4] != old[4]:
+                self._emit(EV_MORALE, uid, _zigzag(new[3]), _zigzag(new[4]))
+            if new[5] != old[5]:
+                self._emit(EV_STATUS, uid, new[5])
+            if new[6] != old[6]:
+                self._emit(EV_TARGET, uid, new[6])
+            self._state[uid] = new
+
+        for pos, hp in bf.gate_hp.items():
+            if self._gate_hp.get(pos) != hp:
+                self._emit(EV_GATE, pos[0], pos[1], max(0, hp))
+        self._gate_hp = dict(bf.gate_hp)
+
+        grid = self._grid_bytes(bf)
+        if grid != self._grid:
+            h = bf.height
+            for i, (a, b) in enumerate(zip(self._grid, grid)):
+                if a != b:
+                    self._emit(EV_CELL, i // h, i % h, b)
+            self._grid = grid
+
+        _write_varint(self._events, self._round_count)
+        self._events += self._round_events
+        self._round_events = bytearray()
+        self._round_count = 0
+        self.rounds += 1
+
+    # ─── Sérialisation ───
+
+    def to_bytes(self, report=None):
+        header = dict(self._header)
+        header['strings'] = sorted(self._strings, key=self._strings.get)
+        header['rounds'] = self.rounds
+        header['report'] = report
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        body = bytearray()
+        _write_varint(body, len(header_bytes))
+        body += header_bytes
+        _write_varint(body, len(self._initial_grid))
+        body += self._initial_grid
+        body += self._events
+        return MAGIC + bytes([VERSION]) + zlib.compress(bytes(body), 9)
+
+    def save(self, path, report=None):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes(report))
+
+
+# ═══════════════════════════════════════════════════════════════
+#                     RELECTURE
+# ═══════════════════════════════════════════════════════════════
+
+def load_replay(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class ReplayPlayer:
+    """Rejoue un enregistrement avec l'interface de Battle utilisée par renderer.run_visual.
+
+    source: chemin d'un fichier .orbr ou son contenu (bytes).
+    Chaque appel à simulate_round() applique le round enregistré suivant.
+    """
+
+    def __init__(self, source):
+        from battlefield import Battlefield
+
+        if isinstance(source, str):
+            source = load_replay(source)
+        self.data = source
+        if source[:4] != MAGIC:
+            raise ValueError("Fichier de replay invalide")
+        if source[4] != VERSION:
+            raise ValueError(f"Version de replay non supportée: {source[4]}")
+        reader = _Reader(zlib.decompress(source[5:]))
+
+        header = json.loads(reader.raw(reader.varint()).decode('utf-8'))
+        flat = reader.raw(reader.varint())
+        self._reader = reader
+
+        self.header = header
+        self.map_name = header['map_name']
+        self.seed = header['seed']
+        self.round = header['round']
+        self.rounds_total = header['rounds']
+        self._rounds_played = 0
+        self._strings = header['strings']
+        self._report = header.get('report')
+
+        w, h = header['width'], header['height']
+        grid = [list(flat[x * h:(x + 1) * h]) for x in range(w)]
+        self.battlefield = Battlefield(w, h, 0, self.map_name, grid,
+                                       _decode_map_data(header['map_data']))
+        self.visual_effects = {'projectiles': [], 'attack_lines': [], 'target_indicators': []}
+
+        self.units = [self._build_unit(info) for info in header['units']]
+        self._weapon_ranges = [info['armes'] for info in header['units']]
+        self._spell_names = [info['spells'] for info in header['units']]
+        self.army1_roster = [u for u, info in zip(self.units, header['units']) if info['army'] == 1]
+        self.army2_roster = [u for u, info in zip(self.units, header['units']) if info['army'] == 2]
+        self.army1 = list(self.army1_roster)
+        self.army2 = list(self.army2_roster)
+        self.army1_fled = []
+        self.army2_fled = []
+        self._refresh_target_indicators()
+
+    def restart(self):
+        """Nouveau lecteur au début du même enregistrement."""
+        return ReplayPlayer(self.data)
+
+    def _build_unit(self, info):
+        from unit import Unit
+        u = Unit(info['name'], info['max_pv'], 0, info['base_morale'], 7, tuple(info['color']),
+                 role=info['role'], size=info['size'], unit_type=info['unit_type'])
+        u.token_name = info['token_name']
+        u.fear_aura = info['fear_aura']
+        u.attack_type = info['attack_type']
+        u._max_range = info['max_range']
+        u.position = tuple(info['position'])
+        u._prev_position = u.position
+        u.pv = u.hp = info['pv']
+        u.morale_bonus = info['morale_bonus']
+        u.morale_malus = info['morale_malus']
+        u.status_text = self._strings[info['status']]
+        self._apply_flags(u, info['flags'])
+        return u
+
+    @staticmethod
+    def _apply_flags(u, flags):
+        u.is_alive = bool(flags & F_ALIVE)
+        u.fleeing = bool(flags & F_FLEEING)
+        u.afraid = bool(flags & F_AFRAID)
+        u.fled = bool(flags & F_FLED)
+        u.down_timer = 1 if flags & F_DOWN else 0
+
+    # ─── Interface Battle ───
+
+    def simulate_round(self, cell_size=None):
+        if self._rounds_played >= self.rounds_total:
+            return
+        for u in self.units:
+            u._prev_position = u.position
+
+        reader = self._reader
+        units = self.units
+        attacks = []
+        for _ in range(reader.varint()):
+            op = reader.varint()
+            if op == EV_MOVE:
+                u = units[reader.varint()]
+                dx, dy = reader.signed(), reader.signed()
+                u.position = (u.position[0] + dx, u.position[1] + dy)
+            elif op == EV_HP:
+                u = units[reader.varint()]
+                d = reader.signed()
+                u.pv += d
+                u.hp = u.pv
+                if d < 0:
+                    u.add_floating_text(f"{d}", (220, 40, 40))
+                else:
+                    u.add_floating_text(f"+{d}", (40, 220, 40))
+            elif op == EV_FLAGS:
+                u = units[reader.varint()]
+                flags = reader.varint()
+                if flags & F_FLED and not u.fled:
+                    (self.army1_fled if u in self.army1_roster else self.army2_fled).append(u)
+                self._apply_flags(u, flags)
+            elif op == EV_MORALE:
+                u = units[reader.varint()]
+                u.morale_bonus, u.morale_malus = reader.signed(), reader.signed()
+            elif op == EV_STATUS:
+                u = units[reader.varint()]
+                u.status_text = self._strings[reader.varint()]
+            elif op == EV_TARGET:
+                u = units[reader.varint()]
+                t = reader.varint()
+                u.current_target = units[t - 1] if t else None
+            elif op == EV_ATTACK:
+                attacks.append([reader.varint() for _ in range(9)])
+            elif op == EV_SPELL:
+                uid, idx = reader.varint(), reader.varint()
+                units[uid].add_floating_text(self._spell_names[uid][idx], (180, 80, 255), 70)
+            elif op == EV_GATE:
+                x, y, hp = reader.varint(), reader.varint(), reader.varint()
+                self.battlefield.set_gate_hp(x, y, hp)
+            elif op == EV_CELL:
+                x, y, value = reader.varint(), reader.varint(), reader.varint()
+                self.battlefield.set_cell(x, y, value)
+            else:
+                raise ValueError(f"Événement de replay inconnu: {op}")
+
+        # Les attaques sont affichées après les déplacements, comme en direct
+        for values in attacks:
+            self._show_attack(*values, cell_size=cell_size)
+
+        # Même filtrage que Battle en fin de round
+        self.army1 = [u for u in self.army1 if not u.fled and (u.is_alive or u.down_timer > 0)]
+        self.army2 = [u for u in self.army2 if not u.fled and (u.is_alive or u.down_timer > 0)]
+        self._refresh_target_indicators()
+        self._rounds_played += 1
+        self.round += 1
+
+    def _refresh_target_indicators(self):
+        if self.visual_effects is not None:
+            self.visual_effects['target_indicators'] = [
+                (u, u.current_target) for u in self.army1 + self.army2
+                if u.is_alive and u.current_target is not None]
+
+    def _show_attack(self, uid, tid, weapon_idx, attacks, awed, missed, no_wound, saved, hits,
+                     cell_size=None):
+        attacker, target = self.units[uid], self.units[tid]
+        attacker.current_target = target
+        for count, text, color in ((awed, "Intimidé!", (255, 180, 60)),
+                                   (missed, "Raté!", (255, 220, 80)),
+                                   (no_wound, "Pas blessé!", (255, 200, 120)),
+                                   (saved, "Sauvé!", (100, 200, 255))):
+            for _ in range(count):
+                target.add_floating_text(text, color)
+
+        if cell_size is None or self.visual_effects is None:
+            return
+        from effects import Projectile, AttackLine
+        start_px = attacker._pos_to_px(attacker.position, cell_size)
+        end_px = attacker._pos_to_px(target.position, cell_size)
+        porte = self._weapon_ranges[uid][weapon_idx]
+        dist = self.battlefield.manhattan_distance(attacker.position, target.position)
+        if dist <= 2 and attacker._max_range <= 2:
+            attacker._lunge_target = end_px
+            attacker._lunge_timer = 20
+        for _ in range(attacks):
+            if porte >= 4:
+                self.visual_effects['projectiles'].append(
+                    Projectile(start_px, end_px, (200, 180, 100), 40, "arrow", cell_size))
+            elif porte >= 2:
+                self.visual_effects['attack_lines'].append(
+                    AttackLine(start_px, end_px, (255, 180, 50), 25))
+            else:
+                self.visual_effects['attack_lines'].append(
+                    AttackLine(start_px, end_px, (255, 100, 100), 25))
+
+    def is_battle_over(self):
+        if self._rounds_played < self.rounds_total or not self._report:
+            return None
+        winner = self._report.get('winner')
+        return None if winner in (None, "En cours") else winner
+
+    def get_battle_report(self):
+        if self._report and self._rounds_played >= self.rounds_total:
+            return self._report
+        from battle import Battle
+        return Battle.get_battle_report(self)
@@ -0,0 +1,119 @@
+"""Index spatial uniforme (spatial hash) pour les requêtes de proximité.
+
+Les unités sont rangées par armée dans des seaux de BUCKET×BUCKET cases, selon
+leur position d'ancrage. Les distances sont des distances de Manhattan depuis
+l'ancrage, comme partout dans battle.py.
+
+Les requêtes ne retournent que les unités vivantes. À distance égale, l'ordre de
+l'armée (unit._roster_idx) départage: les résultats sont identiques à ceux d'un
+parcours linéaire de la liste de l'armée.
+"""
+
+BUCKET = 8
+
+
+class SpatialHash:
+    def __init__(self, width, height, bucket=BUCKET):
+        self.bucket = bucket
+        self._max_ring = max(width, height) // bucket + 1
+        self._buckets = {}   # army_key → {(bx, by): [unit, ...]}
+        self._where = {}     # id(unit) → (army_key, (bx, by))
+
+    def _key(self, pos):
+        b = self.bucket
+        return (pos[0] // b, pos[1] // b)
+
+    def insert(self, unit, army_key):
+        if id(unit) in self._where:
+            self.remove(unit)
+        bkey = self._key(unit.position)
+        self._buckets.setdefault(army_key, {}).setdefault(bkey, []).append(unit)
+        self._where[id(unit)] = (army_key, bkey)
+
+    def remove(self, unit):
+        entry = self._where.pop(id(unit), None)
+        if entry is None:
+            return
+        army_key, bkey = entry
+        cell = self._buckets[army_key][bkey]
+        cell.remove(unit)
+        if not cell:
+            del self._buckets[army_key][bkey]
+
+    def clear(self):
+        self._buckets = {}
+        self._where = {}
+
+    def nearest(self, pos, army_key, exclude=None):
+        """Unité vivante la plus proche de pos → (unit, dist) ou (None, None)."""
+        buckets = self._buckets.get(army_key)
+        if not buckets:
+            return None, None
+        px, py = pos
+        bx, by = self._key(pos)
+        b = self.bucket
+        best = None
+        best_d = None
+        best_idx = 0
+        for r in range(self._max_ring + 1):
+            # Distance minimale possible vers une case d'un seau de l'anneau r
+            if best is not None and (r - 1) * b + 1 > best_d:
+                break
+            for key in self._ring(bx, by, r):
+                for u in buckets.get(key, ()):
+                    if not u.is_alive or u is exclude:
+                        continue
+                    d = abs(u.position[0] - px) + abs(u.position[1] - py)
+                    if best is None or d < best_d or (d == best_d and u._roster_idx < best_idx):
+                        best, best_d, best_idx = u, d, u._roster_idx
+        return best, best_d
+
+    def within(self, pos, radius, army_key):
+        """Unités vivantes à distance ≤ radius de pos, dans l'ordre de l'armée."""
+        result = [u for u, _ in self._scan(pos, radius, army_key)]
+        result.sort(key=lambda u: u._roster_idx)
+        return result
+
+    def within_dist(self, pos, radius, army_key):
+        """Comme within, mais retourne des couples (unit, dist)."""
+        result = list(self._scan(pos, radius, army_key))
+        result.sort(key=lambda ud: ud[0]._roster_idx)
+        return result
+
+    def any_within(self, pos, radius, army_key):
+        """True si une unité vivante de l'armée est à distance ≤ radius de pos."""
+        for _ in self._scan(pos, radius, army_key):
+            return True
+        return False
+
+    def _scan(self, pos, radius, army_key):
+        buckets = self._buckets.get(army_key)
+        if not buckets:
+            return
+        px, py = pos
+        b = self.bucket
+        x0, y0 = (px - radius) // b, (py - radius) // b
+        x1, y1 = (px + radius) // b, (py + radius) // b
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(buckets):
+            keys = [k for k in buckets if x0 <= k[0] <= x1 and y0 <= k[1] <= y1]
+        else:
+            keys = [(kx, ky) for kx in range(x0, x1 + 1) for ky in range(y0, y1 + 1)]
+        for key in keys:
+            for u in buckets.get(key, ()):
+                if not u.is_alive:
+                    continue
+                d = abs(u.position[0] - px) + abs(u.position[1] - py)
+                if d <= radius:
+                    yield u, d
+
+    @staticmethod
+    def _ring(bx, by, r):
+        if r == 0:
+            yield (bx, by)
+            return
+        for kx in range(bx - r, bx + r + 1):
+            yield (kx, by - r)
+            yield (kx, by + r)
+        for ky in range(by - r + 1, by + r):
+            yield (bx - r, ky)
+            yield (bx + r, ky)
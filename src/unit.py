@@ -1,11 +1,27 @@
 import random
 from collections import deque
 
+import dice
+
 from effects import (FloatingText, Projectile, AttackLine,
                      AoeExplosion, HealBeam, ArmorShimmer, WallEffect)
 
 
 class Unit:
+    __slots__ = (
+        'name', 'token_name', 'pv', 'max_pv', 'hp', 'max_hp', 'vitesse', 'speed',
+        'morale', 'base_morale', 'sauvegarde', 'armes', 'attacks', 'spells', 'special',
+        'role', 'position', 'is_alive', '_prev_position', '_lunge_target', '_lunge_timer',
+        'color', 'afraid', 'fleeing', 'fled', 'status_text', 'floating_texts', 'down_timer',
+        'fear_aura', 'current_target', 'morale_malus', 'morale_bonus', 'encouragement_range',
+        'size', 'unit_type', 'spells_per_round', 'anti_infanterie', 'anti_large', 'phalange',
+        'charge_montee', 'charge_aida', 'has_charged', '_phalange_bonus_active', '_on_wall',
+        '_army_key', '_roster_idx', '_tactical_order',
+        '_fear_malus_applied', '_half_army_malus_applied', '_critical_malus_applied',
+        '_flee_rounds', '_armor_buff', '_armor_buff_rounds', '_armor_buff_amount',
+        'awe', 'immune_mind', 'regeneration', 'blood_vengeance', '_max_range', 'attack_type',
+    )
+    
     def __init__(self, name, pv, vitesse, morale, sauvegarde, color,
                  armes=None, spells=None, special=None, role="front",
                  size=1, unit_type="Infanterie"):
@@ -62,6 +78,20 @@ class Unit:
         self._phalange_bonus_active = False
         self._on_wall = False  # Sur un mur (siège)
         
+        # Appartenance (assignée par Battle): armée 1/2 et rang dans l'armée
+        self._army_key = None
+        self._roster_idx = 0
+        self._tactical_order = None   # Ordre de l'IA (ai_commander.TacticalOrder)
+        
+        # États de bataille (moral, fuite, buffs)
+        self._fear_malus_applied = False
+        self._half_army_malus_applied = False
+        self._critical_malus_applied = False
+        self._flee_rounds = 0
+        self._armor_buff = False
+        self._armor_buff_rounds = 0
+        self._armor_buff_amount = 0
+        
         # Pré-calculer les propriétés spéciales
         if self.special.get("causes_fear"):
             self.fear_aura = 1
@@ -89,41 +119,46 @@ class Unit:
         else:
             self.attack_type = "melee"
 
-    def take_damage(self, dmg, is_magic=False, attacker=None):
+    def add_floating_text(self, text, color, duration=60):
+        """Ajoute un texte flottant (ignoré en mode headless: floating_texts = None)."""
+        if self.floating_texts is not None:
+            self.floating_texts.append(FloatingText(text, color, duration))
+
+    def take_damage(self, dmg, is_magic=False, attacker=None, rng=random):
         if is_magic:
-            dmg = max(0, dmg - random.randint(0, self.sauvegarde))
+            dmg = max(0, dmg - rng.randint(0, self.sauvegarde))
         if dmg <= 0:
             return
         
         if self.blood_vengeance > 0 and attacker:
             penalty = self.blood_vengeance
-            mr_roll = random.randint(1, 20) + attacker.sauvegarde - penalty
+            mr_roll = rng.randint(1, 20) + attacker.sauvegarde - penalty
             if mr_roll < 10 + penalty:
-                attacker.take_damage(dmg)
-                attacker.floating_texts.append(FloatingText("VENGEANCE!", (220, 0, 220), 90))
+                attacker.take_damage(dmg, rng=rng)
+                attacker.add_floating_text("VENGEANCE!", (220, 0, 220), 90)
                 return
         
         self.pv -= dmg
         self.hp = self.pv
-        self.floating_texts.append(FloatingText(f"-{dmg}", (220, 40, 40)))
+        self.add_floating_text(f"-{dmg}", (220, 40, 40))
         
         if self.pv <= 0:
             if self.pv > -(self.max_pv // 2) and self.regeneration > 0:
                 self.is_alive = False
-                self.down_timer = random.randint(4, 8)
+                self.down_timer = rng.randint(4, 8)
                 self.status_text = "DOWN"
             else:
                 self.is_alive = False
                 self.status_text = "MORT!"
 
-    def regenerate(self):
+    def regenerate(self, rng=random):
         if not self.is_alive:
             if self.down_timer > 0:
                 self.down_timer -= 1
-                heal = random.randint(1, 4)
+                heal = rng.randint(1, 4)
                 self.pv += heal
                 self.hp = self.pv
-                self.floating_texts.append(FloatingText(f"+{heal}", (100, 220, 100), 60))
+                self.add_floating_text(f"+{heal}", (100, 220, 100), 60)
                 if self.pv >= 1:
                     self.is_alive = True
                     self.status_text = "REVIVED"
@@ -134,27 +169,27 @@ class Unit:
             heal = max(1, int(self.max_pv * self.regeneration / 100))
             self.pv = min(self.max_pv, self.pv + heal)
             self.hp = self.pv
-            self.floating_texts.append(FloatingText(f"+{heal}", (40, 220, 40)))
+            self.add_floating_text(f"+{heal}", (40, 220, 40))
 
     def get_effective_morale(self):
         return max(0, self.base_morale + self.morale_bonus - self.morale_malus)
 
-    def morale_check(self):
+    def morale_check(self, rng=random):
         effective_morale = self.get_effective_morale()
         if effective_morale == 0:
             return False
-        return random.randint(1, 6) <= effective_morale
+        return rng.randint(1, 6) <= effective_morale
 
     def apply_fear_effect(self, aura_level, distance):
         """Applique l'effet de peur. La portée est déjà vérifiée par battle.py (4 cases)."""
         if self.immune_mind or aura_level == 0:
             return None
         
-        if not hasattr(self, '_fear_malus_applied') or not self._fear_malus_applied:
+        if not self._fear_malus_applied:
             self.morale_malus += 1
             self._fear_malus_applied = True
             self.afraid = True
-            self.floating_texts.append(FloatingText("-1 Moral", (255, 180, 60), 80))
+            self.add_floating_text("-1 Moral", (255, 180, 60), 80)
             
             if self.get_effective_morale() == 0:
                 self.fleeing = True
@@ -169,20 +204,30 @@ class Unit:
             return "afraid"
         return None
 
-    def perform_attacks(self, target, battlefield, visual_effects, cell_size):
+    def perform_attacks(self, target, battlefield, visual_effects=None, cell_size=None):
+        """Résout les attaques contre target.
+        
+        visual_effects=None (mode headless): aucun effet visuel n'est alloué.
+        Les jets utilisent battlefield.rng (générateur de la bataille).
+        """
         dist = battlefield.manhattan_distance(self.position, target.position)
         
         if dist > self._max_range or self.fleeing:
             self.current_target = None
             return
         
+        # Ligne de vue: un obstacle entre les deux cases bloque le tir (los.py)
+        if dist > 1 and not battlefield.has_los(self.position, target.position):
+            self.current_target = None
+            return
+        
         # Vérifier si un mur bloque le CaC
         target_on_rampart = battlefield.is_rampart(*target.position)
         attacker_on_stairs = (self.position in battlefield.stairs) if battlefield.stairs else False
         
         if target_on_rampart and self._max_range < 4 and not attacker_on_stairs:
             # CaC ne peut pas atteindre les unités sur les remparts (sauf depuis les escaliers)
-            self.floating_texts.append(FloatingText("Mur!", (180, 180, 180)))
+            self.add_floating_text("Mur!", (180, 180, 180))
             self.current_target = None
             return
         
@@ -193,16 +238,17 @@ class Unit:
         wall_toucher_bonus = -1 if self._on_wall else 0
         
         self.current_target = target
-        start_px = (self.position[0] * cell_size + cell_size // 2,
-                    self.position[1] * cell_size + cell_size // 2)
-        end_px = (target.position[0] * cell_size + cell_size // 2,
-                  target.position[1] * cell_size + cell_size // 2)
+        rng = battlefield.rng
         
-        # Animation de lunge CaC: si l'unité est au corps à corps, elle bondit
-        # brièvement vers la cible (pas pour les tirs à distance)
-        if dist <= 2 and self._max_range <= 2:
-            self._lunge_target = end_px
-            self._lunge_timer = 20  # 20 frames de lunge
+        if visual_effects is not None:
+            start_px = self._pos_to_px(self.position, cell_size)
+            end_px = self._pos_to_px(target.position, cell_size)
+            
+            # Animation de lunge CaC: si l'unité est au corps à corps, elle bondit
+            # brièvement vers la cible (pas pour les tirs à distance)
+            if dist <= 2 and self._max_range <= 2:
+                self._lunge_target = end_px
+                self._lunge_timer = 20  # 20 frames de lunge
         
         # Bonus anti-type
         anti_toucher = 0
@@ -229,57 +275,94 @@ class Unit:
                 charge_blesser = -1
             self.has_charged = False  # Reset après application
         
-        for arme in self.armes:
+        # Bonus ne dépendant pas de l'arme
+        toucher_mod = (1 if self.afraid else 0) + anti_toucher + charge_toucher + wall_toucher_bonus
+        blesser_mod = anti_blesser + charge_blesser
+        awe_check = dist <= 1 and target.awe > 0
+        if awe_check:
+            morale = self.get_effective_morale()
+        
+        recorder = battlefield.recorder
+        stats = battlefield.stats
+        
+        for weapon_idx, arme in enumerate(self.armes):
             if dist > arme.porte:
                 continue
             
-            for _ in range(arme.nb_attaque):
-                # Effet visuel selon le type d'arme
-                if arme.porte >= 4:
-                    visual_effects['projectiles'].append(
-                        Projectile(start_px, end_px, (200, 180, 100), 40, "arrow", cell_size)
-                    )
-                elif arme.porte >= 2:
-                    visual_effects['attack_lines'].append(
-                        AttackLine(start_px, end_px, (255, 180, 50), 25)
-                    )
-                else:
-                    visual_effects['attack_lines'].append(
-                        AttackLine(start_px, end_px, (255, 100, 100), 25)
-                    )
-                
-                # Résolution combat avec bonus
-                toucher_final = arme.toucher + (1 if self.afraid else 0) + anti_toucher + charge_toucher + wall_toucher_bonus
-                blesser_final = arme.blesser + anti_blesser + charge_blesser
-                perf_final = arme.perforation + charge_perf
-                
-                if dist <= 1 and target.awe > 0 and not self.morale_check():
-                    target.floating_texts.append(FloatingText("Intimidé!", (255, 180, 60)))
-                    continue
-                
-                # Toucher
-                if random.randint(1, 6) < toucher_final:
-                    target.floating_texts.append(FloatingText("Raté!", (255, 220, 80)))
-                    continue
-                
-                # Blessure
-                if random.randint(1, 6) < blesser_final:
-                    target.floating_texts.append(FloatingText("Pas blessé!", (255, 200, 120)))
-                    continue
-                
-                # Sauvegarde (mur donne -2 au seuil = plus facile de sauver)
-                # Perforation négative = monte le seuil = plus dur de sauver
-                save_modifie = min(7, target.sauvegarde - perf_final - wall_save_bonus)
-                if random.randint(1, 6) >= save_modifie:
-                    target.floating_texts.append(FloatingText("Sauvé!", (100, 200, 255)))
-                    continue
-                
-                # Dégâts
-                dmg = arme.lancer_degats() + charge_degats
-                target.take_damage(dmg, False, self)
+            n = arme.nb_attaque
+            if stats is not None:
+                stats.count('attacks_rolled', n)
+            
+            # Effet visuel selon le type d'arme
+            if visual_effects is not None:
+                for _ in range(n):
+                    if arme.porte >= 4:
+                        visual_effects['projectiles'].append(
+                            Projectile(start_px, end_px, (200, 180, 100), 40, "arrow", cell_size)
+                        )
+                    elif arme.porte >= 2:
+                        visual_effects['attack_lines'].append(
+                            AttackLine(start_px, end_px, (255, 180, 50), 25)
+                        )
+                    else:
+                        visual_effects['attack_lines'].append(
+                            AttackLine(start_px, end_px, (255, 100, 100), 25)
+                        )
+            
+            # Résolution groupée (dice.py): on tire le nombre d'attaques qui passent
+            # chaque étape au lieu de lancer chaque dé.
+            toucher_final = arme.toucher + toucher_mod
+            blesser_final = arme.blesser + blesser_mod
+            perf_final = arme.perforation + charge_perf
+            # Sauvegarde (mur donne -2 au seuil = plus facile de sauver)
+            # Perforation négative = monte le seuil = plus dur de sauver
+            save_modifie = min(7, target.sauvegarde - perf_final - wall_save_bonus)
+            
+            # Intimidation: un test de moral par attaque
+            if awe_check:
+                passed = dice.binomial(n, min(6, morale), rng)
+                self._batch_texts(target, n - passed, "Intimidé!", (255, 180, 60))
+                n = passed
+            
+            hits = dice.binomial(n, dice.d6_at_least(toucher_final), rng)
+            self._batch_texts(target, n - hits, "Raté!", (255, 220, 80))
+            
+            wounds = dice.binomial(hits, dice.d6_at_least(blesser_final), rng)
+            self._batch_texts(target, hits - wounds, "Pas blessé!", (255, 200, 120))
+            
+            unsaved = wounds - dice.binomial(wounds, dice.d6_at_least(save_modifie), rng)
+            self._batch_texts(target, wounds - unsaved, "Sauvé!", (100, 200, 255))
+            
+            if recorder is not None:
+                recorder.on_attack(self, target, weapon_idx, arme.nb_attaque,
+                                   arme.nb_attaque - n, n - hits, hits - wounds,
+                                   wounds - unsaved, unsaved)
+            
+            if unsaved <= 0:
+                continue
+            
+            # Dégâts: la vengeance du sang se joue touche par touche
+            if target.blood_vengeance > 0:
+                for _ in range(unsaved):
+                    dmg = arme.lancer_degats(rng) + charge_degats
+                    target.take_damage(dmg, False, self, rng)
+            else:
+                dmg = dice.total_damage(arme, unsaved, rng, charge_degats, floor=0)
+                target.take_damage(dmg, False, self, rng)
+
+    @staticmethod
+    def _batch_texts(target, count, text, color):
+        """Textes flottants d'une résolution groupée (un par attaque concernée)."""
+        if target.floating_texts is None:
+            return
+        for _ in range(count):
+            target.add_floating_text(text, color)
 
-    def cast_random_spell(self, battle, visual_effects, cell_size):
-        """Lance un sort disponible (pas en cooldown). Gère 5 types de sorts."""
+    def cast_random_spell(self, battle, visual_effects=None, cell_size=None):
+        """Lance un sort disponible (pas en cooldown). Gère 5 types de sorts.
+        
+        visual_effects=None (mode headless): les sorts n'allouent aucun effet visuel.
+        """
         if not self.spells or self.fleeing:
             return
         
@@ -296,7 +379,7 @@ class Unit:
         max_casts = getattr(self, 'spells_per_round', 1)
         casts_done = 0
         
-        random.shuffle(ready)
+        battle.rng.shuffle(ready)
         
         for spell in ready:
             if casts_done >= max_casts:
@@ -318,36 +401,55 @@ class Unit:
             if cast_ok:
                 spell.use()
                 casts_done += 1
+                if battle.recorder is not None:
+                    battle.recorder.on_spell(self, self.spells.index(spell))
     
     def _pos_to_px(self, pos, cell_size):
         return (pos[0] * cell_size + cell_size // 2, pos[1] * cell_size + cell_size // 2)
     
-    def _cast_fireball(self, spell, battle, visual_effects, cell_size):
-        """Boule de feu — AoE sur zone 3×3 autour de l'ennemi le plus proche."""
+    def _spell_target(self, battle, porte):
+        """Ennemi le plus proche à portée de sort et en ligne de vue (None si aucun)."""
         target = battle.get_closest_enemy(self)
+        if not target:
+            return None
+        bf = battle.battlefield
+        pos = self.position
+        if bf.manhattan_distance(pos, target.position) > porte:
+            return None
+        if bf.has_los(pos, target.position):
+            return target
+        # Le plus proche est caché: ennemi visible le plus proche dans la portée
+        visible = [(e, d) for e, d in bf.spatial.within_dist(pos, porte, battle._enemy_key(self))
+                   if bf.has_los(pos, e.position)]
+        if not visible:
+            return None
+        return min(visible, key=lambda ed: ed[1])[0]
+    
+    def _cast_fireball(self, spell, battle, visual_effects, cell_size):
+        """Boule de feu — AoE sur zone 3×3 autour de l'ennemi visible le plus proche."""
+        target = self._spell_target(battle, spell.porte)
         if not target:
             return False
-        dist = battle.battlefield.manhattan_distance(self.position, target.position)
-        if dist > spell.porte:
-            return False
-        
-        start_px = self._pos_to_px(self.position, cell_size)
-        end_px = self._pos_to_px(target.position, cell_size)
         
-        # Projectile boule de feu
-        visual_effects['projectiles'].append(
-            Projectile(start_px, end_px, (255, 100, 0), 35, "fireball", cell_size)
-        )
-        
-        # Explosion AoE
-        aoe_radius_px = (spell.aoe_size // 2) * cell_size + cell_size // 2
-        visual_effects.setdefault('aoe_explosions', []).append(
-            AoeExplosion(end_px, aoe_radius_px, (255, 120, 0), 35)
-        )
+        if visual_effects is not None:
+            start_px = self._pos_to_px(self.position, cell_size)
+            end_px = self._pos_to_px(target.position, cell_size)
+            
+            # Projectile boule de feu
+            visual_effects['projectiles'].append(
+                Projectile(start_px, end_px, (255, 100, 0), 35, "fireball", cell_size)
+            )
+            
+            # Explosion AoE
+            aoe_radius_px = (spell.aoe_size // 2) * cell_size + cell_size // 2
+            visual_effects.setdefault('aoe_explosions', []).append(
+                AoeExplosion(end_px, aoe_radius_px, (255, 120, 0), 35)
+            )
         
-        self.floating_texts.append(FloatingText("Boule de feu!", (255, 120, 0), 70))
+        self.add_floating_text("Boule de feu!", (255, 120, 0), 70)
         
         # Dégâts sur zone
+        rng = battle.rng
         half = spell.aoe_size // 2
         tx, ty = target.position
         for enemy in battle.get_enemies(self):
@@ -356,19 +458,19 @@ class Unit:
             ex, ey = enemy.position
             if abs(ex - tx) <= half and abs(ey - ty) <= half:
                 # Toucher
-                if random.randint(1, 6) < spell.toucher:
-                    enemy.floating_texts.append(FloatingText("Raté!", (255, 220, 80)))
+                if rng.randint(1, 6) < spell.toucher:
+                    enemy.add_floating_text("Raté!", (255, 220, 80))
                     continue
                 # Blesser (1 = blesse d'office)
-                if spell.blesser > 1 and random.randint(1, 6) < spell.blesser:
-                    enemy.floating_texts.append(FloatingText("Résiste!", (255, 200, 120)))
+                if spell.blesser > 1 and rng.randint(1, 6) < spell.blesser:
+                    enemy.add_floating_text("Résiste!", (255, 200, 120))
                     continue
                 # Sauvegarde
                 save_mod = min(7, enemy.sauvegarde + spell.perforation)
-                if random.randint(1, 6) >= save_mod:
-                    enemy.floating_texts.append(FloatingText("Sauvé!", (100, 200, 255)))
+                if rng.randint(1, 6) >= save_mod:
+                    enemy.add_floating_text("Sauvé!", (100, 200, 255))
                     continue
-                enemy.take_damage(spell.lancer_degats(), False, self)
+                enemy.take_damage(spell.lancer_degats(rng), False, self, rng)
         
         return True
     
@@ -388,18 +490,19 @@ class Unit:
         wounded.sort(key=lambda x: x[0])
         target = wounded[0][1]
         
-        start_px = self._pos_to_px(self.position, cell_size)
-        end_px = self._pos_to_px(target.position, cell_size)
-        
-        visual_effects.setdefault('heal_beams', []).append(
-            HealBeam(start_px, end_px, 30)
-        )
+        if visual_effects is not None:
+            start_px = self._pos_to_px(self.position, cell_size)
+            end_px = self._pos_to_px(target.position, cell_size)
+            
+            visual_effects.setdefault('heal_beams', []).append(
+                HealBeam(start_px, end_px, 30)
+            )
         
         healed = target.max_hp - target.hp
         target.hp = target.max_hp
         target.pv = target.max_pv
-        target.floating_texts.append(FloatingText(f"+{healed} SOIN!", (50, 255, 100), 80))
-        self.floating_texts.append(FloatingText("Soin!", (50, 255, 100), 60))
+        target.add_floating_text(f"+{healed} SOIN!", (50, 255, 100), 80)
+        self.add_floating_text("Soin!", (50, 255, 100), 60)
         
         return True
     
@@ -414,8 +517,8 @@ class Unit:
                     candidates.append(ally)
         
         # Préférer ceux qui n'ont pas déjà le buff
-        unbuffed = [c for c in candidates if not getattr(c, '_armor_buff', False)]
-        target = random.choice(unbuffed) if unbuffed else None
+        unbuffed = [c for c in candidates if not c._armor_buff]
+        target = battle.rng.choice(unbuffed) if unbuffed else None
         
         if not target:
             return False
@@ -426,49 +529,50 @@ class Unit:
         target._armor_buff_amount = spell.bonus
         target.sauvegarde = max(1, target.sauvegarde - spell.bonus)
         
-        px = self._pos_to_px(target.position, cell_size)
-        ur = max(3, cell_size // 2 - 4) * max(1, target.size)
-        visual_effects.setdefault('armor_shimmers', []).append(
-            ArmorShimmer(px, ur, 40)
-        )
+        if visual_effects is not None:
+            px = self._pos_to_px(target.position, cell_size)
+            ur = max(3, cell_size // 2 - 4) * max(1, target.size)
+            visual_effects.setdefault('armor_shimmers', []).append(
+                ArmorShimmer(px, ur, 40)
+            )
         
-        target.floating_texts.append(FloatingText(f"+{spell.bonus} Armure!", (80, 180, 255), 70))
-        self.floating_texts.append(FloatingText("Armure!", (80, 180, 255), 60))
+        target.add_floating_text(f"+{spell.bonus} Armure!", (80, 180, 255), 70)
+        self.add_floating_text("Armure!", (80, 180, 255), 60)
         
         return True
     
     def _cast_projectile(self, spell, battle, visual_effects, cell_size):
         """Projectile magique — cible unique, longue portée."""
-        target = battle.get_closest_enemy(self)
+        target = self._spell_target(battle, spell.porte)
         if not target:
             return False
-        dist = battle.battlefield.manhattan_distance(self.position, target.position)
-        if dist > spell.porte:
-            return False
         
-        start_px = self._pos_to_px(self.position, cell_size)
-        end_px = self._pos_to_px(target.position, cell_size)
-        
-        # 3 petits projectiles violets
-        for i in range(3):
-            offset = (random.randint(-8, 8), random.randint(-8, 8))
-            ep = (end_px[0] + offset[0], end_px[1] + offset[1])
-            visual_effects['projectiles'].append(
-                Projectile(start_px, ep, (180, 80, 255), 25 + i * 5, "magic", cell_size)
-            )
+        if visual_effects is not None:
+            start_px = self._pos_to_px(self.position, cell_size)
+            end_px = self._pos_to_px(target.position, cell_size)
+            
+            # 3 petits projectiles violets (décalage purement visuel: random global,
+            # pour ne pas consommer le générateur de la bataille)
+            for i in range(3):
+                offset = (random.randint(-8, 8), random.randint(-8, 8))
+                ep = (end_px[0] + offset[0], end_px[1] + offset[1])
+                visual_effects['projectiles'].append(
+                    Projectile(start_px, ep, (180, 80, 255), 25 + i * 5, "magic", cell_size)
+                )
         
-        self.floating_texts.append(FloatingText("Projectile!", (180, 80, 255), 60))
+        self.add_floating_text("Projectile!", (180, 80, 255), 60)
         
         # Toucher
-        if random.randint(1, 6) < spell.toucher:
-            target.floating_texts.append(FloatingText("Raté!", (255, 220, 80)))
+        rng = battle.rng
+        if rng.randint(1, 6) < spell.toucher:
+            target.add_floating_text("Raté!", (255, 220, 80))
             return True
         # Blesser (1 = d'office)
-        if spell.blesser > 1 and random.randint(1, 6) < spell.blesser:
-            target.floating_texts.append(FloatingText("Résiste!", (255, 200, 120)))
+        if spell.blesser > 1 and rng.randint(1, 6) < spell.blesser:
+            target.add_floating_text("Résiste!", (255, 200, 120))
             return True
         
-        target.take_damage(spell.lancer_degats(), False, self)
+        target.take_damage(spell.lancer_degats(rng), False, self, rng)
         return True
     
     def _cast_wall(self, spell, battle, visual_effects, cell_size):
@@ -498,26 +602,25 @@ class Unit:
         
         # Créer les obstacles temporaires
         for wx, wy in wall_positions:
-            original = bf.grid[wx][wy]
+            original = bf.cell(wx, wy)
             if original in (2, 3, 4, 5):
                 continue
-            bf.grid[wx][wy] = 1  # Obstacle
-            if not hasattr(bf, '_temp_walls'):
-                bf._temp_walls = []
+            bf.set_cell(wx, wy, 1)  # Obstacle
             bf._temp_walls.append((wx, wy, spell.wall_duration, original))
         
-        visual_effects.setdefault('wall_effects', []).append(
-            WallEffect(wall_positions, cell_size, 25)
-        )
+        if visual_effects is not None:
+            visual_effects.setdefault('wall_effects', []).append(
+                WallEffect(wall_positions, cell_size, 25)
+            )
         
-        self.floating_texts.append(FloatingText("Mur de force!", (160, 80, 220), 70))
+        self.add_floating_text("Mur de force!", (160, 80, 220), 70)
         return True
     
     def tick_armor_buff(self):
         """Appelé chaque round pour décrémenter les buffs d'armure."""
-        if getattr(self, '_armor_buff', False):
+        if self._armor_buff:
             self._armor_buff_rounds -= 1
             if self._armor_buff_rounds <= 0:
                 self.sauvegarde += self._armor_buff_amount
                 self._armor_buff = False
-                self.floating_texts.append(FloatingText("Armure dissipée", (150, 150, 200), 50))
\ No newline at end of file
+                self.add_floating_text("Armure dissipée", (150, 150, 200), 50)
\ No newline at end of file
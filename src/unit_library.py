@@ -22,6 +22,7 @@ Champs d'une unité:
 from models import Arme, SpellFireball, SpellHeal, SpellMagicArmor, SpellMagicProjectile, SpellWall
 from unit import Unit
 import os
+import re
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -445,63 +446,105 @@ def _build_arme(arme_tuple):
                 perforation=perf, degats=degats, porte=portee)
 
 
-def create_unit(unit_def, army_color):
-    """Crée un objet Unit depuis un dict de définition."""
-    armes = [_build_arme(a) for a in unit_def["armes"]]
-    
-    unit = Unit(
-        name=unit_def["nom"][:10],
-        pv=unit_def["blessure"],
-        vitesse=unit_def["deplacement"],
-        morale=unit_def["bravoure"],
-        sauvegarde=unit_def["sauvegarde"],
-        color=army_color,
-        armes=armes,
-        role=unit_def.get("role", "front"),
-        size=unit_def.get("size", 1),
-        unit_type=unit_def.get("unit_type", "Infanterie"),
-    )
-    unit.token_name = unit_def["nom"]
-    
-    # Traits
-    for t in unit_def.get("traits", []):
+# Sorts disponibles (une instance par unité: chaque sort a son propre cooldown)
+SPELL_CATALOG = {
+    "Boule de feu":        lambda: SpellFireball(porte=9, toucher=3, blesser=1, perforation=-2, degats="1d4", aoe_size=3, cooldown=2),
+    "Soin":                lambda: SpellHeal(porte=6, cooldown=3),
+    "Armure magique":      lambda: SpellMagicArmor(porte=4, bonus=2, duration=3, cooldown=4),
+    "Projectile magique":  lambda: SpellMagicProjectile(porte=15, toucher=3, blesser=1, degats="3d2", cooldown=1),
+    "Mur de force":        lambda: SpellWall(porte=8, nb_obstacles=3, wall_duration=5, cooldown=5),
+}
+
+
+def _parse_traits(traits):
+    """Traduit les traits texte en liste de (attribut, valeur) à poser sur l'unité."""
+    result = []
+    for t in traits:
         tl = t.lower()
         if "encouragement" in tl:
-            unit.encouragement_range = 4
+            result.append(("encouragement_range", 4))
         if "anti-infanterie" in tl or "anti infanterie" in tl:
-            unit.anti_infanterie = True
+            result.append(("anti_infanterie", True))
         if "anti-large" in tl or "anti large" in tl:
-            unit.anti_large = True
+            result.append(("anti_large", True))
         if "phalange" in tl:
-            unit.phalange = True
+            result.append(("phalange", True))
         if "charge montée" in tl or "charge montee" in tl:
-            unit.charge_montee = True
+            result.append(("charge_montee", True))
         if "charge d'aïda" in tl or "charge d'aida" in tl or "charge aida" in tl:
-            unit.charge_aida = True
+            result.append(("charge_aida", True))
         # "Sort de bataille (N)" → N sorts par round
         if "sort de bataille" in tl:
-            import re
             m = re.search(r'\((\d+)\)', t)
             if m:
-                unit.spells_per_round = int(m.group(1))
-    
-    # Sorts
-    SPELL_CATALOG = {
-        "Boule de feu":        lambda: SpellFireball(porte=9, toucher=3, blesser=1, perforation=-2, degats="1d4", aoe_size=3, cooldown=2),
-        "Soin":                lambda: SpellHeal(porte=6, cooldown=3),
-        "Armure magique":      lambda: SpellMagicArmor(porte=4, bonus=2, duration=3, cooldown=4),
-        "Projectile magique":  lambda: SpellMagicProjectile(porte=15, toucher=3, blesser=1, degats="3d2", cooldown=1),
-        "Mur de force":        lambda: SpellWall(porte=8, nb_obstacles=3, wall_duration=5, cooldown=5),
-    }
-    
-    for spell_name in unit_def.get("sorts", []):
-        factory = SPELL_CATALOG.get(spell_name)
-        if factory:
+                result.append(("spells_per_round", int(m.group(1))))
+    return result
+
+
+class UnitTemplate:
+    """Gabarit compilé d'une définition d'unité (poids-mouche).
+
+    Les armes, les traits et les sorts ne sont analysés qu'une fois: toutes les
+    unités créées par instantiate() partagent les mêmes objets Arme (en lecture
+    seule). Seul l'état propre à l'unité (PV, position, moral, cooldowns des
+    sorts...) est alloué à chaque instance.
+    """
+
+    def __init__(self, unit_def, army_color):
+        self.unit_kwargs = dict(
+            name=unit_def["nom"][:10],
+            pv=unit_def["blessure"],
+            vitesse=unit_def["deplacement"],
+            morale=unit_def["bravoure"],
+            sauvegarde=unit_def["sauvegarde"],
+            color=army_color,
+            role=unit_def.get("role", "front"),
+            size=unit_def.get("size", 1),
+            unit_type=unit_def.get("unit_type", "Infanterie"),
+        )
+        self.token_name = unit_def["nom"]
+        self.armes = tuple(_build_arme(a) for a in unit_def["armes"])
+        self.traits = _parse_traits(unit_def.get("traits", []))
+        self.spell_factories = []
+        for spell_name in unit_def.get("sorts", []):
+            factory = SPELL_CATALOG.get(spell_name)
+            if factory:
+                self.spell_factories.append(factory)
+            else:
+                print(f"  ATTENTION: sort '{spell_name}' inconnu")
+
+    def instantiate(self):
+        """Crée une nouvelle Unit à partir du gabarit."""
+        unit = Unit(armes=list(self.armes), **self.unit_kwargs)
+        unit.token_name = self.token_name
+        for attr, value in self.traits:
+            setattr(unit, attr, value)
+        for factory in self.spell_factories:
             unit.spells.append(factory())
-        else:
-            print(f"  ATTENTION: sort '{spell_name}' inconnu")
-    
-    return unit
+        return unit
+
+
+# Gabarits par (armée, nom d'unité), vidé quand UNIT_DATABASE change
+_TEMPLATE_CACHE = {}
+
+
+def get_template(army_name, unit_def, army_color):
+    """Gabarit (mis en cache) d'une unité de la bibliothèque."""
+    key = (army_name, unit_def["nom"])
+    template = _TEMPLATE_CACHE.get(key)
+    if template is None:
+        template = _TEMPLATE_CACHE[key] = UnitTemplate(unit_def, army_color)
+    return template
+
+
+def clear_template_cache():
+    """Oublie les gabarits compilés (à appeler après toute modification de UNIT_DATABASE)."""
+    _TEMPLATE_CACHE.clear()
+
+
+def create_unit(unit_def, army_color):
+    """Crée un objet Unit depuis un dict de définition (sans cache)."""
+    return UnitTemplate(unit_def, army_color).instantiate()
 
 
 def get_library():
@@ -529,7 +572,7 @@ def make_unit(army_name, unit_name):
         return None
     for u_def in army["units"]:
         if u_def["nom"] == unit_name:
-            return create_unit(u_def, army["color"])
+            return get_template(army_name, u_def, army["color"]).instantiate()
     return None
 
 
@@ -555,9 +598,10 @@ def build_army(army_name, composition):
             print(f"  ATTENTION: '{unit_name}' introuvable dans '{army_name}'")
             print(f"  Disponibles: {', '.join(unit_by_name.keys())}")
             continue
+        template = get_template(army_name, u_def, color)
+        short = unit_name[:6]
         for i in range(count):
-            u = create_unit(u_def, color)
-            short = unit_name[:6]
+            u = template.instantiate()
             u.name = f"{short}{i + 1}" if count > 1 else short
             result.append(u)
     
@@ -580,6 +624,7 @@ def load_custom_units_into_db():
     """
     import json
     
+    clear_template_cache()
     if not os.path.isdir(CUSTOM_DIR):
         # Pas de dossier custom → retirer l'armée custom si elle existait
         UNIT_DATABASE.pop(CUSTOM_ARMY_NAME, None)